@@ -0,0 +1,391 @@
+"""
+Streaming batch solver for problem files, without the GUI.
+
+Usage:
+    python -m batch problems.jsonl [-o results.jsonl] [--shape triangle]
+    python -m batch problems.csv --format csv -o -
+    cat problems.jsonl | python -m batch -
+
+Input rows (one problem each):
+- JSONL: {"id": 1, "shape": "triangle", "inputs": {"a": 3, "b": 4, "C": 90}}
+  or flat {"id": 1, "shape": "triangle", "a": 3, "b": 4, "C": 90};
+- CSV: header with optional `id` / `shape` columns and one column per variable
+  (empty cell = unknown).
+`shape` is a geometry_kb network name (see NETWORK_FACTORIES); rows without it
+use --shape. Output is JSONL, one record per input row, written as soon as the
+row is solved:
+    {"row", "id", "shape", "status": "ok"|"budget_exhausted"|"error", "message",
+     "converged", "results": {var: value}, "provenance": {var: source}}
+A row whose solve ran out of budget (--timeout, --max-evaluations) has
+status "budget_exhausted", the exhausted limit as message and its partial
+results; it counts as an error in the progress readout.
+Rows that fail a cheap necessary condition (prefilter: triangle inequality,
+angle sum, perimeter, ...) are rejected before solving, with the reason in
+"infeasible" (--prefilter flag: reported but still solved; off: not checked).
+Rows are read, solved and written through generators and one network per shape
+is reused, so memory stays bounded whatever the input size. Progress and
+throughput are reported on stderr.
+
+Large datasets can skip text parsing entirely: a NumPy .npy structured array
+(or a raw file of record_dtype(shape) records, --format raw) with one float64
+column per variable, NaN = unknown, and an optional integer `shape` column
+(index into SHAPE_CODES). Results go to a pre-allocated memory-mapped output of
+the same layout (-o), per-row status codes optionally to --status and the
+prefilter reason codes to --reasons:
+    python -m batch problems.npy -o solved.npy --status status.npy --reasons reasons.npy
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+import geometry_kb as kb
+from engine import ConstraintNetwork, SolveBudget
+from solver import apply_inputs
+
+META_FIELDS = ('id', 'shape', 'inputs')
+
+# Mã trạng thái từng dòng (cột trạng thái của đầu ra mảng)
+STATUS_OK = 0
+STATUS_INPUT_ERROR = 1   # dữ liệu vào bị từ chối (xung đột, loại hình sai, ...)
+STATUS_FAILED = 2        # lỗi khi giải
+STATUS_BUDGET = 3        # dừng vì hết ngân sách (kết quả một phần)
+STATUS_INFEASIBLE = 4    # bị bộ lọc khả thi (prefilter) loại trước khi giải
+
+# Chế độ của bộ lọc khả thi: loại dòng, chỉ đánh dấu, hoặc tắt
+PREFILTER_MODES = ('reject', 'flag', 'off')
+
+
+# --- ĐỌC DỮ LIỆU ---
+def parse_record(row: int, record: Any, default_shape: Optional[str] = None) -> Dict[str, Any]:
+    """Normalize one raw record to {'row', 'id', 'shape', 'inputs'} or {'row', 'id', 'error'}."""
+    if not isinstance(record, dict):
+        return {'row': row, 'id': None, 'error': "Dòng không phải là một object"}
+    rec_id = record.get('id')
+    shape = record.get('shape') or default_shape
+    if not shape:
+        return {'row': row, 'id': rec_id, 'error': "Thiếu loại hình (shape)"}
+    if shape not in kb.NETWORK_FACTORIES:
+        return {'row': row, 'id': rec_id, 'error': f"Loại hình không hợp lệ: {shape}"}
+    raw = record['inputs'] if isinstance(record.get('inputs'), dict) else \
+        {k: v for k, v in record.items() if k not in META_FIELDS}
+    inputs: Dict[str, float] = {}
+    for name, value in raw.items():
+        if value is None or value == '':
+            continue
+        try:
+            val = float(value)
+        except (TypeError, ValueError):
+            return {'row': row, 'id': rec_id, 'error': f"Giá trị '{name}' không phải là số: {value!r}"}
+        if math.isnan(val):
+            continue  # NaN = chưa biết
+        inputs[name] = val
+    if not inputs:
+        return {'row': row, 'id': rec_id, 'error': "Không có giá trị đầu vào"}
+    return {'row': row, 'id': rec_id, 'shape': shape, 'inputs': inputs}
+
+
+def read_jsonl(stream: TextIO, default_shape: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    for row, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {'row': row, 'id': None, 'error': f"JSON không hợp lệ: {e}"}
+            continue
+        yield parse_record(row, record, default_shape)
+
+
+def read_csv(stream: TextIO, default_shape: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    for row, record in enumerate(csv.DictReader(stream), 1):
+        yield parse_record(row, record, default_shape)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+# --- GIẢI ---
+class BatchSolver:
+    """Solves normalized rows, reusing one network per shape."""
+
+    def __init__(self, budget: Optional[SolveBudget] = None, prefilter: str = 'reject'):
+        self.budget = budget
+        self.prefilter = prefilter
+        self._networks: Dict[str, ConstraintNetwork] = {}
+
+    def network(self, shape: str) -> ConstraintNetwork:
+        net = self._networks.get(shape)
+        if net is None:
+            net = kb.build_network(shape)
+            self._networks[shape] = net
+        else:
+            net.reset()
+        return net
+
+    def solve_inputs(self, shape: str, inputs: Dict[str, float]) -> Tuple[int, str, bool, ConstraintNetwork]:
+        """Solve one problem on the reused network: (status code, message, converged, network)."""
+        net = self.network(shape)
+        if self.budget is not None:
+            self.budget.start()  # một ngân sách cho cả dòng: lan truyền đầu vào và giải
+        try:
+            ok, msg = apply_inputs(net, inputs, budget=self.budget)
+            if not ok:
+                if self.budget is not None and self.budget.exhausted:
+                    return STATUS_BUDGET, self.budget.exhausted, False, net
+                return STATUS_INPUT_ERROR, msg, False, net
+            converged, diagnostics = net.solve(budget=self.budget)
+        except Exception as e:  # một dòng lỗi không được làm dừng cả lô
+            return STATUS_FAILED, f"{type(e).__name__}: {e}", False, net
+        exhausted = diagnostics.get('budget_exhausted')
+        return (STATUS_BUDGET, exhausted, converged, net) if exhausted else (STATUS_OK, "", converged, net)
+
+    def solve(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        out = {'row': item['row'], 'id': item.get('id'), 'shape': item.get('shape')}
+        if 'error' in item:
+            out.update(status='error', message=item['error'])
+            return out
+        reason = 0
+        if self.prefilter != 'off' and item['shape'] in kb.NETWORK_FACTORIES:
+            import prefilter
+            reason = prefilter.check_inputs(item['shape'], item['inputs'])
+            if reason:
+                out['infeasible'] = prefilter.REASON_NAMES[reason]
+                if self.prefilter == 'reject':
+                    out.update(status='error', message=prefilter.REASON_MESSAGES[reason])
+                    return out
+        code, msg, converged, net = self.solve_inputs(item['shape'], item['inputs'])
+        if code in (STATUS_INPUT_ERROR, STATUS_FAILED):
+            out.update(status='error', message=msg)
+            return out
+        provenance = net.get_provenance()
+        results = {n: v for n, v in net.get_results().items() if v is not None}
+        out.update(status='budget_exhausted' if code == STATUS_BUDGET else 'ok', message=msg, converged=converged,
+                   results=results, provenance={n: provenance[n] for n in results})
+        return out
+
+    def solve_all(self, items: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for item in items:
+            yield self.solve(item)
+
+
+# --- GHI KẾT QUẢ & TIẾN ĐỘ ---
+class Progress:
+    """Rows / errors / throughput readout on a stream (stderr), refreshed every `interval` seconds."""
+
+    def __init__(self, stream: Optional[TextIO] = sys.stderr, interval: float = 1.0):
+        self.stream = stream
+        self.interval = interval
+        self.rows = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def update(self, record: Dict[str, Any]):
+        self.count(record.get('status') == 'ok')
+
+    def count(self, ok: bool):
+        self.rows += 1
+        if not ok:
+            self.errors += 1
+        now = time.perf_counter()
+        if self.stream is not None and now - self._last >= self.interval:
+            self._last = now
+            self.stream.write("\r" + self.line(now))
+            self.stream.flush()
+
+    def line(self, now: Optional[float] = None) -> str:
+        elapsed = (now or time.perf_counter()) - self.start
+        rate = self.rows / elapsed if elapsed > 0 else 0.0
+        return f"{self.rows} dòng, {self.errors} lỗi, {rate:.0f} dòng/s"
+
+    def finish(self):
+        if self.stream is not None:
+            self.stream.write("\r" + self.line() + "\n")
+            self.stream.flush()
+
+
+def write_jsonl(records: Iterable[Dict[str, Any]], out: TextIO, progress: Optional[Progress] = None):
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if progress is not None:
+            progress.update(record)
+
+
+# --- MẢNG CÓ CẤU TRÚC (.npy / memmap thô) ---
+# Cột số nguyên 'shape' (tuỳ chọn) của mảng: chỉ số trong SHAPE_CODES
+SHAPE_CODES = tuple(kb.NETWORK_FACTORIES)
+
+
+def record_dtype(shape: Optional[str] = None):
+    """Structured dtype with one float64 column per variable of `shape` (every KB variable if None)."""
+    import numpy as np
+    shapes = [shape] if shape else SHAPE_CODES
+    names = dict.fromkeys(n for s in shapes for n, _ in kb.resolve_spec(s)['variables'])
+    return np.dtype([(n, '<f8') for n in names])
+
+
+def open_array(path: str, fmt: str, shape: Optional[str] = None):
+    """Read-only memory map of an input array (.npy, or raw records of record_dtype(shape))."""
+    import numpy as np
+    if fmt == 'npy':
+        return np.load(path, mmap_mode='r')
+    return np.memmap(path, dtype=record_dtype(shape), mode='r')
+
+
+def create_array(path: str, fmt: str, dtype, length: int):
+    """Pre-allocated writable memory map for the output (.npy header or raw)."""
+    import numpy as np
+    if fmt == 'npy':
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(length,))
+    return np.memmap(path, dtype=dtype, mode='w+', shape=(length,))
+
+
+def solve_array(src, dst, shape: Optional[str] = None, status=None, chunk_rows: int = 4096,
+                budget: Optional[SolveBudget] = None, progress: Optional[Progress] = None,
+                prefilter: str = 'reject', reasons=None):
+    """
+    Solve every record of the structured array `src` (NaN = unknown) and write the
+    solved values into `dst`, same layout (unknown stays NaN). Rows use the shape
+    given by the integer 'shape' column if present, else `shape`. `status`, if
+    given, receives one STATUS_* code per row. Arrays are moved chunk by chunk with
+    column-wise numpy copies: each row's known values become the inputs dict the
+    solver takes, and solved values are written straight into a pre-allocated
+    float64 chunk, never through per-row record objects or output lists.
+    Each chunk first goes through prefilter.check_array: with 'reject' the rows it
+    flags are not solved (input kept, STATUS_INFEASIBLE), with 'flag' they are
+    solved anyway; `reasons`, if given, receives the reason code of every row.
+    """
+    import numpy as np
+    from numpy.lib import recfunctions as rfn
+    import prefilter as pf
+    names = [n for n in src.dtype.names if n != 'shape']
+    has_codes = 'shape' in src.dtype.names
+    if not has_codes and shape is None:
+        raise ValueError("Mảng không có cột 'shape': cần chỉ định loại hình")
+    if len(dst) != len(src) or dst.dtype.names != src.dtype.names:
+        raise ValueError("Mảng kết quả phải cùng số dòng và cùng cấu trúc với mảng đầu vào")
+    nan = float('nan')
+    solver = BatchSolver(budget)
+    for start in range(0, len(src), chunk_rows):
+        stop = min(start + chunk_rows, len(src))
+        block = rfn.structured_to_unstructured(src[names][start:stop], dtype=np.float64)
+        codes = src['shape'][start:stop].tolist() if has_codes else None
+        block_reasons = None
+        if prefilter != 'off':
+            block_reasons = pf.check_array(src[start:stop], np.asarray(codes) if has_codes else shape)
+            if reasons is not None:
+                reasons[start:stop] = block_reasons
+        rejected = block_reasons.tolist() if prefilter == 'reject' else None
+        # Kết quả ghi thẳng vào khối float64 cấp phát sẵn; dòng không giải giữ nguyên dữ liệu vào
+        out_block = block.copy()
+        out_status = np.empty(stop - start, dtype=np.int8)
+        for i, row in enumerate(block.tolist()):
+            row_shape = shape
+            if codes is not None:
+                code = codes[i]
+                row_shape = SHAPE_CODES[code] if 0 <= code < len(SHAPE_CODES) else None
+            inputs = {n: v for n, v in zip(names, row) if v == v}
+            if rejected is not None and rejected[i]:
+                code, net = STATUS_INFEASIBLE, None
+            elif row_shape is None or not inputs:
+                code, net = STATUS_INPUT_ERROR, None
+            else:
+                code, _, _, net = solver.solve_inputs(row_shape, inputs)
+            if code not in (STATUS_INPUT_ERROR, STATUS_FAILED, STATUS_INFEASIBLE):
+                net_vars = net.vars
+                for j, n in enumerate(names):
+                    var = net_vars.get(n)
+                    out_block[i, j] = var.value if var is not None and var.value is not None else nan
+            out_status[i] = code
+            if progress is not None:
+                progress.count(code == STATUS_OK)
+        for j, n in enumerate(names):
+            dst[n][start:stop] = out_block[:, j]
+        if has_codes:
+            dst['shape'][start:stop] = src['shape'][start:stop]
+        if status is not None:
+            status[start:stop] = out_status
+    if hasattr(dst, 'flush'):
+        dst.flush()
+    for out in (status, reasons):
+        if out is not None and hasattr(out, 'flush'):
+            out.flush()
+
+
+def detect_format(path: str) -> str:
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        return 'csv'
+    if lower.endswith('.npy'):
+        return 'npy'
+    return 'jsonl'
+
+
+def run(input_path: str, output_path: str = '-', fmt: str = 'auto', shape: Optional[str] = None,
+        timeout: Optional[float] = None, max_evaluations: Optional[int] = None,
+        progress_stream: Optional[TextIO] = sys.stderr, status_path: Optional[str] = None,
+        chunk_rows: int = 4096, prefilter: str = 'reject', reasons_path: Optional[str] = None) -> Progress:
+    fmt = detect_format(input_path) if fmt == 'auto' else fmt
+    budget = SolveBudget(timeout=timeout, max_evaluations=max_evaluations) \
+        if timeout is not None or max_evaluations is not None else None
+    progress = Progress(progress_stream)
+    if fmt in ('npy', 'raw'):
+        if output_path == '-':
+            raise ValueError("Đầu ra dạng mảng cần một đường dẫn tệp (-o)")
+        src = open_array(input_path, fmt, shape)
+        dst = create_array(output_path, fmt, src.dtype, len(src))
+        status = create_array(status_path, 'npy', 'i1', len(src)) if status_path else None
+        reasons = create_array(reasons_path, 'npy', 'i1', len(src)) if reasons_path else None
+        solve_array(src, dst, shape, status, chunk_rows, budget, progress, prefilter, reasons)
+        progress.finish()
+        return progress
+    src = sys.stdin if input_path == '-' else open(input_path, newline='', encoding='utf-8')
+    dst = sys.stdout if output_path == '-' else open(output_path, 'w', encoding='utf-8')
+    try:
+        rows = READERS[fmt](src, shape)
+        write_jsonl(BatchSolver(budget, prefilter).solve_all(rows), dst, progress)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+        else:
+            dst.flush()
+    progress.finish()
+    return progress
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m batch', description="Giải hàng loạt bài toán hình học từ tệp JSONL/CSV/NumPy")
+    parser.add_argument('input', help="tệp đầu vào (.jsonl, .csv, .npy hoặc tệp thô), '-' = stdin")
+    parser.add_argument('-o', '--output', default='-',
+                        help="tệp kết quả: JSONL ('-' = stdout, mặc định) hoặc mảng cùng cấu trúc cho npy/raw")
+    parser.add_argument('--format', choices=['auto', 'jsonl', 'csv', 'npy', 'raw'], default='auto', help="định dạng đầu vào")
+    parser.add_argument('--shape', choices=sorted(kb.NETWORK_FACTORIES),
+                        help="loại hình mặc định cho dòng thiếu 'shape' (bắt buộc với raw: xác định cấu trúc bản ghi)")
+    parser.add_argument('--status', help="npy/raw: tệp .npy nhận mã trạng thái từng dòng")
+    parser.add_argument('--reasons', help="npy/raw: tệp .npy nhận mã lý do của bộ lọc khả thi (prefilter.REASON_NAMES)")
+    parser.add_argument('--prefilter', choices=PREFILTER_MODES, default='reject',
+                        help="bộ lọc khả thi trước khi giải: loại dòng (mặc định), chỉ đánh dấu, hoặc tắt")
+    parser.add_argument('--chunk-rows', type=int, default=4096, help="npy/raw: số dòng mỗi khối")
+    parser.add_argument('--timeout', type=float, help="giới hạn thời gian giải mỗi dòng (giây)")
+    parser.add_argument('--max-evaluations', type=int, help="giới hạn số lần đánh giá ràng buộc mỗi dòng")
+    parser.add_argument('--quiet', action='store_true', help="không in tiến độ ra stderr")
+    args = parser.parse_args(argv)
+    if args.format == 'raw' and not args.shape:
+        parser.error("--format raw cần --shape")
+    try:
+        run(args.input, args.output, args.format, args.shape, args.timeout, args.max_evaluations,
+            None if args.quiet else sys.stderr, args.status, args.chunk_rows, args.prefilter, args.reasons)
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Scaling benchmark of the generated n-gon networks (polygon_kb): for each n,
+build the network, enter the vertex coordinates (or the sides and diagonals)
+of a regular n-gon inscribed in a circle of radius 1, solve, and check the
+area against the closed form. The regular n-gon network is timed alongside.
+
+    python benchmarks/bench_polygon.py [--n 10 100 1000] [--runs 3] [--inputs coords sides]
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import polygon_kb  # noqa: E402
+
+
+def regular_inputs(n: int, kind: str) -> dict:
+    points = [(math.cos(2 * math.pi * i / n), math.sin(2 * math.pi * i / n)) for i in range(n)]
+    if kind == 'coords':
+        inputs = {}
+        for i, (x, y) in enumerate(points, 1):
+            inputs[f"x{i}"] = x
+            inputs[f"y{i}"] = y
+        return inputs
+    inputs = {polygon_kb.side(i): math.dist(points[i - 1], points[i % n]) for i in range(1, n + 1)}
+    inputs.update({f"d{k}": math.dist(points[0], points[k - 1]) for k in range(3, n)})
+    return inputs
+
+
+def run_once(n: int, kind: str) -> dict:
+    inputs = regular_inputs(n, kind)
+    t0 = time.perf_counter()
+    net = polygon_kb.build_polygon_network(n)
+    t1 = time.perf_counter()
+    for name, value in inputs.items():
+        net.vars[name].set(value, source='user')
+    converged, diag = net.solve()
+    t2 = time.perf_counter()
+    area = net.vars['area'].value
+    return {'build': t1 - t0, 'solve': t2 - t1, 'converged': converged, 'rounds': diag.get('rounds'),
+            'evaluations': diag.get('evaluations'), 'constraints': len(net.constraints),
+            'area_error': abs(area - 0.5 * n * math.sin(2 * math.pi / n)) if area is not None else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, nargs='+', default=[3, 10, 30, 100, 300, 1000])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--inputs', nargs='+', choices=['coords', 'sides'], default=['coords', 'sides'])
+    args = parser.parse_args(argv)
+
+    for kind in args.inputs:
+        print(f"polygon, inputs = {kind}")
+        print(f"{'n':>6} {'constraints':>11} {'build ms':>9} {'solve ms':>9} {'evals':>7} {'area err':>9}")
+        for n in args.n:
+            polygon_kb.build_polygon_network(n)  # spec và ràng buộc đã biên dịch nằm sẵn trong cache
+            runs = [run_once(n, kind) for _ in range(args.runs)]
+            last = runs[-1]
+            err = f"{last['area_error']:.1e}" if last['area_error'] is not None else '-'
+            print(f"{n:>6} {last['constraints']:>11} {statistics.median(r['build'] for r in runs) * 1000:>9.2f} "
+                  f"{statistics.median(r['solve'] for r in runs) * 1000:>9.2f} {last['evaluations']:>7} {err:>9}"
+                  + ("" if last['converged'] else "  (not converged)"))
+
+    print("regular polygon (from R)")
+    for n in args.n:
+        times = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            net = polygon_kb.build_regular_polygon_network(n)
+            net.set_input('R', 1.0)
+            net.solve()
+            times.append(time.perf_counter() - t0)
+        print(f"{n:>6} {statistics.median(times) * 1000:>9.3f} ms  area={net.vars['area'].value:.9f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Cold-start benchmark of the GUI: every run is a fresh interpreter that imports
+qui and, when a display is available, builds the window with the chosen
+renderer and processes the first paint. Reports wall time, peak RSS and whether
+matplotlib got loaded.
+
+    python benchmarks/cold_start.py [--runs 5] [--renderer tk mpl]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import qui
+t_import = time.perf_counter() - t0
+if sys.argv[1] == 'mpl':  # phần qui chỉ nạp khi chọn renderer matplotlib
+    import matplotlib.pyplot, matplotlib.backends.backend_tkagg, render_mpl
+t_renderer = time.perf_counter() - t0
+t_window = None
+error = None
+try:
+    import tkinter as tk
+    root = tk.Tk()
+    app = qui.GeometryCalculatorGUI(root, renderer=sys.argv[1])
+    root.update()
+    t_window = time.perf_counter() - t0
+    root.destroy()
+except tk.TclError as e:  # không có màn hình: chỉ đo thời gian import
+    error = str(e)
+print(json.dumps({'import': t_import, 'renderer': t_renderer, 'window': t_window, 'error': error,
+                  'matplotlib': 'matplotlib' in sys.modules,
+                  'maxrss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def run_once(renderer: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    out = subprocess.run([sys.executable, '-c', CHILD, renderer], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--renderer', nargs='+', default=['tk', 'mpl'])
+    args = parser.parse_args(argv)
+
+    for renderer in args.renderer:
+        runs = [run_once(renderer) for _ in range(args.runs)]
+        imports = [r['import'] * 1000 for r in runs]
+        with_renderer = [r['renderer'] * 1000 for r in runs]
+        line = (f"{renderer:>4}: import qui {statistics.median(imports):7.1f} ms"
+                f", + renderer {statistics.median(with_renderer):7.1f} ms (median of {args.runs})"
+                f", peak RSS {statistics.median(r['maxrss_mb'] for r in runs):6.1f} MB"
+                f", matplotlib loaded: {runs[0]['matplotlib']}")
+        windows = [r['window'] * 1000 for r in runs if r['window'] is not None]
+        if windows:
+            line += f", window ready {statistics.median(windows):7.1f} ms"
+        else:
+            line += f" (no window: {runs[0]['error']})"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Shape classification from solved values (shared by the GUI and the headless solver).
+
+classify_shape() handles one result; classify_shapes() classifies whole
+columns of results at once (NumPy, imported on first use) with the same
+tolerances and returns codes into TRIANGLE_CLASSES / QUAD_CLASSES.
+"""
+from typing import Dict, List, Optional, Tuple
+
+# Các lớp theo thứ tự ưu tiên của classify_shape, kèm chuỗi kế thừa
+TRIANGLE_CLASSES = ("Tam giác đều", "Tam giác vuông cân", "Tam giác vuông", "Tam giác cân", "Tam giác thường")
+QUAD_CLASSES = ("Hình vuông", "Hình chữ nhật", "Hình thoi", "Hình bình hành", "Hình thang cân", "Hình thang",
+                "Tứ giác thường")
+CHAINS = {
+    "Tam giác đều": ("Tam giác đều", "Tam giác cân", "Tam giác"),
+    "Tam giác vuông cân": ("Tam giác vuông cân", "Tam giác vuông", "Tam giác cân", "Tam giác"),
+    "Tam giác vuông": ("Tam giác vuông", "Tam giác"),
+    "Tam giác cân": ("Tam giác cân", "Tam giác"),
+    "Tam giác thường": ("Tam giác",),
+    "Hình vuông": ("Hình vuông", "Hình chữ nhật", "Hình bình hành", "Tứ giác"),
+    "Hình chữ nhật": ("Hình chữ nhật", "Hình bình hành", "Tứ giác"),
+    "Hình thoi": ("Hình thoi", "Hình bình hành", "Tứ giác"),
+    "Hình bình hành": ("Hình bình hành", "Tứ giác"),
+    "Hình thang cân": ("Hình thang cân", "Hình thang", "Tứ giác"),
+    "Hình thang": ("Hình thang", "Tứ giác"),
+    "Tứ giác thường": ("Tứ giác",),
+}
+
+
+def classify_shape(res: Dict[str, Optional[float]], is_triangle: bool) -> Tuple[str, List[str]]:
+    """Classify the shape type: (most specific name, inheritance chain)"""
+    if is_triangle:
+        a, b, c = res.get('a'), res.get('b'), res.get('c')
+        A, B, C = res.get('A'), res.get('B'), res.get('C')
+        
+        def close(x, y, thr=1e-6):
+            return x is not None and y is not None and abs(x - y) < thr
+        
+        equilateral = (a is not None and b is not None and c is not None and 
+                      close(a, b) and close(b, c))
+        isos = ((a is not None and b is not None and close(a, b)) or
+               (a is not None and c is not None and close(a, c)) or
+               (b is not None and c is not None and close(b, c)))
+        right_angle = ((A is not None and abs(A - 90) < 0.1) or
+                      (B is not None and abs(B - 90) < 0.1) or
+                      (C is not None and abs(C - 90) < 0.1))
+        right_by_pyth = False
+        if a is not None and b is not None and c is not None:
+            if (abs(a*a + b*b - c*c) < 1e-3 or abs(a*a + c*c - b*b) < 1e-3 or 
+                abs(b*b + c*c - a*a) < 1e-3):
+                right_by_pyth = True
+        right = right_angle or right_by_pyth
+        
+        if equilateral:
+            return "Tam giác đều", list(CHAINS["Tam giác đều"])
+        if right and isos:
+            return "Tam giác vuông cân", list(CHAINS["Tam giác vuông cân"])
+        if right:
+            return "Tam giác vuông", list(CHAINS["Tam giác vuông"])
+        if isos:
+            return "Tam giác cân", list(CHAINS["Tam giác cân"])
+        return "Tam giác thường", list(CHAINS["Tam giác thường"])
+    else:
+        a, b, c, d = res.get('a'), res.get('b'), res.get('c'), res.get('d')
+        A, B, C, D = res.get('A'), res.get('B'), res.get('C'), res.get('D')
+        
+        def close(x, y, thr=1e-6):
+            return x is not None and y is not None and abs(x - y) < thr
+        
+        all_sides_equal = (a is not None and b is not None and c is not None and d is not None and
+                          close(a, b) and close(b, c) and close(c, d))
+        # Tất cả 4 góc vuông
+        all_angles_90 = (A is not None and B is not None and C is not None and D is not None and
+                        abs(A - 90) < 0.1 and abs(B - 90) < 0.1 and 
+                        abs(C - 90) < 0.1 and abs(D - 90) < 0.1)
+        # Cạnh đối bằng nhau
+        opp_sides_equal = ((a is not None and c is not None and close(a, c)) and
+                          (b is not None and d is not None and close(b, d)))
+        # Góc đối bằng nhau
+        opp_angles_equal = ((A is not None and C is not None and close(A, C, 1e-3)) and
+                           (B is not None and D is not None and close(B, D, 1e-3)))
+        
+        # Song song qua tổng góc kề = 180°
+        def adjacent_sum_180(x, y):
+            return x is not None and y is not None and abs((x + y) - 180.0) < 0.1
+        pair1_parallel = (adjacent_sum_180(A, B) or adjacent_sum_180(C, D))  # AB // CD
+        pair2_parallel = (adjacent_sum_180(B, C) or adjacent_sum_180(D, A))  # BC // AD
+        both_pairs_parallel = pair1_parallel and pair2_parallel
+        exactly_one_pair_parallel = (pair1_parallel != pair2_parallel)
+
+        # Ưu tiên đặc thù: phân loại đặc hiệu trước
+        # Hình vuông: 4 cạnh bằng nhau VÀ TẤT CẢ 4 góc = 90°
+        if all_sides_equal and all_angles_90:
+            return "Hình vuông", list(CHAINS["Hình vuông"])
+
+        # Hình chữ nhật: TẤT CẢ góc = 90° VÀ cạnh đối bằng nhau
+        if all_angles_90 and opp_sides_equal:
+            return "Hình chữ nhật", list(CHAINS["Hình chữ nhật"])
+
+        # Hình thoi: 4 cạnh bằng nhau (ưu tiên hơn Hình bình hành nếu thoả)
+        if all_sides_equal:
+            return "Hình thoi", list(CHAINS["Hình thoi"])
+
+        # Hình bình hành: (cạnh đối bằng nhau) HOẶC (góc đối bằng nhau) HOẶC (cả hai cặp cạnh đối song song)
+        if opp_sides_equal or opp_angles_equal or both_pairs_parallel:
+            return "Hình bình hành", list(CHAINS["Hình bình hành"])
+
+        # Hình thang: chính xác 1 cặp cạnh đối song song (loại trừ bình hành)
+        if exactly_one_pair_parallel:
+            # Hình thang cân: 2 cạnh bên bằng nhau
+            is_isos = (
+                (pair1_parallel and b is not None and d is not None and close(b, d)) or
+                (pair2_parallel and a is not None and c is not None and close(a, c))
+            )
+            if is_isos:
+                return "Hình thang cân", list(CHAINS["Hình thang cân"])
+            return "Hình thang", list(CHAINS["Hình thang"])
+
+        return "Tứ giác thường", list(CHAINS["Tứ giác thường"])
+
+
+# --- PHÂN LOẠI THEO MẢNG ---
+def _column(res, name: str, length: int):
+    import numpy as np
+    names = res.dtype.names if hasattr(res, 'dtype') else res
+    if name in names:
+        return np.asarray(res[name], dtype=np.float64)
+    return np.full(length, np.nan)
+
+
+def classify_shapes(res, is_triangle: bool):
+    """
+    Vectorized classify_shape: `res` is a structured array or a name -> 1-D array
+    mapping (NaN = unknown, like None). Returns an int8 array of indices into
+    TRIANGLE_CLASSES or QUAD_CLASSES.
+    """
+    import numpy as np
+    n = len(res) if hasattr(res, 'dtype') else (len(next(iter(res.values()))) if res else 0)
+    col = {k: _column(res, k, n) for k in (('a', 'b', 'c', 'A', 'B', 'C') if is_triangle else
+                                           ('a', 'b', 'c', 'd', 'A', 'B', 'C', 'D'))}
+    # So sánh với NaN luôn sai: NaN đóng vai None của bản vô hướng
+
+    def close(x, y, thr=1e-6):
+        return np.abs(x - y) < thr
+
+    def right(x):
+        return np.abs(x - 90) < 0.1
+
+    if is_triangle:
+        a, b, c, A, B, C = (col[k] for k in ('a', 'b', 'c', 'A', 'B', 'C'))
+        equilateral = close(a, b) & close(b, c)
+        isos = close(a, b) | close(a, c) | close(b, c)
+        aa, bb, cc = a*a, b*b, c*c
+        right_by_pyth = (np.abs(aa + bb - cc) < 1e-3) | (np.abs(aa + cc - bb) < 1e-3) | (np.abs(bb + cc - aa) < 1e-3)
+        is_right = right(A) | right(B) | right(C) | right_by_pyth
+        return np.select([equilateral, is_right & isos, is_right, isos], [0, 1, 2, 3], 4).astype(np.int8)
+
+    a, b, c, d, A, B, C, D = (col[k] for k in ('a', 'b', 'c', 'd', 'A', 'B', 'C', 'D'))
+    all_sides_equal = close(a, b) & close(b, c) & close(c, d)
+    all_angles_90 = right(A) & right(B) & right(C) & right(D)
+    opp_sides_equal = close(a, c) & close(b, d)
+    opp_angles_equal = close(A, C, 1e-3) & close(B, D, 1e-3)
+
+    def adjacent_sum_180(x, y):
+        return np.abs((x + y) - 180.0) < 0.1
+    pair1_parallel = adjacent_sum_180(A, B) | adjacent_sum_180(C, D)
+    pair2_parallel = adjacent_sum_180(B, C) | adjacent_sum_180(D, A)
+    exactly_one = pair1_parallel != pair2_parallel
+    is_isos = (pair1_parallel & close(b, d)) | (pair2_parallel & close(a, c))
+    return np.select([all_sides_equal & all_angles_90,
+                      all_angles_90 & opp_sides_equal,
+                      all_sides_equal,
+                      opp_sides_equal | opp_angles_equal | (pair1_parallel & pair2_parallel),
+                      exactly_one & is_isos,
+                      exactly_one],
+                     [0, 1, 2, 3, 4, 5], 6).astype(np.int8)
+
+
+def class_names(is_triangle: bool) -> Tuple[str, ...]:
+    return TRIANGLE_CLASSES if is_triangle else QUAD_CLASSES
+
+
+def inheritance_matrix(codes, is_triangle: bool):
+    """
+    (categories, membership): every name appearing in the chains of the family
+    and a bool array (rows x categories), True where the row belongs to it.
+    """
+    import numpy as np
+    classes = class_names(is_triangle)
+    categories = tuple(dict.fromkeys(name for cls in classes for name in CHAINS[cls]))
+    table = np.array([[name in CHAINS[cls] for name in categories] for cls in classes], dtype=bool)
+    return categories, table[np.asarray(codes, dtype=np.intp)]
+
+
+def class_counts(codes, is_triangle: bool, chains: bool = False) -> Dict[str, int]:
+    """
+    Rows per class (most specific name); with `chains`, rows per category of the
+    inheritance chains instead (a square also counts as rectangle, ...).
+    """
+    import numpy as np
+    classes = class_names(is_triangle)
+    counts = np.bincount(np.asarray(codes, dtype=np.intp), minlength=len(classes))
+    if not chains:
+        return {name: int(k) for name, k in zip(classes, counts)}
+    totals: Dict[str, int] = {}
+    for name, k in zip(classes, counts):
+        for category in CHAINS[name]:
+            totals[category] = totals.get(category, 0) + int(k)
+    return totals
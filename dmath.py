@@ -0,0 +1,203 @@
+import math
+from typing import Dict, Mapping
+
+pi = math.pi
+e = math.e
+
+
+class Dual(float):
+    """
+    Forward-mode dual number: a float value carrying partial derivatives
+    with respect to named inputs (der = {input_name: d value / d input}).
+    Behaves like a plain float everywhere (comparisons, formatting, float()),
+    arithmetic and the functions of this module propagate the derivatives.
+    """
+    __slots__ = ('der',)
+
+    def __new__(cls, value: float, der: Mapping[str, float] = None):
+        obj = float.__new__(cls, value)
+        obj.der = dict(der) if der else {}
+        return obj
+
+    @classmethod
+    def seed(cls, value: float, name: str) -> 'Dual':
+        """Independent input: d value / d name = 1."""
+        return cls(value, {name: 1.0})
+
+    def __repr__(self):
+        return f"Dual({float(self)!r}, {self.der!r})"
+
+    def __reduce__(self):
+        return (Dual, (float(self), self.der))
+
+    # --- arithmetic ---
+    def __neg__(self):
+        return Dual(-float(self), _scale(self.der, -1.0))
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return -self if float(self) < 0 else self
+
+    def __add__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        return Dual(float(self) + float(other), _combine(self.der, 1.0, _der(other), 1.0))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        return Dual(float(self) - float(other), _combine(self.der, 1.0, _der(other), -1.0))
+
+    def __rsub__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        return Dual(float(other) - float(self), _combine(_der(other), 1.0, self.der, -1.0))
+
+    def __mul__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        x, y = float(self), float(other)
+        return Dual(x * y, _combine(self.der, y, _der(other), x))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        x, y = float(self), float(other)
+        q = x / y
+        return Dual(q, _combine(self.der, 1.0 / y, _der(other), -q / y))
+
+    def __rtruediv__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        x, y = float(other), float(self)
+        q = x / y
+        return Dual(q, _combine(_der(other), 1.0 / y, self.der, -q / y))
+
+    def __mod__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        # x % m = x - m*floor(x/m): piecewise shift, derivative w.r.t. x is 1
+        return Dual(float(self) % float(other), self.der)
+
+    def __pow__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        x = float(self)
+        if isinstance(other, Dual):
+            val = x ** float(other)
+            d_base = float(other) * x ** (float(other) - 1.0) if x != 0 else 0.0
+            d_exp = val * math.log(x) if x > 0 else 0.0
+            return Dual(val, _combine(self.der, d_base, other.der, d_exp))
+        n = float(other)
+        val = x ** n
+        d_base = n * x ** (n - 1.0) if (x != 0 or n >= 1.0) else 0.0
+        return Dual(val, _scale(self.der, d_base))
+
+    def __rpow__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        return Dual(float(other), _der(other)) ** self
+
+
+def _der(x) -> Dict[str, float]:
+    return x.der if isinstance(x, Dual) else {}
+
+
+def _scale(der: Dict[str, float], k: float) -> Dict[str, float]:
+    return {n: k * d for n, d in der.items()}
+
+
+def _combine(d1: Dict[str, float], k1: float, d2: Dict[str, float], k2: float) -> Dict[str, float]:
+    if not d2:
+        return _scale(d1, k1) if k1 != 1.0 else d1
+    if not d1:
+        return _scale(d2, k2)
+    out = {n: k1 * d for n, d in d1.items()}
+    for n, d in d2.items():
+        out[n] = out.get(n, 0.0) + k2 * d
+    return out
+
+
+def _chain(x, val: float, slope: float):
+    """Apply the chain rule for a unary function with derivative `slope` at x."""
+    if isinstance(x, Dual):
+        return Dual(val, _scale(x.der, slope))
+    return val
+
+
+# --- dual-aware counterparts of the math functions used by the knowledge base ---
+def sin(x):
+    return _chain(x, math.sin(x), math.cos(x)) if isinstance(x, Dual) else math.sin(x)
+
+
+def cos(x):
+    return _chain(x, math.cos(x), -math.sin(x)) if isinstance(x, Dual) else math.cos(x)
+
+
+def tan(x):
+    if not isinstance(x, Dual):
+        return math.tan(x)
+    t = math.tan(x)
+    return _chain(x, t, 1.0 + t * t)
+
+
+def asin(x):
+    if not isinstance(x, Dual):
+        return math.asin(x)
+    den = math.sqrt(1.0 - float(x) ** 2)
+    return _chain(x, math.asin(x), 1.0 / den if den > 0 else 0.0)
+
+
+def acos(x):
+    if not isinstance(x, Dual):
+        return math.acos(x)
+    den = math.sqrt(1.0 - float(x) ** 2)
+    return _chain(x, math.acos(x), -1.0 / den if den > 0 else 0.0)
+
+
+def atan2(y, x):
+    if not isinstance(x, Dual) and not isinstance(y, Dual):
+        return math.atan2(y, x)
+    yf, xf = float(y), float(x)
+    r2 = xf * xf + yf * yf
+    if r2 == 0:
+        return Dual(math.atan2(yf, xf))
+    return Dual(math.atan2(yf, xf), _combine(_der(y), xf / r2, _der(x), -yf / r2))
+
+
+def sqrt(x):
+    if not isinstance(x, Dual):
+        return math.sqrt(x)
+    r = math.sqrt(x)
+    # d sqrt(x) = 1/(2 sqrt(x)); at x = 0 the derivative is unbounded, report 0
+    return _chain(x, r, 0.5 / r if r > 0 else 0.0)
+
+
+def radians(x):
+    return _chain(x, math.radians(x), math.pi / 180.0) if isinstance(x, Dual) else math.radians(x)
+
+
+def degrees(x):
+    return _chain(x, math.degrees(x), 180.0 / math.pi) if isinstance(x, Dual) else math.degrees(x)
+
+
+def hypot(x, y):
+    if not isinstance(x, Dual) and not isinstance(y, Dual):
+        return math.hypot(x, y)
+    return sqrt(x * x + y * y)
+
+
+def value_of(x):
+    """Strip derivatives: plain float (or None)."""
+    return None if x is None else float(x)
+
+
+def derivatives_of(x) -> Dict[str, float]:
+    """Partial derivatives carried by x ({} for plain numbers)."""
+    return dict(x.der) if isinstance(x, Dual) else {}
@@ -1,10 +1,28 @@
+import json
 import math
+import struct
+import time
+import zlib
+from collections import deque
+from contextvars import ContextVar
 import networkx as nx
-import matplotlib.pyplot as plt
 from typing import Callable, Dict, List, Optional, Any, Tuple
+import dmath
+from dmath import Dual
 
 EPSILON = 1e-9
+# Sai số tương đối khi so sánh giá trị (vài ULP của double): nhiễu làm tròn không tính là thay đổi
+REL_EPSILON = 1e-12
 DEFAULT_ANGLE_TOL = 0.1
+# Số lần một biến đã biết được đổi giá trị trong một lần giải trước khi coi là dao động
+MAX_VAR_CHANGES = 8
+# Ảnh chụp trạng thái: magic, dấu vân tay cấu trúc, độ dài mã loại mạng, số biến
+SNAPSHOT_MAGIC = b'CNS1'
+_SNAPSHOT_HEADER = struct.Struct('<4sIHI')
+
+def values_close(a: float, b: float) -> bool:
+    """Same value up to EPSILON absolute or REL_EPSILON relative (rounding noise)."""
+    return math.isclose(a, b, rel_tol=REL_EPSILON, abs_tol=EPSILON)
 
 def safe_sqrt(x: float) -> Optional[float]:
     """Safe square root with tolerance for numerical errors"""
@@ -16,17 +34,89 @@ def safe_sqrt(x: float) -> Optional[float]:
                 x = 0.0
             else:
                 return None
-        return math.sqrt(x)
+        return dmath.sqrt(x)
     except (ValueError, TypeError):
         return None
 
 def clamp(x: float, lo: float = -1.0, hi: float = 1.0) -> float:
     """Clamp value to range [lo, hi] with error handling"""
     try:
+        if isinstance(x, Dual):
+            # keep derivatives inside the range, clamped bounds are constants
+            return x if lo <= x <= hi else float(lo if x < lo else hi)
         return max(lo, min(hi, float(x)))
     except (TypeError, ValueError):
         return lo
 
+class IntermediateCache:
+    """
+    Per-solve cache of the intermediates many constraints recompute from the
+    same variable: radians, sin/cos of an angle in degrees, squares.
+    Entries are keyed by operation and the value object a variable holds (its
+    version): every new value — set, rollback, retraction, reset — is a new
+    object, so a stale entry can never match. Each entry keeps its value alive,
+    hence ids are not reused while cached. Dual values are cached like floats.
+    """
+    MAX_ENTRIES = 4096
+
+    def __init__(self):
+        self.entries: Dict[Tuple[str, int], Tuple[float, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, op: str, x: float, compute: Callable[[float], float]) -> float:
+        entry = self.entries.get((op, id(x)))
+        if entry is not None and entry[0] is x:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        result = compute(x)
+        if len(self.entries) >= self.MAX_ENTRIES:
+            self.entries.clear()
+        self.entries[(op, id(x))] = (x, result)
+        return result
+
+    def clear(self):
+        self.entries.clear()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+# Bộ nhớ đệm của mạng đang giải trong luồng/ngữ cảnh hiện tại (None = tính trực tiếp)
+_active_cache: ContextVar[Optional[IntermediateCache]] = ContextVar('active_intermediate_cache', default=None)
+
+def _sin_deg(x):
+    return dmath.sin(dmath.radians(x))
+
+def _cos_deg(x):
+    return dmath.cos(dmath.radians(x))
+
+def _square(x):
+    return x ** 2
+
+def cached_radians(x: float) -> float:
+    cache = _active_cache.get()
+    return dmath.radians(x) if cache is None else cache.get('rad', x, dmath.radians)
+
+def sin_deg(x: float) -> float:
+    """sin of an angle in degrees, from the active solve's cache when there is one"""
+    cache = _active_cache.get()
+    return _sin_deg(x) if cache is None else cache.get('sin', x, _sin_deg)
+
+def cos_deg(x: float) -> float:
+    """cos of an angle in degrees, from the active solve's cache when there is one"""
+    cache = _active_cache.get()
+    return _cos_deg(x) if cache is None else cache.get('cos', x, _cos_deg)
+
+def square(x: float) -> float:
+    cache = _active_cache.get()
+    return x ** 2 if cache is None else cache.get('sq', x, _square)
+
 class Var:
     def __init__(self, name: str, description: str = ""):
         self.name = name
@@ -44,7 +134,8 @@ class Var:
             return False
         
         try:
-            v = float(v)
+            if not isinstance(v, Dual):
+                v = float(v)
         except (TypeError, ValueError):
             return False
         
@@ -67,7 +158,7 @@ class Var:
         except Exception:
             return False
         
-        if self.value is None or abs(self.value - v) > EPSILON:
+        if self.value is None or not values_close(self.value, v):
             self.value = v
             self.source = source
             return True
@@ -117,7 +208,7 @@ class Constraint:
                     for k, v in res.items():
                         if k in net.vars and v is not None:
                             try:
-                                updates[k] = float(v)
+                                updates[k] = v if isinstance(v, Dual) else float(v)
                             except (TypeError, ValueError):
                                 if net.debug:
                                     net.log(f"[Constraint {self.name}] Invalid value for {k}: {v}")
@@ -148,7 +239,8 @@ class Constraint:
                 res = self.forward_func(values)
                 if res is None:
                     return {}
-                res = float(res)
+                if not isinstance(res, Dual):
+                    res = float(res)
                 updates[self.target] = res
             except ZeroDivisionError:
                 if net.debug:
@@ -164,13 +256,141 @@ class Constraint:
                 return {}
         return updates
 
+class SolveBudget:
+    """
+    Per-solve resource limits: wall-clock timeout (seconds), number of constraint
+    evaluations and number of value updates. Any limit left as None is unbounded.
+    One budget covers one problem: it starts at its first use by set_input,
+    propagate_from, update_input or solve, and every later call only charges it,
+    so the limits apply to the whole problem, not to each call. start() restarts
+    it for the next problem (a budget reused across problems, as in batch); a
+    network's default budget (ConstraintNetwork.budget) restarts at reset().
+    After a stop, `exhausted` names the limit that was hit. cancel() (callable from
+    another thread) stops the current and every later call using this budget.
+    """
+    def __init__(self, timeout: Optional[float] = None, max_evaluations: Optional[int] = None,
+                 max_updates: Optional[int] = None):
+        self.timeout = timeout
+        self.max_evaluations = max_evaluations
+        self.max_updates = max_updates
+        self.cancelled = False
+        self.started = False
+        self.evaluations = 0
+        self.updates = 0
+        self.exhausted: Optional[str] = None
+        self.deadline: Optional[float] = None
+
+    def start(self):
+        """(Re)start the budget: counters cleared, deadline from now."""
+        self.started = True
+        self.evaluations = 0
+        self.updates = 0
+        self.exhausted = None
+        self.deadline = (time.perf_counter() + self.timeout) if self.timeout is not None else None
+
+    def copy(self) -> 'SolveBudget':
+        """Unstarted budget with the same limits (for another network)."""
+        return SolveBudget(self.timeout, self.max_evaluations, self.max_updates)
+
+    def begin(self):
+        """Start the budget unless it is already running (entry point of every engine call)."""
+        if not self.started:
+            self.start()
+
+    def charge_evaluation(self) -> bool:
+        """Account one constraint evaluation. Returns False once the budget is spent."""
+        if self.exhausted:
+            return False
+        if self.cancelled:
+            self.exhausted = 'cancelled'
+            return False
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.exhausted = 'max_evaluations'
+            return False
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.exhausted = 'timeout'
+            return False
+        self.evaluations += 1
+        return True
+
+    def charge_update(self) -> bool:
+        """Account one value update. Returns False once the budget is spent."""
+        self.updates += 1
+        if self.max_updates is not None and self.updates > self.max_updates:
+            self.exhausted = 'max_updates'
+            return False
+        return True
+
+    def cancel(self):
+        """Request a stop: the solve using this budget ends at its next evaluation."""
+        self.cancelled = True
+
+    def __repr__(self):
+        return (f"SolveBudget(timeout={self.timeout}, max_evaluations={self.max_evaluations}, "
+                f"max_updates={self.max_updates})")
+
+class OscillationGuard:
+    """
+    Per-solve record of changes to already known values. A variable is flagged
+    as oscillating when it changes more than `max_changes` times or comes back
+    to the value it had before its previous change (ping-pong between two
+    constraints); flagged variables keep their value and are not re-propagated.
+    """
+
+    def __init__(self, max_changes: int = MAX_VAR_CHANGES):
+        self.max_changes = max_changes
+        self.changes: Dict[str, int] = {}
+        self.previous: Dict[str, float] = {}
+        self.oscillating: List[str] = []
+
+    def allow(self, var: Var, value: float) -> bool:
+        """Whether `var` may take `value`; first derivations and no-op sets always may."""
+        if var.name in self.oscillating:
+            return False
+        if var.value is None or values_close(var.value, value):
+            return True
+        count = self.changes.get(var.name, 0) + 1
+        self.changes[var.name] = count
+        before = self.previous.get(var.name)
+        if count > self.max_changes or (before is not None and values_close(before, value)):
+            self.oscillating.append(var.name)
+            return False
+        self.previous[var.name] = var.value
+        return True
+
+
+def snapshot_header(data: bytes) -> Tuple[str, int, int, int]:
+    """(network type, structure fingerprint, number of variables, payload offset) of a snapshot."""
+    if len(data) < _SNAPSHOT_HEADER.size or data[:4] != SNAPSHOT_MAGIC:
+        raise ValueError("Dữ liệu không phải ảnh chụp trạng thái mạng")
+    _, fingerprint, type_len, n = _SNAPSHOT_HEADER.unpack_from(data)
+    offset = _SNAPSHOT_HEADER.size + type_len
+    return data[_SNAPSHOT_HEADER.size:offset].decode('utf-8'), fingerprint, n, offset
+
+
 class ConstraintNetwork:
-    def __init__(self, *, debug: bool = False):
+    def __init__(self, *, debug: bool = False, sensitivities: bool = False):
         self.vars: Dict[str, Var] = {}
         self.constraints: List[Constraint] = []
         self.graph = nx.Graph()
         self.debug = debug
         self.diagnostics: Dict[str, Any] = {}
+        # Forward-mode sensitivities: inputs are seeded as dual numbers and every
+        # constraint propagates d(value)/d(input) along with the value.
+        self.sensitivities = sensitivities
+        # Default budget for solve()/propagate_from() when none is passed explicitly;
+        # reset() starts a new problem, so it restarts this budget too
+        self.budget: Optional[SolveBudget] = None
+        # Derivation support: derived variable -> known nodes of the constraint that set it
+        self._support: Dict[str, Tuple[str, ...]] = {}
+        # Chẩn đoán của lan truyền đầu vào từ lần solve()/reset() trước, gộp vào lần solve() kế
+        self._input_diagnostics: Dict[str, Any] = {}
+        # Đầu vào đã nhận qua set_input, theo thứ tự nhập: name -> (giá trị, nguồn)
+        self._user_inputs: Dict[str, Tuple[float, str]] = {}
+        # Radians/sin/cos/bình phương dùng chung giữa các ràng buộc (xóa khi reset())
+        self.intermediates = IntermediateCache()
+        # Loại mạng (tên spec của geometry_kb / polygon_kb), ghi vào ảnh chụp trạng thái
+        self.network_type: Optional[str] = None
 
     def log(self, msg: str):
         if self.debug:
@@ -195,12 +415,37 @@ class ConstraintNetwork:
         for n in constraint.nodes:
             self.graph.add_edge(constraint.name, n)
 
-    def set_input(self, name: str, value: float, source: str = 'user', tolerance: float = 1e-2) -> Tuple[bool, str]:
-        """Set input with consistency checking."""
+    def remove_constraint(self, name: str) -> bool:
+        """Drop a constraint (by name) from the network. Returns True if it existed."""
+        found = [c for c in self.constraints if c.name == name]
+        if not found:
+            return False
+        self.constraints = [c for c in self.constraints if c.name != name]
+        for v in self.vars.values():
+            v.constraints = [c for c in v.constraints if c.name != name]
+        if self.graph.has_node(name):
+            self.graph.remove_node(name)
+        return True
+
+    def remove_variable(self, name: str) -> bool:
+        """Drop a variable that no constraint uses. Returns True if it was removed."""
+        if name not in self.vars or self.vars[name].constraints:
+            return False
+        del self.vars[name]
+        if self.graph.has_node(name):
+            self.graph.remove_node(name)
+        return True
+
+    def set_input(self, name: str, value: float, source: str = 'user', tolerance: float = 1e-2,
+                  budget: Optional[SolveBudget] = None) -> Tuple[bool, str]:
+        """Set input with consistency checking. `budget` bounds the propagation it triggers."""
         if name not in self.vars:
             self.add_variable(name)
         
         var = self.vars[name]
+        entered = (value, source)
+        if self.sensitivities:
+            value = Dual.seed(value, name)
         
         # Check direct conflict
         if var.is_known():
@@ -210,17 +455,22 @@ class ConstraintNetwork:
                                f"mâu thuẫn với giá trị đã tính ({current_val:.4f})")
             else:
                 var.set(value, source=source)
+                self._user_inputs[name] = entered
                 return True, "Updated (refinement)"
 
         # Save state for rollback
         prev_states = {n: (v.value, v.source) for n, v in self.vars.items()}
+        prev_support = dict(self._support)
         
         changed = var.set(value, source=source)
         if changed:
+            self._support.pop(name, None)
             if self.debug:
                 self.log(f"Input set {name}={value} (source={source})")
             
-            self.propagate_from(name)
+            if not self.propagate_from(name, budget=budget):
+                self._user_inputs[name] = entered
+                return False, f"Dừng lan truyền ({self.diagnostics.get('budget_exhausted')})"
 
             # Perimeter consistency check
             tol = 1e-4
@@ -247,6 +497,7 @@ class ConstraintNetwork:
                         for n, (val, src) in prev_states.items():
                             self.vars[n].value = val
                             self.vars[n].source = src
+                        self._support = prev_support
                         return False, (f"Mâu thuẫn: Tổng các cạnh ({sum_known_sides:.4f}) "
                                        f"khác với Chu vi ({p})")
                 else:
@@ -255,67 +506,234 @@ class ConstraintNetwork:
                         for n, (val, src) in prev_states.items():
                             self.vars[n].value = val
                             self.vars[n].source = src
+                        self._support = prev_support
                         return False, (f"Chu vi = {p} nhỏ hơn hoặc bằng tổng cạnh đã biết ({sum_known_sides:.4f})")
         
+        self._user_inputs[name] = entered
         return True, "Success"
 
-    def propagate_from(self, start_name: str):
-        """Queue-based incremental propagation with provenance logging."""
-        queue = [start_name]
+    def propagate_from(self, start_name: str, budget: Optional[SolveBudget] = None) -> bool:
+        """
+        Queue-based incremental propagation with provenance logging.
+        Returns False if the budget ran out (values known so far are kept and
+        diagnostics['budget_exhausted'] names the limit), True otherwise.
+        """
+        budget = budget or self.budget
+        if budget is not None:
+            budget.begin()
+        return self._propagate([start_name], budget)
+
+    def _propagate(self, queue: List[str], budget: Optional[SolveBudget]) -> bool:
+        guard = OscillationGuard()
+        token = _active_cache.set(self.intermediates)
+        try:
+            return self._propagate_queue(queue, budget, guard)
+        finally:
+            _active_cache.reset(token)
+            self._record_oscillation(guard)
+
+    def _propagate_queue(self, queue: List[str], budget: Optional[SolveBudget], guard: OscillationGuard) -> bool:
         processed = set()
+        queue = deque(queue)  # popleft O(1): mạng lớn (đa giác n cạnh) có hàng đợi dài
         while queue:
-            cur = queue.pop(0)
+            cur = queue.popleft()
             if cur not in self.vars:
                 continue
             var = self.vars[cur]
             for cons in var.constraints:
+                if budget is not None and not budget.charge_evaluation():
+                    return self._budget_stop(budget)
                 updates = cons.try_apply(self)
                 for uname, uval in updates.items():
-                        if uname in self.vars:
+                        if uname in self.vars and guard.allow(self.vars[uname], uval):
                             try:
                                 if self.vars[uname].set(uval, source=cons.name):
+                                    self._record_support(uname, cons, updates)
                                     if self.debug:
                                         self.log(f"  {uname} = {uval:.6g} (from {cons.name})")
                                     queue.append(uname)
+                                    if budget is not None and not budget.charge_update():
+                                        return self._budget_stop(budget)
                             except ValueError as e:
                                 # Re-raise to be caught by caller
                                 raise ValueError(f"Lỗi khi tính {uname}: {str(e)}")
             processed.add(cur)
+        return True
+
+    def _record_oscillation(self, guard: OscillationGuard):
+        if guard.oscillating:
+            if self.debug:
+                self.log(f"Oscillating variables frozen: {guard.oscillating}")
+            self.diagnostics = dict(self.diagnostics)
+            self.diagnostics['oscillating'] = sorted(set(self.diagnostics.get('oscillating', [])) |
+                                                     set(guard.oscillating))
+            # solve() thay diagnostics: giữ lại để gộp vào báo cáo của lần giải sau
+            self._input_diagnostics['oscillating'] = sorted(set(self._input_diagnostics.get('oscillating', [])) |
+                                                            set(guard.oscillating))
+
+    def _record_support(self, name: str, cons: Constraint, updates: Dict[str, float]):
+        self._support[name] = tuple(n for n in cons.nodes
+                                    if n not in updates and self.vars[n].is_known())
+
+    def dependents_of(self, name: str) -> List[str]:
+        """Known variables derived (directly or transitively) from `name`, in network order."""
+        children: Dict[str, List[str]] = {}
+        for derived, support in self._support.items():
+            for n in support:
+                children.setdefault(n, []).append(derived)
+        found = set()
+        stack = [name]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child not in found and child != name:
+                    found.add(child)
+                    stack.append(child)
+        return [n for n in self.vars if n in found and self.vars[n].is_known()]
+
+    def update_input(self, name: str, value: Optional[float], source: str = 'user', tolerance: float = 1e-2,
+                     budget: Optional[SolveBudget] = None) -> Tuple[bool, str]:
+        """Change (or clear, with value=None) one input; see update_inputs."""
+        return self.update_inputs({name: value}, source, tolerance, budget)
+
+    def update_inputs(self, values: Dict[str, Optional[float]], source: str = 'user', tolerance: float = 1e-2,
+                      budget: Optional[SolveBudget] = None) -> Tuple[bool, str]:
+        """
+        Change (or clear, with value None) inputs of an already propagated
+        network without rebuilding it. The network is rolled back to the point
+        where the earliest of them was entered: that input, the inputs entered
+        after it and everything derived from them are retracted, the retracted
+        values are re-derived from the remaining known values, then the inputs
+        go through set_input again in the order they were entered (with their
+        new values), followed by inputs that are new. The result (values and
+        reported conflicts) is the one a fresh network fed the same inputs in
+        the same order would give. Returns (ok, msg) like set_input.
+        """
+        order = list(self._user_inputs)
+        positions = [order.index(n) for n in values if n in self._user_inputs]
+        rolled_back = order[min(positions):] if positions else []
+        retracted_set = set()
+        for n in rolled_back + [n for n in values if n in self.vars]:
+            retracted_set.add(n)
+            retracted_set.update(self.dependents_of(n))
+        reapply = []
+        for n in rolled_back:
+            val, src = (values[n], source) if n in values else self._user_inputs[n]
+            reapply.append((n, val, src))
+        reapply += [(n, val, source) for n, val in values.items() if n not in rolled_back]
+        for n in rolled_back:
+            del self._user_inputs[n]
+        retracted = [n for n in self.vars if n in retracted_set]
+        for n in retracted:
+            self.vars[n].value = None
+            self.vars[n].source = None
+            self._support.pop(n, None)
+
+        # Giá trị bị thu hồi có thể suy ra lại từ các giá trị còn lại
+        frontier = []
+        for n in retracted:
+            for cons in self.vars[n].constraints:
+                for node in cons.nodes:
+                    if node not in retracted_set and node not in frontier and self.vars[node].is_known():
+                        frontier.append(node)
+        budget = budget or self.budget
+        if budget is not None:
+            budget.begin()
+        if not self._propagate(frontier, budget):
+            return False, f"Dừng lan truyền ({budget.exhausted})"
+
+        for n, val, src in reapply:
+            if val is None:
+                continue
+            if self.sensitivities:
+                val = dmath.value_of(val)
+            ok, msg = self.set_input(n, val, src, tolerance, budget)
+            if not ok:
+                return ok, msg
+        return True, "Success"
+
+    def _budget_stop(self, budget: SolveBudget) -> bool:
+        if self.debug:
+            self.log(f"Budget exhausted ({budget.exhausted}) after {budget.evaluations} evaluations, "
+                     f"{budget.updates} updates")
+        self.diagnostics = dict(self.diagnostics)
+        self.diagnostics['budget_exhausted'] = budget.exhausted
+        self.diagnostics['evaluations'] = budget.evaluations
+        self.diagnostics['updates'] = budget.updates
+        # solve() tạo diagnostics mới: giữ lại để gộp vào kết quả của nó
+        self._input_diagnostics['budget_exhausted'] = budget.exhausted
+        return False
 
-    def solve(self, max_rounds: int = 100) -> Tuple[bool, Dict[str, Any]]:
-        """Queue-based full solve. Returns (converged, diagnostics)."""
+    def solve(self, max_rounds: int = 100, budget: Optional[SolveBudget] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Queue-based full solve. Returns (converged, diagnostics).
+        With a budget (argument or self.budget) the solve stops cleanly when a limit
+        is hit: partial results stay in the network, converged is False and
+        diagnostics['budget_exhausted'] is 'timeout', 'max_evaluations', 'max_updates'
+        or 'cancelled'. Variables caught oscillating (see OscillationGuard), here or
+        while the inputs were propagated, are listed in diagnostics['oscillating']
+        and also make converged False.
+        """
+        budget = budget or self.budget
+        if budget is not None:
+            budget.begin()
         # initialize queue with all known vars
-        queue = [n for n, v in self.vars.items() if v.is_known()]
+        queue = deque(n for n, v in self.vars.items() if v.is_known())
         rounds = 0
+        evaluations = 0
+        updates_count = 0
         changed = True
-        while rounds < max_rounds and changed:
-            changed = False
-            rounds += 1
-            # process constraints in a deterministic order but use queue to prioritize affected
-            # collect candidate constraints from variables in queue
-            cons_to_run = set()
-            while queue:
-                vn = queue.pop(0)
-                if vn not in self.vars:
-                    continue
-                for c in self.vars[vn].constraints:
-                    cons_to_run.add(c)
-            if not cons_to_run:
-                break
-            # attempt each constraint
-            for cons in sorted(cons_to_run, key=lambda c: c.name):
-                updates = cons.try_apply(self)
-                for uname, uval in updates.items():
-                        if uname in self.vars:
-                            try:
-                                if self.vars[uname].set(uval, source=cons.name):
-                                    changed = True
-                                    queue.append(uname)
-                            except ValueError as e:
-                                # Re-raise to be caught by GUI
-                                raise ValueError(f"Lỗi khi tính {uname}: {str(e)}")
-            # next round
-        converged = not changed
+        stopped = False
+        guard = OscillationGuard()
+        # Các mục còn hợp lệ từ lúc lan truyền đầu vào được giữ lại; chỉ đếm lại cho lần giải này
+        self.intermediates.reset_stats()
+        token = _active_cache.set(self.intermediates)
+        try:
+            while rounds < max_rounds and changed and not stopped:
+                changed = False
+                rounds += 1
+                # process constraints in a deterministic order but use queue to prioritize affected
+                # collect candidate constraints from variables in queue
+                cons_to_run = set()
+                while queue:
+                    vn = queue.popleft()
+                    if vn not in self.vars:
+                        continue
+                    for c in self.vars[vn].constraints:
+                        cons_to_run.add(c)
+                if not cons_to_run:
+                    break
+                # attempt each constraint
+                for cons in sorted(cons_to_run, key=lambda c: c.name):
+                    if budget is not None and not budget.charge_evaluation():
+                        stopped = True
+                        break
+                    evaluations += 1
+                    updates = cons.try_apply(self)
+                    for uname, uval in updates.items():
+                            if uname in self.vars and guard.allow(self.vars[uname], uval):
+                                try:
+                                    if self.vars[uname].set(uval, source=cons.name):
+                                        self._record_support(uname, cons, updates)
+                                        changed = True
+                                        updates_count += 1
+                                        queue.append(uname)
+                                        if budget is not None and not budget.charge_update():
+                                            stopped = True
+                                            break
+                                except ValueError as e:
+                                    # Re-raise to be caught by GUI
+                                    raise ValueError(f"Lỗi khi tính {uname}: {str(e)}")
+                    if stopped:
+                        break
+                # next round
+        finally:
+            _active_cache.reset(token)
+        converged = not changed and not stopped and not guard.oscillating
+        # Lan truyền đầu vào (set_input/update_input) đã hết ngân sách hoặc dao động: lần giải chưa trọn
+        earlier, self._input_diagnostics = self._input_diagnostics, {}
+        oscillating = set(guard.oscillating) | set(earlier.get('oscillating', []))
+        if earlier.get('budget_exhausted') or oscillating:
+            converged = False
         diagnostics = {}
         if not converged:
             # gather unsatisfied constraints: target unknown but dependencies known (couldn't compute)
@@ -329,14 +747,39 @@ class ConstraintNetwork:
                         blocked.append(cons.name)
             diagnostics['blocked_constraints'] = blocked
             diagnostics['rounds'] = rounds
-            self.diagnostics = diagnostics
+            if stopped:
+                diagnostics['budget_exhausted'] = budget.exhausted
+            elif earlier.get('budget_exhausted'):
+                diagnostics['budget_exhausted'] = earlier['budget_exhausted']
         else:
-            self.diagnostics = {'rounds': rounds}
+            diagnostics['rounds'] = rounds
+        diagnostics['evaluations'] = evaluations
+        diagnostics['updates'] = updates_count
+        if oscillating:
+            diagnostics['oscillating'] = sorted(oscillating)
+        diagnostics['intermediates'] = self.intermediates.stats()
+        self.diagnostics = diagnostics
         return converged, self.diagnostics
 
     def get_results(self) -> Dict[str, Optional[float]]:
+        if self.sensitivities:
+            return {n: dmath.value_of(v.value) for n, v in self.vars.items()}
         return {n: v.value for n, v in self.vars.items()}
 
+    def get_jacobian(self) -> Dict[str, Dict[str, float]]:
+        """
+        d(output)/d(input) for every known variable, keyed output -> input -> partial.
+        Only available when the network was solved with sensitivities enabled;
+        inputs are the variables given through set_input.
+        """
+        if not self.sensitivities:
+            raise RuntimeError("Sensitivities are disabled; create the network with sensitivities=True")
+        return {n: dmath.derivatives_of(v.value) for n, v in self.vars.items() if v.is_known()}
+
+    def enable_sensitivities(self, enabled: bool = True):
+        """Opt in/out of forward-mode derivatives. Takes effect for subsequent inputs."""
+        self.sensitivities = enabled
+
     def get_provenance(self) -> Dict[str, Optional[str]]:
         return {n: v.source for n, v in self.vars.items()}
 
@@ -344,17 +787,128 @@ class ConstraintNetwork:
         for v in self.vars.values():
             v.value = None
             v.source = None
+        self._support = {}
+        self._input_diagnostics = {}
+        self._user_inputs = {}
+        self.intermediates.clear()
+        if self.budget is not None:
+            self.budget.start()
+        # cờ cảnh báo SSA thuộc về lần giải trước (mạng có thể được dùng lại)
+        self.__dict__.pop('_ssa_warning', None)
+
+    # --- ẢNH CHỤP TRẠNG THÁI ---
+    def structure_fingerprint(self) -> int:
+        """CRC32 of the variable and constraint names, in order: identifies the structure."""
+        text = '\n'.join(self.vars) + '\0' + '\n'.join(c.name for c in self.constraints)
+        return zlib.crc32(text.encode('utf-8'))
+
+    def snapshot(self) -> bytes:
+        """
+        Solve state as compact bytes: values (float64, NaN = unknown), sources,
+        derivation support, entered inputs, diagnostics and the SSA flag, stamped with the
+        network type and structure fingerprint. Constraints are not included:
+        restore() needs a network of the same structure (clone(), or
+        geometry_kb.network_from_snapshot in another process).
+        """
+        names = list(self.vars)
+        index = {n: i for i, n in enumerate(names)}
+        values, sources, table, der = [], [], {}, {}
+        nan = float('nan')
+        for name, var in self.vars.items():
+            x = var.value
+            values.append(nan if x is None else float(x))
+            if isinstance(x, Dual) and x.der:
+                der[name] = x.der
+            sources.append(-1 if var.source is None else table.setdefault(var.source, len(table)))
+        extra = {'sources': list(table),
+                 'support': [[index[k]] + [index[n] for n in sup] for k, sup in self._support.items()],
+                 'diagnostics': self.diagnostics,
+                 'inputs': [[n, float(x), src] for n, (x, src) in self._user_inputs.items()]}
+        if der:
+            extra['der'] = der
+        if '_ssa_warning' in self.__dict__:
+            extra['ssa_warning'] = True
+        type_id = (self.network_type or '').encode('utf-8')
+        n = len(names)
+        return b''.join([_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.structure_fingerprint(), len(type_id), n),
+                         type_id, struct.pack(f'<{n}d', *values), struct.pack(f'<{n}i', *sources),
+                         json.dumps(extra, separators=(',', ':')).encode('utf-8')])
 
-    def show_graph(self):
-        pos = nx.spring_layout(self.graph)
+    def restore(self, data: bytes):
+        """
+        Replace the solve state with a snapshot() of a network of the same type and
+        structure. Derivatives in the snapshot are dropped unless this network
+        has sensitivities enabled.
+        """
+        type_id, fingerprint, n, offset = snapshot_header(data)
+        if type_id != (self.network_type or '') or fingerprint != self.structure_fingerprint() or n != len(self.vars):
+            raise ValueError(f"Ảnh chụp của mạng '{type_id}' không khớp với cấu trúc của mạng "
+                             f"'{self.network_type or ''}'")
+        values = struct.unpack_from(f'<{n}d', data, offset)
+        sources = struct.unpack_from(f'<{n}i', data, offset + 8 * n)
+        extra = json.loads(data[offset + 12 * n:])
+        table = extra['sources']
+        # Mạng không tính độ nhạy chỉ nhận giá trị thực (bỏ đạo hàm của ảnh chụp)
+        der = extra.get('der', {}) if self.sensitivities else {}
+        for (name, var), x, src in zip(self.vars.items(), values, sources):
+            if x != x:
+                var.value = None
+            else:
+                var.value = Dual(x, der[name]) if name in der else x
+            var.source = None if src < 0 else table[src]
+        names = list(self.vars)
+        self._support = {names[e[0]]: tuple(names[i] for i in e[1:]) for e in extra['support']}
+        self.diagnostics = extra['diagnostics']
+        self._input_diagnostics = {}
+        self._user_inputs = {n: (x, src) for n, x, src in extra.get('inputs', [])}
+        self.intermediates.clear()
+        if extra.get('ssa_warning'):
+            self._ssa_warning = True
+        else:
+            self.__dict__.pop('_ssa_warning', None)
+
+    def clone(self) -> 'ConstraintNetwork':
+        """
+        Unsolved copy of the structure: new variables, the same (stateless)
+        constraint objects, a copy of the graph and its own copy of the default
+        budget. Cheaper than rebuilding from
+        the spec; clone().restore(snapshot()) duplicates a solved network.
+        """
+        net = type(self)(debug=self.debug, sensitivities=self.sensitivities)
+        for name, var in self.vars.items():
+            copy = Var(name, var.description)
+            copy.constraints = list(var.constraints)
+            net.vars[name] = copy
+        net.constraints = list(self.constraints)
+        # Thuộc tính nút là nhãn cố định: chép danh sách nút/cạnh nhanh hơn graph.copy()
+        net.graph.add_nodes_from(self.graph.nodes(data=True))
+        net.graph.add_edges_from(self.graph.edges)
+        net.budget = self.budget.copy() if self.budget is not None else None  # bộ đếm riêng cho mạng mới
+        net.network_type = self.network_type
+        return net
+
+    def show_graph(self, layout: str = 'spring', seed: Optional[int] = None):
+        """
+        Draw the variable–constraint graph with matplotlib. The layout ('spring' or
+        'bipartite') is seeded and cached per network structure (see graph_layout).
+        """
+        import matplotlib.pyplot as plt  # chỉ nạp khi cần vẽ đồ thị mạng
+        import graph_layout
+        graph = graph_layout.bipartite_graph(self)
+        pos = graph_layout.get_layout(self, layout, graph_layout.DEFAULT_SEED if seed is None else seed)
         plt.figure(figsize=(10, 8))
-        var_nodes = [n for n, d in self.graph.nodes(data=True) if d.get('type') == 'var']
-        cons_nodes = [n for n, d in self.graph.nodes(data=True) if d.get('type') == 'constraint']
-        nx.draw_networkx_nodes(self.graph, pos, nodelist=var_nodes, node_color='lightblue', node_size=1200)
-        nx.draw_networkx_nodes(self.graph, pos, nodelist=cons_nodes, node_color='lightgreen', node_shape='s', node_size=800)
-        nx.draw_networkx_edges(self.graph, pos)
-        labels = {n: d.get('label', n) for n, d in self.graph.nodes(data=True)}
-        nx.draw_networkx_labels(self.graph, pos, labels)
+        var_nodes = [n for n, d in graph.nodes(data=True) if d.get('type') == 'var']
+        cons_nodes = [n for n, d in graph.nodes(data=True) if d.get('type') == 'constraint']
+        nx.draw_networkx_nodes(graph, pos, nodelist=var_nodes, node_color='lightblue', node_size=1200)
+        nx.draw_networkx_nodes(graph, pos, nodelist=cons_nodes, node_color='lightgreen', node_shape='s', node_size=800)
+        nx.draw_networkx_edges(graph, pos)
+        labels = {n: d.get('label', n) for n, d in graph.nodes(data=True)}
+        nx.draw_networkx_labels(graph, pos, labels)
         plt.title("Constraint Network Graph")
         plt.axis('off')
         plt.show()
+
+    def to_dot(self, layout: Optional[str] = None) -> str:
+        """Graphviz DOT text of the graph, positions pinned when a layout method is given."""
+        import graph_layout
+        return graph_layout.to_dot(self, graph_layout.get_layout(self, layout) if layout else None)
@@ -0,0 +1,222 @@
+"""
+Headless figure export: the drawing of every solved shape of a batch result
+file, as SVG (written as text, no matplotlib) or PNG (rasterized with
+matplotlib, imported only for PNG).
+
+Usage:
+    python -m export results.jsonl -o thumbs/ [--format svg|png] [--size 300] [--jobs N]
+    python -m batch problems.jsonl | python -m export - -o thumbs/
+
+Input is the JSONL written by `python -m batch`; records with status "ok" get
+one file each, named after their `id` (or `row_<n>` without id). Figures are
+the same layout.Scene the GUI draws, scaled so that `size` x `size` pixels
+corresponds to the GUI's 600 x 600 view. Records are exported in chunks across
+a process pool, with a bounded number of chunks in flight.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from xml.sax.saxutils import escape
+
+import layout
+from batch import Progress
+from classification import classify_shape
+from layout import Scene, Viewport
+from solver import TRIANGLE_SHAPES
+
+FORMATS = ('svg', 'png')
+# Kích thước tham chiếu (px) của hình trong GUI; lề, chữ... được co giãn theo tỉ lệ size / REFERENCE_SIZE
+REFERENCE_SIZE = 600
+MARGIN = 30
+TITLE_HEIGHT = 40
+MARKER_RADIUS = 5
+
+_SVG_ANCHOR = {'left': 'start', 'center': 'middle', 'right': 'end'}
+_SVG_BASELINE = {'top': 'hanging', 'center': 'central', 'bottom': 'auto', 'baseline': 'auto'}
+
+
+# --- HÌNH -> SVG / PNG ---
+def record_scene(record: Dict[str, Any]) -> Optional[Scene]:
+    """Scene of one batch result record, None if it was not solved."""
+    if record.get('status') != 'ok' or not record.get('results'):
+        return None
+    res = record['results']
+    is_triangle = record.get('shape') in TRIANGLE_SHAPES
+    shape_name, _ = classify_shape(res, is_triangle)
+    return layout.result_scene(res, is_triangle, shape_name, default_shape=record.get('shape') or "quadrilateral")
+
+
+def _svg_text(x: float, y: float, text: str, size: float, ha: str = 'center', va: str = 'center',
+              bold: bool = False) -> str:
+    weight = ' font-weight="bold"' if bold else ''
+    lines = text.split('\n')
+    if len(lines) == 1:
+        body = escape(text)
+    else:  # nhiều dòng: căn giữa cả khối quanh y
+        first = -(len(lines) - 1) / 2 * 1.2
+        body = ''.join(f'<tspan x="{x:.2f}" dy="{(first if i == 0 else 1.2):.2f}em">{escape(line)}</tspan>'
+                       for i, line in enumerate(lines))
+    return (f'<text x="{x:.2f}" y="{y:.2f}" font-size="{size:.2f}" text-anchor="{_SVG_ANCHOR.get(ha, "middle")}" '
+            f'dominant-baseline="{_SVG_BASELINE.get(va, "central")}"{weight}>{body}</text>')
+
+
+def scene_to_svg(scene: Scene, size: int = 300) -> str:
+    """SVG document (size x size px) of a scene"""
+    k = size / REFERENCE_SIZE
+    pt = 4 / 3 * k  # point -> px ở kích thước này
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+             f'viewBox="0 0 {size} {size}" font-family="DejaVu Sans, Helvetica, Arial, sans-serif">',
+             '<rect width="100%" height="100%" fill="white"/>']
+    if scene.message or scene.polygon is None:
+        parts.append(_svg_text(size / 2, size / 2, scene.message, 12 * pt))
+    else:
+        view = Viewport(scene, size, size, MARGIN * k, TITLE_HEIGHT * k)
+        points = [view.to_px(x, y) for x, y in scene.polygon]
+        parts.append('<polygon points="' + ' '.join(f'{x:.2f},{y:.2f}' for x, y in points) +
+                     f'" fill="none" stroke="blue" stroke-width="{2 * pt:.2f}" stroke-linejoin="round"/>')
+        parts.extend(f'<circle cx="{x:.2f}" cy="{y:.2f}" r="{MARKER_RADIUS * k:.2f}" fill="red"/>' for x, y in points)
+        for label in scene.labels:
+            parts.append(_svg_text(*view.to_px(label.x, label.y), label.text, label.fontsize * pt,
+                                   label.ha, label.va, label.bold))
+        parts.append(_svg_text(size / 2, view.title_y(scene), scene.title, 14 * pt, va='baseline', bold=True))
+    parts.append('</svg>')
+    return '\n'.join(parts) + '\n'
+
+
+# Mỗi tiến trình giữ sẵn một figure matplotlib cho từng kích thước PNG
+_png_renderers: Dict[int, Any] = {}
+
+
+def scene_to_png(scene: Scene, path: str, size: int = 300):
+    """Rasterize a scene to a PNG file with matplotlib (Agg, no pyplot)"""
+    renderer = _png_renderers.get(size)
+    if renderer is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from render_mpl import ShapeRenderer
+
+        dpi = 100 * size / REFERENCE_SIZE
+        fig = Figure(figsize=(6, 6), dpi=dpi)
+        canvas = FigureCanvasAgg(fig)
+        renderer = _png_renderers[size] = ShapeRenderer(fig.add_subplot(), canvas)
+    renderer.render(scene)
+    if renderer.scene is not None and renderer._background is not None:
+        # Đã blit lên bộ đệm: ghi thẳng bộ đệm, không vẽ lại cả figure
+        from matplotlib.image import imsave
+        imsave(path, renderer.canvas.buffer_rgba())
+    else:
+        renderer.canvas.print_png(path)
+
+
+def file_name(record: Dict[str, Any], fmt: str) -> str:
+    rec_id = record.get('id')
+    stem = f"row_{record.get('row', 0):06d}" if rec_id is None else re.sub(r'[^\w.-]', '_', str(rec_id))
+    return f"{stem}.{fmt}"
+
+
+def export_record(record: Dict[str, Any], out_dir: str, fmt: str = 'svg', size: int = 300) -> Optional[str]:
+    """Write the figure of one record; returns its path, None if the record has no figure."""
+    scene = record_scene(record)
+    if scene is None:
+        return None
+    path = os.path.join(out_dir, file_name(record, fmt))
+    if fmt == 'png':
+        scene_to_png(scene, path, size)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(scene_to_svg(scene, size))
+    return path
+
+
+def export_chunk(records: List[Dict[str, Any]], out_dir: str, fmt: str = 'svg', size: int = 300) -> List[bool]:
+    """Export a list of records (one pool task); True per record that produced a file."""
+    return [export_record(record, out_dir, fmt, size) is not None for record in records]
+
+
+# --- XUẤT HÀNG LOẠT ---
+def read_records(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def chunked(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_records(records: Iterable[Dict[str, Any]], out_dir: str, fmt: str = 'svg', size: int = 300,
+                   jobs: Optional[int] = None, chunk_size: int = 256,
+                   progress: Optional[Progress] = None) -> Tuple[int, int]:
+    """
+    Export every record, `jobs` processes (default: all CPUs, 1 = in this
+    process). Returns (written, skipped).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Định dạng không hỗ trợ: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    written = skipped = 0
+
+    def tally(flags: List[bool]):
+        nonlocal written, skipped
+        for ok in flags:
+            written += ok
+            skipped += not ok
+            if progress is not None:
+                progress.count(ok)
+
+    chunks = chunked(records, chunk_size)
+    if jobs == 1:
+        for chunk in chunks:
+            tally(export_chunk(chunk, out_dir, fmt, size))
+        return written, skipped
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = set()
+        for chunk in chunks:
+            # Giới hạn số khối đang chờ để bộ nhớ không tăng theo kích thước đầu vào
+            if len(pending) >= 2 * jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tally(future.result())
+            pending.add(executor.submit(export_chunk, chunk, out_dir, fmt, size))
+        for future in pending:
+            tally(future.result())
+    return written, skipped
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m export', description="Xuất hình vẽ (SVG/PNG) của kết quả giải hàng loạt")
+    parser.add_argument('input', help="tệp JSONL kết quả của python -m batch, '-' = stdin")
+    parser.add_argument('-o', '--output', required=True, help="thư mục nhận các tệp hình")
+    parser.add_argument('--format', choices=FORMATS, default='svg', help="svg (không cần matplotlib) hoặc png")
+    parser.add_argument('--size', type=int, default=300, help="cạnh ảnh (px)")
+    parser.add_argument('--jobs', type=int, help="số tiến trình (mặc định: số CPU; 1 = không dùng pool)")
+    parser.add_argument('--chunk-size', type=int, default=256, help="số bản ghi mỗi tác vụ")
+    parser.add_argument('--quiet', action='store_true', help="không in tiến độ ra stderr")
+    args = parser.parse_args(argv)
+    progress = Progress(None if args.quiet else sys.stderr)
+    src = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    try:
+        export_records(read_records(src), args.output, args.format, args.size, args.jobs, args.chunk_size, progress)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    progress.finish()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+Golden-corpus record/replay harness: guards engine work against silent
+changes in results.
+
+`record` solves a deterministic set of problems (shape, inputs) with the
+current tree and writes the outcome of each (status, converged, results,
+provenance) to a JSONL corpus; the committed one is benchmarks/golden.jsonl.
+Two thirds of the problems take 2-4 measures of a real figure of the shape
+(solvable), the rest random values (partial results, conflicts, rejections).
+
+`replay` re-solves the corpus with a baseline tree (default: this one) and an
+optional candidate tree, each in a fresh interpreter with its own engine.py,
+kb_formulas.py, ..., then reports per variable the numeric drift against the
+corpus (beyond abs_tol + rel_tol * |value|), values that appeared or
+disappeared, provenance changes, status and convergence changes, and the
+throughput of both sides. The exit code is 1 when the candidate (or the
+baseline alone) drifts, so it can gate a change.
+
+Usage:
+    python -m golden record [-o benchmarks/golden.jsonl] [--per-shape 15] [--seed 50]
+    git worktree add /tmp/cand my-branch
+    python -m golden replay [--corpus benchmarks/golden.jsonl] --candidate /tmp/cand [--repeat 5]
+A tree only needs the geometry_kb network factories; trees older than
+geometry_kb.build_network and solver.apply_inputs (the baseline) are fed
+input by input in the same order.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(ROOT, 'benchmarks', 'golden.jsonl')
+
+TRIANGLE_POOL = ('a', 'b', 'c', 'A', 'B', 'C', 'perimeter', 'area', 'h_a', 'R', 'r', 'm_a')
+QUAD_POOL = ('a', 'b', 'c', 'd', 'A', 'B', 'C', 'D', 'perimeter', 'area', 'd1', 'd2', 'h')
+ANGLES = ('A', 'B', 'C', 'D')
+
+# Tiến trình con: nạp harness theo đường dẫn, mạng và công thức lấy từ cây đang chạy (cwd)
+CHILD = r"""
+import importlib.util, json, sys
+spec = importlib.util.spec_from_file_location('_golden_harness', sys.argv[1])
+harness = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(harness)
+with open(sys.argv[2], encoding='utf-8') as f:
+    cases = [json.loads(line) for line in f if line.strip()]
+print(json.dumps(harness.replay(cases, int(sys.argv[3]))))
+"""
+
+
+# --- SINH BÀI TOÁN ---
+def _figure(shape: str, rng: random.Random) -> List[List[float]]:
+    """Vertices of a random non-degenerate figure of the shape (counter-clockwise)."""
+    u = rng.uniform
+    if shape == 'triangle':
+        while True:
+            pts = [[u(0, 10), u(0, 10)] for _ in range(3)]
+            twice = ((pts[1][0] - pts[0][0]) * (pts[2][1] - pts[0][1])
+                     - (pts[2][0] - pts[0][0]) * (pts[1][1] - pts[0][1]))
+            if abs(twice) > 8:
+                return pts if twice > 0 else pts[::-1]
+    if shape == 'equilateral_triangle':
+        s = u(1, 10)
+        return [[0, 0], [s, 0], [s / 2, s * math.sqrt(3) / 2]]
+    if shape == 'quadrilateral':
+        # bốn đỉnh trên đường tròn bị nhiễu bán kính, các góc cách nhau ít nhất 50°
+        while True:
+            turns = sorted(u(0, 360) for _ in range(4))
+            gaps = [b - a for a, b in zip(turns, turns[1:] + [turns[0] + 360])]
+            if min(gaps) > 50:
+                return [[r * math.cos(math.radians(t)), r * math.sin(math.radians(t))]
+                        for t, r in zip(turns, (u(4, 5) for _ in range(4)))]
+    w, h = u(3, 10), u(2, 8)
+    if shape == 'trapezoid':
+        c, x = u(1, w - 1), u(-2, 2)
+        return [[0, 0], [w, 0], [x + c, h], [x, h]]
+    if shape == 'parallelogram':
+        x = u(-3, 3)
+        return [[0, 0], [w, 0], [w + x, h], [x, h]]
+    if shape == 'rectangle':
+        return [[0, 0], [w, 0], [w, h], [0, h]]
+    if shape == 'square':
+        return [[0, 0], [w, 0], [w, w], [0, w]]
+    if shape == 'rhombus':
+        t = math.radians(u(30, 150))
+        return [[0, 0], [w, 0], [w + w * math.cos(t), w * math.sin(t)], [w * math.cos(t), w * math.sin(t)]]
+    raise KeyError(f"Unknown shape '{shape}'")
+
+
+def generate_cases(per_shape: int = 15, seed: int = 50) -> List[Dict[str, Any]]:
+    """Deterministic problems {'id', 'shape', 'inputs'}: per_shape for every geometry_kb network."""
+    import numpy as np
+    import geometry_kb as kb
+    import ingest
+    rng = random.Random(seed)
+    cases = []
+    for shape in kb.NETWORK_FACTORIES:
+        variables = {n for n, _ in kb.resolve_spec(shape)['variables']}
+        pool = [n for n in (TRIANGLE_POOL if kb.resolve_spec(shape)['chain'][0] == 'triangle' else QUAD_POOL)
+                if n in variables]
+        for i in range(per_shape):
+            if i % 3 == 2:
+                names = rng.sample(pool, rng.randint(2, 4))
+                inputs = {n: round(rng.uniform(20, 150), 1) if n in ANGLES else round(rng.uniform(1, 20), 2)
+                          for n in names}
+            else:
+                measures = ingest.kb_columns(np.array([_figure(shape, rng)], dtype=np.float64))
+                names = rng.sample([n for n in pool if n in measures], rng.randint(2, 4))
+                inputs = {n: round(float(measures[n][0]), 6) for n in names}
+            cases.append({'id': f"{shape}-{i}", 'shape': shape, 'inputs': inputs})
+    return cases
+
+
+# --- GIẢI LẠI (chạy trong cây được đo) ---
+# Thứ tự gán input của GUI (solver.INPUT_ORDER), cho các cây chưa có module solver
+INPUT_ORDER = ['a', 'b', 'c', 'd', 'A', 'B', 'C', 'D', 'h_a', 'h_b', 'h_c', 'h_d', 'h', 'area', 'perimeter']
+
+
+def _build_network(shape: str):
+    import geometry_kb as kb
+    if hasattr(kb, 'build_network'):
+        return kb.build_network(shape)
+    return getattr(kb, f'create_{shape}_network')()  # cây cũ: hàm dựng riêng cho từng hình
+
+
+def _apply_inputs(net, inputs: Dict[str, float]):
+    try:
+        from solver import apply_inputs
+    except ImportError:  # cây cũ: gán từng input như GUI
+        order = [k for k in INPUT_ORDER if k in inputs] + [k for k in inputs if k not in INPUT_ORDER]
+        for k in order:
+            if k in net.vars:
+                ok, msg = net.set_input(k, inputs[k], 'user')
+                if not ok:
+                    return False, msg
+        return True, ""
+    return apply_inputs(net, inputs)
+
+
+def solve_case(networks: Dict[str, Any], shape: str, inputs: Dict[str, float]) -> Dict[str, Any]:
+    """Outcome of one problem on a reused network of the tree being measured."""
+    net = networks.get(shape)
+    if net is None:
+        net = networks[shape] = _build_network(shape)
+    else:
+        net.reset()
+    try:
+        ok, msg = _apply_inputs(net, inputs)
+        if not ok:
+            return {'status': 'input_error', 'message': msg}
+        converged, _ = net.solve()
+    except Exception as e:  # một bài lỗi vẫn là một kết quả cần so
+        return {'status': 'error', 'message': f"{type(e).__name__}: {e}"}
+    provenance = net.get_provenance()
+    results = {n: float(v) for n, v in net.get_results().items() if v is not None}
+    return {'status': 'ok', 'converged': converged, 'results': results,
+            'provenance': {n: provenance[n] for n in results}}
+
+
+def replay(cases: List[Dict[str, Any]], repeat: int = 1) -> Dict[str, Any]:
+    """Outcomes of the first pass over `cases` and the wall time of each of `repeat` passes."""
+    networks: Dict[str, Any] = {}
+    outcomes, times = None, []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        run = [solve_case(networks, c['shape'], c['inputs']) for c in cases]
+        times.append(time.perf_counter() - t0)
+        outcomes = outcomes or run
+    return {'outcomes': outcomes, 'times': times}
+
+
+def run_tree(tree: str, corpus: str, repeat: int) -> Dict[str, Any]:
+    """replay() of the corpus in a fresh interpreter whose modules come from `tree`."""
+    env = dict(os.environ, PYTHONPATH=tree + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    out = subprocess.run([sys.executable, '-c', CHILD, os.path.abspath(__file__), os.path.abspath(corpus),
+                          str(repeat)], cwd=tree, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"Chạy lại corpus trong '{tree}' thất bại:\n{out.stderr.strip()}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# --- SO SÁNH ---
+def compare(golden: List[Dict[str, Any]], outcomes: List[Dict[str, Any]],
+            abs_tol: float = 1e-9, rel_tol: float = 1e-9) -> Dict[str, Any]:
+    """
+    Drift of `outcomes` against the recorded corpus: per variable the number
+    of values compared, max absolute / relative difference, values beyond
+    tolerance, missing and extra values, provenance changes; plus the problems
+    whose status or convergence changed.
+    """
+    per_var: Dict[str, Dict[str, float]] = {}
+    status_changes, converged_changes = [], []
+
+    def entry(name):
+        return per_var.setdefault(name, {'compared': 0, 'max_abs': 0.0, 'max_rel': 0.0, 'over_tol': 0,
+                                         'missing': 0, 'extra': 0, 'provenance': 0})
+
+    for rec, out in zip(golden, outcomes):
+        if rec['status'] != out['status']:
+            status_changes.append((rec['id'], rec['status'], out['status']))
+            continue
+        if rec['status'] != 'ok':
+            continue
+        if rec['converged'] != out['converged']:
+            converged_changes.append(rec['id'])
+        expected, got = rec['results'], out['results']
+        for name, value in expected.items():
+            e = entry(name)
+            if name not in got:
+                e['missing'] += 1
+                continue
+            diff = abs(got[name] - value)
+            e['compared'] += 1
+            e['max_abs'] = max(e['max_abs'], diff)
+            if value != 0:
+                e['max_rel'] = max(e['max_rel'], diff / abs(value))
+            if diff > abs_tol + rel_tol * abs(value):
+                e['over_tol'] += 1
+            if rec['provenance'].get(name) != out['provenance'].get(name):
+                e['provenance'] += 1
+        for name in got.keys() - expected.keys():
+            entry(name)['extra'] += 1
+    drifting = sorted(n for n, e in per_var.items() if e['over_tol'] or e['missing'] or e['extra'])
+    return {'variables': per_var, 'drifting': drifting, 'status_changes': status_changes,
+            'converged_changes': converged_changes,
+            'ok': not drifting and not status_changes and not converged_changes}
+
+
+def format_report(label: str, report: Dict[str, Any], limit: int = 10) -> List[str]:
+    lines = [f"{label}: {len(report['status_changes'])} status changes, "
+             f"{len(report['converged_changes'])} convergence changes, "
+             f"{len(report['drifting'])} drifting variables"]
+    rows = [(n, e) for n, e in sorted(report['variables'].items())
+            if e['max_abs'] or e['missing'] or e['extra'] or e['provenance']]
+    if rows:
+        lines.append(f"  {'var':<10} {'compared':>8} {'max abs':>10} {'max rel':>10} {'over tol':>8} "
+                     f"{'missing':>7} {'extra':>5} {'prov':>5}")
+        for n, e in rows:
+            lines.append(f"  {n:<10} {e['compared']:>8} {e['max_abs']:>10.2e} {e['max_rel']:>10.2e} "
+                         f"{e['over_tol']:>8} {e['missing']:>7} {e['extra']:>5} {e['provenance']:>5}")
+    for rec_id, before, after in report['status_changes'][:limit]:
+        lines.append(f"  {rec_id}: {before} -> {after}")
+    return lines
+
+
+def read_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# --- CLI ---
+def record(output: str, per_shape: int, seed: int) -> int:
+    cases = generate_cases(per_shape, seed)
+    outcomes = replay(cases)['outcomes']
+    with open(output, 'w', encoding='utf-8') as f:
+        for case, outcome in zip(cases, outcomes):
+            f.write(json.dumps({**case, **outcome}, ensure_ascii=False) + "\n")
+    counts: Dict[str, int] = {}
+    for outcome in outcomes:
+        counts[outcome['status']] = counts.get(outcome['status'], 0) + 1
+    print(f"{len(cases)} bài -> {output} ({', '.join(f'{k}: {v}' for k, v in sorted(counts.items()))})")
+    return 0
+
+
+def replay_trees(corpus: str, baseline: str, candidate: Optional[str], repeat: int,
+                 abs_tol: float, rel_tol: float) -> int:
+    golden = read_corpus(corpus)
+    print(f"corpus: {len(golden)} problems ({corpus}), abs_tol={abs_tol:g}, rel_tol={rel_tol:g}")
+    sides = [('baseline', baseline)] + ([('candidate', candidate)] if candidate else [])
+    speeds, reports = {}, {}
+    for label, tree in sides:
+        run = run_tree(tree, corpus, repeat)
+        reports[label] = compare(golden, run['outcomes'], abs_tol, rel_tol)
+        speeds[label] = len(golden) / statistics.median(run['times'])
+        print("\n".join(format_report(f"{label} ({tree})", reports[label])))
+    for label, _ in sides:
+        line = f"{label:>9}: {speeds[label]:9.1f} problems/s (median of {repeat})"
+        if label == 'candidate':
+            line += f", x{speeds['candidate'] / speeds['baseline']:.2f} vs baseline"
+        print(line)
+    return 0 if reports[sides[-1][0]]['ok'] else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m golden',
+                                     description="Ghi và chạy lại corpus kết quả chuẩn để so sánh hai phiên bản engine")
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help="ghi corpus bằng cây hiện tại")
+    rec.add_argument('-o', '--output', default=DEFAULT_CORPUS)
+    rec.add_argument('--per-shape', type=int, default=15, help="số bài mỗi loại hình")
+    rec.add_argument('--seed', type=int, default=50)
+    rep = sub.add_parser('replay', help="chạy lại corpus, báo độ lệch và thông lượng")
+    rep.add_argument('--corpus', default=DEFAULT_CORPUS)
+    rep.add_argument('--baseline', default=ROOT, help="thư mục mã nguồn của bản gốc (mặc định: cây này)")
+    rep.add_argument('--candidate', help="thư mục mã nguồn của bản cần so (vd. một git worktree)")
+    rep.add_argument('--repeat', type=int, default=3, help="số lượt chạy để đo thông lượng")
+    rep.add_argument('--abs-tol', type=float, default=1e-9)
+    rep.add_argument('--rel-tol', type=float, default=1e-9)
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        return record(args.output, args.per_shape, args.seed)
+    try:
+        return replay_trees(args.corpus, os.path.abspath(args.baseline),
+                            os.path.abspath(args.candidate) if args.candidate else None,
+                            args.repeat, args.abs_tol, args.rel_tol)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Layout and text export of the variable–constraint graph of a ConstraintNetwork.
+
+Layouts are seeded, so the same network always gives the same picture, and
+cached per network structure (the signature of its variables and constraints,
+shared by every network built for one shape): in memory, and on disk as JSON
+under LAYOUT_CACHE_DIR (env GEOMETRY_LAYOUT_CACHE, "" disables). Two methods:
+- 'spring': force-directed (networkx.spring_layout);
+- 'bipartite': variables in one column, constraints in the other, each sorted.
+to_dot() / to_svg() produce Graphviz DOT and standalone SVG as text, no
+display or matplotlib needed.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import networkx as nx
+
+METHODS = ('spring', 'bipartite')
+DEFAULT_SEED = 42
+LAYOUT_CACHE_DIR = os.environ.get('GEOMETRY_LAYOUT_CACHE',
+                                  os.path.join(os.path.expanduser('~'), '.cache', 'geometry_calculator', 'layouts'))
+
+Layout = Dict[str, Tuple[float, float]]
+
+# Bộ nhớ đệm trong tiến trình: (chữ ký, phương pháp, seed) -> bố cục
+_layouts: Dict[Tuple[str, str, int], Layout] = {}
+
+
+def var_id(name: str) -> str:
+    return f"v:{name}"
+
+
+def constraint_id(name: str) -> str:
+    return f"c:{name}"
+
+
+def bipartite_graph(net) -> nx.Graph:
+    """
+    Variable–constraint graph with distinct node ids ("v:<var>", "c:<constraint>"),
+    since a constraint may share its name with a variable (e.g. 'perimeter').
+    """
+    graph = nx.Graph()
+    for name in net.vars:
+        graph.add_node(var_id(name), type='var', label=name)
+    for cons in net.constraints:
+        cid = constraint_id(cons.name)
+        graph.add_node(cid, type='constraint', label=cons.name)
+        for n in cons.nodes:
+            graph.add_edge(cid, var_id(n))
+    return graph
+
+
+def structure_signature(net) -> str:
+    """Hash of the variables and constraints (names and nodes) of a network."""
+    parts = sorted(net.vars) + sorted(f"{c.name}({','.join(c.nodes)})" for c in net.constraints)
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def compute_layout(graph: nx.Graph, method: str = 'spring', seed: int = DEFAULT_SEED) -> Layout:
+    if method == 'spring':
+        pos = nx.spring_layout(graph, seed=seed)
+    elif method == 'bipartite':
+        variables = sorted(n for n, d in graph.nodes(data=True) if d.get('type') == 'var')
+        constraints = sorted(n for n, d in graph.nodes(data=True) if d.get('type') != 'var')
+        pos = {}
+        for x, column in ((0.0, variables), (1.0, constraints)):
+            for i, n in enumerate(column):
+                pos[n] = (x, 1.0 - i / max(len(column) - 1, 1))
+    else:
+        raise ValueError(f"Unknown layout method {method!r}, expected one of {METHODS}")
+    return {n: (float(x), float(y)) for n, (x, y) in pos.items()}
+
+
+def _cache_path(cache_dir: str, key: Tuple[str, str, int]) -> str:
+    return os.path.join(cache_dir, "{}-{}-{}.json".format(*key))
+
+
+def get_layout(net, method: str = 'spring', seed: int = DEFAULT_SEED,
+               cache_dir: Optional[str] = LAYOUT_CACHE_DIR) -> Layout:
+    """Layout of bipartite_graph(net), from the memory or disk cache when available."""
+    graph = bipartite_graph(net)
+    key = (structure_signature(net), method, seed)
+    layout = _layouts.get(key)
+    if layout is not None:
+        return layout
+    path = _cache_path(cache_dir, key) if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                stored = {n: (x, y) for n, (x, y) in json.load(f).items()}
+            if set(stored) == set(graph.nodes):
+                _layouts[key] = stored
+                return stored
+        except (OSError, ValueError, TypeError):
+            pass  # tệp hỏng: tính lại và ghi đè
+    layout = compute_layout(graph, method, seed)
+    _layouts[key] = layout
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(layout, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # không ghi được bộ nhớ đệm đĩa thì vẫn dùng bố cục trong bộ nhớ
+    return layout
+
+
+def clear_cache(cache_dir: Optional[str] = None):
+    """Drop the in-memory layouts (and the JSON files in `cache_dir` if given)."""
+    _layouts.clear()
+    if cache_dir and os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith('.json'):
+                os.remove(os.path.join(cache_dir, name))
+
+
+# --- XUẤT VĂN BẢN ---
+def _dot_quote(s: str) -> str:
+    return '"' + s.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def to_dot(net, layout: Optional[Layout] = None, scale: float = 10.0) -> str:
+    """
+    Graphviz DOT of the network: variables as ellipses (known ones filled),
+    constraints as boxes. With a layout, node positions are pinned (pos="x,y!",
+    for `neato -n`).
+    """
+    lines = ['graph ConstraintNetwork {', '  node [fontname="Helvetica"];']
+    for name, var in net.vars.items():
+        color = 'lightblue' if var.is_known() else 'white'
+        attrs = [f'label={_dot_quote(name)}', 'shape=ellipse', 'style=filled', f'fillcolor={color}']
+        if layout is not None:
+            x, y = layout[var_id(name)]
+            attrs.append(f'pos="{x * scale:.3f},{y * scale:.3f}!"')
+        lines.append(f'  {_dot_quote(var_id(name))} [{", ".join(attrs)}];')
+    for cons in net.constraints:
+        cid = constraint_id(cons.name)
+        attrs = [f'label={_dot_quote(cons.name)}', 'shape=box', 'style=filled', 'fillcolor=lightgreen']
+        if layout is not None:
+            x, y = layout[cid]
+            attrs.append(f'pos="{x * scale:.3f},{y * scale:.3f}!"')
+        lines.append(f'  {_dot_quote(cid)} [{", ".join(attrs)}];')
+        for n in cons.nodes:
+            lines.append(f'  {_dot_quote(cid)} -- {_dot_quote(var_id(n))};')
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def to_svg(net, method: str = 'spring', seed: int = DEFAULT_SEED, width: int = 1000, height: int = 800,
+           cache_dir: Optional[str] = LAYOUT_CACHE_DIR) -> str:
+    """Standalone SVG of the graph with the cached layout (same colours as show_graph)."""
+    layout = get_layout(net, method, seed, cache_dir)
+    graph = bipartite_graph(net)
+    xs = [p[0] for p in layout.values()] or [0.0]
+    ys = [p[1] for p in layout.values()] or [0.0]
+    margin = 60
+    sx = (width - 2 * margin) / max(max(xs) - min(xs), 1e-9)
+    sy = (height - 2 * margin) / max(max(ys) - min(ys), 1e-9)
+
+    def px(node: str) -> Tuple[float, float]:
+        x, y = layout[node]
+        return margin + (x - min(xs)) * sx, height - margin - (y - min(ys)) * sy
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" font-family="Helvetica, Arial, sans-serif" font-size="11">',
+             '<rect width="100%" height="100%" fill="white"/>']
+    for u, v in graph.edges():
+        (x1, y1), (x2, y2) = px(u), px(v)
+        parts.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="black"/>')
+    for node, data in graph.nodes(data=True):
+        x, y = px(node)
+        if data.get('type') == 'var':
+            parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="18" fill="lightblue" stroke="black"/>')
+        else:
+            parts.append(f'<rect x="{x - 15:.1f}" y="{y - 15:.1f}" width="30" height="30" fill="lightgreen" stroke="black"/>')
+        parts.append(f'<text x="{x:.1f}" y="{y:.1f}" text-anchor="middle" dominant-baseline="central">'
+                     f'{escape(data.get("label", node))}</text>')
+    parts.append('</svg>')
+    return '\n'.join(parts) + '\n'
@@ -0,0 +1,314 @@
+"""
+Ingestion of polygons given by their vertices: GeoJSON, WKT or JSONL point
+lists in, geometry_kb inputs out.
+
+Sides, interior angles, diagonals, area (shoelace) and perimeter are computed
+with NumPy on whole groups of polygons with the same vertex count, then named
+after the KB variables:
+- triangle V0 V1 V2 = A B C: c = AB, a = BC, b = CA, angles A, B, C;
+- quadrilateral ABCD: a = AB, b = BC, c = CD, d = DA, angles A..D,
+  diagonals d1 = AC, d2 = BD;
+- n >= 5: polygon_kb names (s1..sn, A1..An, d3..d(n-1) from V1).
+Angles are in degrees, reflex angles of concave polygons included; the
+orientation of the ring does not matter. Only exterior rings are used. The KB
+accepts a reflex angle only at D of a quadrilateral (A, B and C stay below
+180°), so a concave quadrilateral is measured but, unless its reflex vertex
+is D, rejected by the batch prefilter (reason angle_range).
+
+Usage:
+    python -m ingest parcels.geojson -o problems.jsonl
+    python -m ingest shapes.wkt -o problems.npy && python -m batch problems.npy -o solved.npy
+Input formats: .geojson/.json (Feature, FeatureCollection or geometry),
+.wkt (one POLYGON/MULTIPOLYGON per line, optionally "id<TAB>WKT"), .jsonl
+({"id", "points": [[x, y], ...]} or {"id", "wkt"} or {"id", "geometry"}).
+Triangles and quadrilaterals go to the batch formats; larger polygons are
+only available through the API (load_network builds a polygon_kb network).
+"""
+import argparse
+import json
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+import batch
+import geometry_kb as kb
+import polygon_kb
+from solver import apply_inputs
+
+Ring = np.ndarray  # (k, 2)
+
+FORMATS = ('geojson', 'wkt', 'jsonl')
+SHAPE_BY_COUNT = {3: 'triangle', 4: 'quadrilateral'}
+
+
+# --- ĐỌC HÌNH ---
+def _ring(points: Sequence[Sequence[float]]) -> Ring:
+    """(k, 2) vertices, z dropped and the closing point (= first point) removed."""
+    ring = np.array([(float(p[0]), float(p[1])) for p in points], dtype=np.float64).reshape(-1, 2)
+    if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+        ring = ring[:-1]
+    return ring
+
+
+_WKT_RE = re.compile(r'\s*(MULTIPOLYGON|POLYGON)\s*(?:ZM|Z|M)?\s*(\(.*\)|EMPTY)\s*$', re.IGNORECASE | re.DOTALL)
+
+
+def parse_wkt(text: str) -> List[Ring]:
+    """Exterior rings of a WKT POLYGON or MULTIPOLYGON."""
+    m = _WKT_RE.match(text)
+    if not m:
+        raise ValueError(f"WKT không hỗ trợ (chỉ POLYGON/MULTIPOLYGON): {text[:40]!r}")
+    body = m.group(2)
+    if body.upper() == 'EMPTY':
+        return []
+    ring_depth = 3 if m.group(1).upper() == 'MULTIPOLYGON' else 2
+    rings, depth, exterior, start = [], 0, False, 0
+    for i, ch in enumerate(body):
+        if ch == '(':
+            depth += 1
+            if depth == ring_depth - 1:
+                exterior = True  # vòng đầu tiên của mỗi đa giác là vòng ngoài
+            elif depth == ring_depth:
+                start = i + 1
+        elif ch == ')':
+            if depth == ring_depth and exterior:
+                rings.append(_ring([pt.split() for pt in body[start:i].split(',')]))
+                exterior = False
+            depth -= 1
+    if depth != 0:
+        raise ValueError("WKT thiếu dấu ngoặc")
+    return rings
+
+
+def geojson_rings(obj: Dict[str, Any], obj_id: Any = None) -> Iterator[Tuple[Any, Ring]]:
+    """(id, exterior ring) of every polygon in a GeoJSON object; parts of a multipolygon get "<id>/<k>"."""
+    kind = obj.get('type')
+    if kind == 'FeatureCollection':
+        for i, feature in enumerate(obj.get('features', [])):
+            yield from geojson_rings(feature, i)
+    elif kind == 'Feature':
+        fid = obj.get('id', (obj.get('properties') or {}).get('id', obj_id))
+        if obj.get('geometry'):
+            yield from geojson_rings(obj['geometry'], fid)
+    elif kind == 'GeometryCollection':
+        for i, geometry in enumerate(obj.get('geometries', [])):
+            yield from geojson_rings(geometry, f"{obj_id}/{i}" if obj_id is not None else i)
+    elif kind == 'Polygon':
+        if obj.get('coordinates'):
+            yield obj_id, _ring(obj['coordinates'][0])
+    elif kind == 'MultiPolygon':
+        parts = [p for p in obj.get('coordinates', []) if p]
+        for i, polygon in enumerate(parts):
+            yield (obj_id if len(parts) == 1 else f"{obj_id}/{i}"), _ring(polygon[0])
+
+
+def _with_ids(obj_id: Any, rings: List[Ring]) -> Iterator[Tuple[Any, Ring]]:
+    for i, ring in enumerate(rings):
+        yield (obj_id if len(rings) == 1 else f"{obj_id}/{i}"), ring
+
+
+def read_polygons(path: str, fmt: str = 'auto') -> Iterator[Tuple[Any, Ring]]:
+    """(id, ring) of every polygon of a file ('-' = stdin). Ids default to the row/feature index."""
+    fmt = detect_format(path) if fmt == 'auto' else fmt
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        if fmt == 'geojson':
+            yield from geojson_rings(json.load(stream))
+            return
+        for row, line in enumerate(stream):
+            line = line.strip()
+            if not line:
+                continue
+            if fmt == 'wkt':
+                obj_id, _, text = line.rpartition('\t')
+                yield from _with_ids(obj_id or row, parse_wkt(text))
+                continue
+            record = json.loads(line)
+            obj_id = record.get('id', row)
+            if 'points' in record:
+                yield obj_id, _ring(record['points'])
+            elif 'wkt' in record:
+                yield from _with_ids(obj_id, parse_wkt(record['wkt']))
+            elif 'geometry' in record:
+                yield from geojson_rings(record['geometry'], obj_id)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def detect_format(path: str) -> str:
+    lower = path.lower()
+    if lower.endswith(('.geojson', '.json')):
+        return 'geojson'
+    if lower.endswith('.wkt'):
+        return 'wkt'
+    return 'jsonl'
+
+
+# --- ĐO ĐẠC THEO MẢNG ---
+def polygon_measures(points: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Measures of m polygons with k vertices each, points (m, k, 2):
+    'sides' (m, k) with sides[:, i] = |V_i V_(i+1)|, 'angles' (m, k) interior
+    angles in degrees, 'diagonals' (m, k - 3) = |V_0 V_j| for j = 2..k-2,
+    'area' and 'perimeter' (m,).
+    """
+    nxt = np.roll(points, -1, axis=1)
+    prv = np.roll(points, 1, axis=1)
+    edges = nxt - points
+    sides = np.hypot(edges[..., 0], edges[..., 1])
+    twice_area = np.sum(points[..., 0] * nxt[..., 1] - nxt[..., 0] * points[..., 1], axis=1)
+    orient = np.where(twice_area < 0, -1.0, 1.0)[:, None]
+    # Góc ngoài (có dấu) tại mỗi đỉnh; góc trong = 180 - góc ngoài theo chiều của vòng
+    incoming = points - prv
+    turn = np.degrees(np.arctan2(incoming[..., 0] * edges[..., 1] - incoming[..., 1] * edges[..., 0],
+                                 incoming[..., 0] * edges[..., 0] + incoming[..., 1] * edges[..., 1]))
+    angles = 180.0 - turn * orient
+    diag = points[:, 2:-1] - points[:, :1]
+    return {'sides': sides, 'angles': angles, 'diagonals': np.hypot(diag[..., 0], diag[..., 1]),
+            'area': np.abs(twice_area) / 2.0, 'perimeter': sides.sum(axis=1)}
+
+
+def kb_columns(points: np.ndarray) -> Dict[str, np.ndarray]:
+    """Measures of polygons with k vertices (points (m, k, 2)) under the KB variable names."""
+    k = points.shape[1]
+    m = polygon_measures(points)
+    sides, angles = m['sides'], m['angles']
+    cols = {'area': m['area'], 'perimeter': m['perimeter']}
+    if k == 3:
+        cols.update(a=sides[:, 1], b=sides[:, 2], c=sides[:, 0], A=angles[:, 0], B=angles[:, 1], C=angles[:, 2])
+    elif k == 4:
+        bd = points[:, 3] - points[:, 1]
+        cols.update(a=sides[:, 0], b=sides[:, 1], c=sides[:, 2], d=sides[:, 3],
+                    A=angles[:, 0], B=angles[:, 1], C=angles[:, 2], D=angles[:, 3],
+                    d1=m['diagonals'][:, 0], d2=np.hypot(bd[:, 0], bd[:, 1]))
+    else:
+        for i in range(k):
+            cols[polygon_kb.side(i + 1)] = sides[:, i]
+            cols[polygon_kb.angle(i + 1)] = angles[:, i]
+        for j in range(3, k):
+            cols[f"d{j}"] = m['diagonals'][:, j - 3]
+    return cols
+
+
+def group_by_count(items: Iterable[Tuple[Any, Ring]]) -> Dict[int, Tuple[List[Any], np.ndarray]]:
+    """{vertex count: (ids, points (m, k, 2))}, degenerate rings (< 3 vertices) left out."""
+    groups: Dict[int, Tuple[List[Any], List[Ring]]] = {}
+    for obj_id, ring in items:
+        if len(ring) >= 3:
+            ids, rings = groups.setdefault(len(ring), ([], []))
+            ids.append(obj_id)
+            rings.append(ring)
+    return {k: (ids, np.stack(rings)) for k, (ids, rings) in groups.items()}
+
+
+# --- ĐẦU RA: MẠNG / BATCH ---
+def network_inputs(points: np.ndarray) -> Dict[str, float]:
+    """KB inputs of one polygon (points (k, 2)): every measure of kb_columns."""
+    return {name: float(col[0]) for name, col in kb_columns(np.asarray(points, dtype=np.float64)[None]).items()}
+
+
+def load_network(points: Sequence[Sequence[float]]):
+    """
+    Network of one polygon with its measures entered: geometry_kb 'triangle' /
+    'quadrilateral', or a polygon_kb n-gon network (coordinates entered) for
+    n >= 5. Returns (network, ok, message) like solver.apply_inputs.
+    """
+    ring = _ring(points)
+    k = len(ring)
+    if k < 3:
+        raise ValueError("Đa giác cần ít nhất 3 đỉnh")
+    if k in SHAPE_BY_COUNT:
+        net = kb.build_network(SHAPE_BY_COUNT[k])
+        ok, msg = apply_inputs(net, network_inputs(ring))
+        return net, ok, msg
+    net = polygon_kb.build_polygon_network(k)
+    inputs = {}
+    for i, (x, y) in enumerate(ring.tolist(), 1):
+        inputs[f"x{i}"] = x
+        inputs[f"y{i}"] = y
+    ok, msg = apply_inputs(net, inputs)
+    return net, ok, msg
+
+
+def batch_records(groups: Dict[int, Tuple[List[Any], np.ndarray]]) -> Iterator[Dict[str, Any]]:
+    """`python -m batch` JSONL records ({'id', 'shape', 'inputs'}) of the triangles and quadrilaterals."""
+    for k in sorted(groups):
+        if k not in SHAPE_BY_COUNT:
+            continue
+        ids, points = groups[k]
+        cols = kb_columns(points)
+        names = list(cols)
+        values = np.column_stack([cols[n] for n in names]).tolist()
+        for obj_id, row in zip(ids, values):
+            yield {'id': obj_id, 'shape': SHAPE_BY_COUNT[k], 'inputs': dict(zip(names, row))}
+
+
+def batch_array(groups: Dict[int, Tuple[List[Any], np.ndarray]]) -> Tuple[np.ndarray, List[Any]]:
+    """
+    Structured array for `python -m batch` (batch.record_dtype() plus the integer
+    'shape' column, NaN = unknown) of the triangles and quadrilaterals, and their ids.
+    """
+    base = batch.record_dtype()
+    dtype = np.dtype(base.descr + [('shape', '<i2')])
+    parts, ids = [], []
+    for k in sorted(groups):
+        if k not in SHAPE_BY_COUNT:
+            continue
+        group_ids, points = groups[k]
+        part = np.zeros(len(points), dtype=dtype)
+        for name in base.names:
+            part[name] = np.nan
+        part['shape'] = batch.SHAPE_CODES.index(SHAPE_BY_COUNT[k])
+        for name, col in kb_columns(points).items():
+            if name in base.names:
+                part[name] = col
+        parts.append(part)
+        ids.extend(group_ids)
+    return (np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)), ids
+
+
+def skipped_counts(groups: Dict[int, Tuple[List[Any], np.ndarray]]) -> Dict[int, int]:
+    """{vertex count: number of polygons} the batch formats cannot take (n >= 5)."""
+    return {k: len(ids) for k, (ids, _) in groups.items() if k not in SHAPE_BY_COUNT}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m ingest',
+                                     description="Chuyển đa giác (GeoJSON/WKT/toạ độ) thành bài toán cho python -m batch")
+    parser.add_argument('input', help="tệp .geojson/.json, .wkt hoặc .jsonl ('-' = stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="tệp bài toán: JSONL ('-' = stdout, mặc định) hoặc mảng .npy có cột 'shape'")
+    parser.add_argument('--format', choices=('auto',) + FORMATS, default='auto', help="định dạng đầu vào")
+    parser.add_argument('--ids', help="với đầu ra .npy: tệp JSONL ghi id của từng dòng của mảng")
+    args = parser.parse_args(argv)
+    if args.input == '-' and args.format == 'auto':
+        args.format = 'jsonl'
+    try:
+        groups = group_by_count(read_polygons(args.input, args.format))
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        parser.error(f"Không đọc được đa giác: {e}")
+    if args.output.lower().endswith('.npy'):
+        array, ids = batch_array(groups)
+        np.save(args.output, array)
+        if args.ids:
+            with open(args.ids, 'w', encoding='utf-8') as f:
+                for obj_id in ids:
+                    f.write(json.dumps(obj_id, ensure_ascii=False) + "\n")
+    else:
+        out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+        try:
+            for record in batch_records(groups):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    for k, count in sorted(skipped_counts(groups).items()):
+        print(f"Bỏ qua {count} đa giác {k} đỉnh (chỉ hỗ trợ qua ingest.load_network)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
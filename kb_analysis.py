@@ -0,0 +1,343 @@
+"""
+Static analysis and optimization of the geometry knowledge base.
+
+Each constraint is probed against a consistent reference figure: for every
+subset K of its variables that is known, we record which unknown variables it
+derives and with which value. From these capability maps we find
+
+- redundant constraints: everything they derive, at every knowledge state,
+  is also derived (with the same value) by the other kept constraints;
+- overlapping constraints: pairs that derive the same variable from the same
+  knowledge state (reported only);
+- mismatches: a constraint output that disagrees with the reference figure;
+- dead variables: variables that no constraint uses.
+
+optimize_network() drops redundant constraints and dead variables from a built
+network, evaluation_savings() measures the effect on real solves.
+The analysis is empirical (one reference figure), not a symbolic proof.
+
+Usage: python kb_analysis.py [network_name ...]
+"""
+import math
+import sys
+from itertools import combinations
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import geometry_kb as kb
+from engine import ConstraintNetwork, Constraint, SolveBudget
+
+REL_TOL = 1e-7
+
+# Hình tham chiếu (tọa độ đỉnh A, B, C, D) cho từng loại mạng tứ giác
+REFERENCE_VERTICES = {
+    'quadrilateral': [(0.0, 0.0), (6.0, 0.0), (4.0, 3.0), (1.0, 3.0)],
+    'trapezoid': [(0.0, 0.0), (6.0, 0.0), (4.0, 3.0), (1.0, 3.0)],
+    'parallelogram': [(0.0, 0.0), (5.0, 0.0), (7.0, 3.0), (2.0, 3.0)],
+    'rectangle': [(0.0, 0.0), (5.0, 0.0), (5.0, 3.0), (0.0, 3.0)],
+    'square': [(0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 4.0)],
+    'rhombus': [(0.0, 0.0), (5.0, 0.0), (8.0, 4.0), (3.0, 4.0)],
+}
+# Tam giác tham chiếu: mạng tam giác đủ để suy ra mọi biến từ 3 cạnh
+REFERENCE_TRIANGLES = {
+    'triangle': {'a': 5.0, 'b': 6.0, 'c': 7.0},
+    'equilateral_triangle': {'a': 4.0, 'b': 4.0, 'c': 4.0},
+}
+
+# Biến "đầu vào" dùng để sinh các bài toán mẫu khi đo số lần đánh giá
+SAMPLE_INPUTS = {
+    'triangle': (['a', 'b', 'c', 'A', 'B', 'C', 'perimeter', 'area', 'h_a'], 3),
+    'quad': (['a', 'b', 'c', 'd', 'A', 'B', 'C', 'D', 'perimeter', 'area', 'h', 'd1'], 4),
+}
+
+
+def _close(x: float, y: float) -> bool:
+    return abs(x - y) <= REL_TOL * (1.0 + abs(y))
+
+
+def quad_reference(vertices: List[Tuple[float, float]]) -> Dict[str, float]:
+    """All quadrilateral KB variables of the convex polygon ABCD (counter-clockwise)."""
+    P = vertices
+    def dist(i, j):
+        return math.hypot(P[j][0] - P[i][0], P[j][1] - P[i][1])
+    def angle(i):
+        prev, nxt = P[i - 1], P[(i + 1) % 4]
+        v1 = (prev[0] - P[i][0], prev[1] - P[i][1])
+        v2 = (nxt[0] - P[i][0], nxt[1] - P[i][1])
+        cosv = (v1[0] * v2[0] + v1[1] * v2[1]) / (math.hypot(*v1) * math.hypot(*v2))
+        return math.degrees(math.acos(max(-1.0, min(1.0, cosv))))
+    ref = {'a': dist(0, 1), 'b': dist(1, 2), 'c': dist(2, 3), 'd': dist(3, 0),
+           'A': angle(0), 'B': angle(1), 'C': angle(2), 'D': angle(3),
+           'd1': dist(0, 2), 'd2': dist(1, 3)}
+    ref['perimeter'] = ref['a'] + ref['b'] + ref['c'] + ref['d']
+    ref['s'] = ref['perimeter'] / 2.0
+    ref['area'] = 0.5 * abs(sum(P[i][0] * P[(i + 1) % 4][1] - P[(i + 1) % 4][0] * P[i][1] for i in range(4)))
+    # h: khoảng cách từ D tới đường thẳng AB (AB nằm trên trục hoành)
+    ref['h'] = abs(P[3][1])
+    return ref
+
+
+def reference_values(kind: str) -> Dict[str, float]:
+    """Consistent values for every variable of the named network that can be derived."""
+    if kind in REFERENCE_TRIANGLES:
+        net = kb.NETWORK_FACTORIES[kind]()
+        for k, v in REFERENCE_TRIANGLES[kind].items():
+            net.set_input(k, v)
+        net.solve()
+        return {k: v for k, v in net.get_results().items() if v is not None}
+    return quad_reference(REFERENCE_VERTICES[kind])
+
+
+class _State:
+    """Save/restore the values of a network around probing."""
+    def __init__(self, net: ConstraintNetwork):
+        self.net = net
+        self.values = {n: (v.value, v.source) for n, v in net.vars.items()}
+        self.sensitivities = net.sensitivities
+        self.had_ssa = hasattr(net, '_ssa_warning')
+
+    def restore(self):
+        for n, (val, src) in self.values.items():
+            self.net.vars[n].value = val
+            self.net.vars[n].source = src
+        self.net.sensitivities = self.sensitivities
+        if not self.had_ssa and hasattr(self.net, '_ssa_warning'):
+            del self.net._ssa_warning
+
+
+def probe_constraint(net: ConstraintNetwork, cons: Constraint,
+                     reference: Dict[str, float]) -> Dict[FrozenSet[str], Dict[str, float]]:
+    """
+    Capability map of one constraint: known-subset K -> {derived variable: value}.
+    Only subsets of variables that have a reference value are explored.
+    """
+    nodes = [n for n in dict.fromkeys(cons.nodes) if n in reference]
+    caps: Dict[FrozenSet[str], Dict[str, float]] = {}
+    for size in range(len(nodes) + 1):
+        for subset in combinations(nodes, size):
+            known = frozenset(subset)
+            for n, var in net.vars.items():
+                var.value = reference[n] if n in known else None
+                var.source = 'probe' if n in known else None
+            try:
+                updates = cons.try_apply(net)
+            except Exception:
+                updates = {}
+            out = {k: float(v) for k, v in updates.items() if k not in known and v is not None}
+            if out:
+                caps[known] = out
+    return caps
+
+
+def _covered(name: str, caps: Dict[str, Dict[FrozenSet[str], Dict[str, float]]],
+             nodes: Dict[str, FrozenSet[str]], kept: List[str]) -> bool:
+    """True if every output of `name` is also produced, with the same value, by a kept constraint."""
+    others = [o for o in kept if o != name]
+    for known, outs in caps[name].items():
+        for var, val in outs.items():
+            if not any(var in caps[o].get(known & nodes[o], {}) and
+                       _close(caps[o][known & nodes[o]][var], val) for o in others):
+                return False
+    return True
+
+
+def analyze_network(net: ConstraintNetwork, reference: Dict[str, float],
+                    verify: Optional[Callable[[set], bool]] = None) -> Dict[str, Any]:
+    """
+    Analyze one built network against a consistent reference assignment.
+    Returns a report dict with 'dead_variables', 'redundant_constraints' (with the
+    constraints covering them), 'overlaps', 'shared_outputs', 'mismatches' and
+    fan-out statistics. `verify(removed_names)` may veto a removal (e.g. when it
+    changes the results of sample solves).
+    """
+    state = _State(net)
+    net.sensitivities = False
+    try:
+        caps = {c.name: probe_constraint(net, c, reference) for c in net.constraints}
+    finally:
+        state.restore()
+    nodes = {c.name: frozenset(n for n in c.nodes if n in reference) for c in net.constraints}
+    order = [c.name for c in net.constraints]
+
+    # Giá trị sai lệch so với hình tham chiếu
+    mismatches = []
+    for name in order:
+        bad = sorted({var for outs in caps[name].values() for var, val in outs.items()
+                      if var in reference and not _close(val, reference[var])})
+        if bad:
+            mismatches.append({'constraint': name, 'variables': bad})
+
+    # Loại dần từ ràng buộc khai báo sau cùng: bản trùng lặp khai báo sau bị bỏ.
+    # Một ràng buộc chỉ bị loại nếu phần còn lại vẫn phủ nó VÀ mọi ràng buộc đã loại trước đó.
+    kept = list(order)
+    removed: List[str] = []
+    for name in reversed(order):
+        if not caps[name]:
+            continue  # never derives anything on the reference: only a consistency guard
+        trial = [o for o in kept if o != name]
+        if not all(_covered(r, caps, nodes, trial) for r in removed + [name]):
+            continue
+        if verify is not None and not verify(set(removed + [name])):
+            continue
+        kept = trial
+        removed.append(name)
+    redundant = []
+    for name in order:
+        if name in removed:
+            covering = sorted({o for o in kept for known, outs in caps[name].items()
+                               for var in outs if var in caps[o].get(known & nodes[o], {})})
+            redundant.append({'constraint': name, 'covered_by': covering})
+
+    overlaps = []
+    for i, x in enumerate(order):
+        for y in order[i + 1:]:
+            shared = sum(1 for known, outs in caps[x].items() for var, val in outs.items()
+                         if var in caps[y].get(known & nodes[y], {}) and
+                         _close(caps[y][known & nodes[y]][var], val))
+            if shared:
+                overlaps.append({'constraints': (x, y), 'shared_derivations': shared})
+
+    # Biến được suy ra bởi nhiều ràng buộc (chồng lấn theo đầu ra, từ các trạng thái khác nhau)
+    derived_by: Dict[str, List[str]] = {}
+    for name in order:
+        for var in sorted({v for outs in caps[name].values() for v in outs}):
+            derived_by.setdefault(var, []).append(name)
+    shared_outputs = {var: names for var, names in derived_by.items() if len(names) > 1}
+
+    dead = [n for n, v in net.vars.items() if not v.constraints]
+    fanout_before = sum(len(v.constraints) for v in net.vars.values())
+    fanout_after = sum(1 for v in net.vars.values() for c in v.constraints if c.name not in removed)
+    return {
+        'constraints': len(order),
+        'dead_variables': dead,
+        'redundant_constraints': redundant,
+        'overlaps': overlaps,
+        'shared_outputs': shared_outputs,
+        'mismatches': mismatches,
+        'fanout_before': fanout_before,
+        'fanout_after': fanout_after,
+    }
+
+
+def optimize_network(net: ConstraintNetwork, report: Dict[str, Any]) -> ConstraintNetwork:
+    """Drop the redundant constraints and dead variables found by analyze_network (in place)."""
+    for r in report['redundant_constraints']:
+        net.remove_constraint(r['constraint'])
+    for name in report['dead_variables']:
+        net.remove_variable(name)
+    return net
+
+
+def _sample_problems(kind: str, reference: Dict[str, float]) -> List[Dict[str, float]]:
+    names, size = SAMPLE_INPUTS['triangle' if 'triangle' in kind else 'quad']
+    names = [n for n in names if n in reference]
+    return [{n: reference[n] for n in combo} for combo in combinations(names, size)]
+
+
+def _run_counted(net: ConstraintNetwork, inputs: Dict[str, float]) -> Tuple[int, Dict[str, Optional[float]]]:
+    """Solve from scratch and count constraint evaluations (propagation + solve)."""
+    net.reset()
+    budget = SolveBudget()
+    for k, v in inputs.items():
+        if k in net.vars:
+            net.set_input(k, v, budget=budget)
+    _, diag = net.solve()
+    total = budget.evaluations + diag.get('evaluations', 0)
+    return total, net.get_results()
+
+
+def _same_results(r0: Dict[str, Optional[float]], r1: Dict[str, Optional[float]]) -> List[str]:
+    """Variables (of the optimized network r1) whose value differs from the original r0."""
+    diff = []
+    for var, val in r1.items():
+        ref = r0.get(var)
+        if (val is None) != (ref is None) or (val is not None and not _close(val, ref)):
+            diff.append(var)
+    return diff
+
+
+def _try_run(net: ConstraintNetwork, inputs: Dict[str, float]):
+    try:
+        return _run_counted(net, inputs)
+    except ValueError:
+        return None
+
+
+def removal_verifier(factory: Callable[[], ConstraintNetwork],
+                     problems: List[Dict[str, float]]) -> Callable[[set], bool]:
+    """verify() for analyze_network: a removal is accepted only if no sample result changes."""
+    baseline = [_try_run(factory(), p) for p in problems]
+    def verify(removed: set) -> bool:
+        net = factory()
+        for name in removed:
+            net.remove_constraint(name)
+        for inputs, base in zip(problems, baseline):
+            got = _try_run(net, inputs)
+            if (base is None) != (got is None):
+                return False
+            if base is not None and _same_results(base[1], got[1]):
+                return False
+        return True
+    return verify
+
+
+def evaluation_savings(factory: Callable[[], ConstraintNetwork], report: Dict[str, Any],
+                       problems: List[Dict[str, float]]) -> Dict[str, Any]:
+    """Constraint evaluations of the original vs the optimized network over sample problems."""
+    original = factory()
+    optimized = optimize_network(factory(), report)
+    before = after = 0
+    differing = []
+    for inputs in problems:
+        r0 = _try_run(original, inputs)
+        r1 = _try_run(optimized, inputs)
+        if r0 is None or r1 is None:
+            continue
+        before += r0[0]
+        after += r1[0]
+        differing.extend((tuple(sorted(inputs)), var) for var in _same_results(r0[1], r1[1]))
+    return {
+        'problems': len(problems),
+        'evaluations_before': before,
+        'evaluations_after': after,
+        'saved_pct': (100.0 * (before - after) / before) if before else 0.0,
+        'result_differences': differing,
+    }
+
+
+def analyze_kb(kinds: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Analyze (and measure optimization savings for) every named network of the KB."""
+    reports = {}
+    for kind in kinds or list(kb.NETWORK_FACTORIES):
+        factory = kb.NETWORK_FACTORIES[kind]
+        reference = reference_values(kind)
+        problems = _sample_problems(kind, reference)
+        report = analyze_network(factory(), reference, verify=removal_verifier(factory, problems))
+        report['savings'] = evaluation_savings(factory, report, problems)
+        reports[kind] = report
+    return reports
+
+
+def format_report(kind: str, report: Dict[str, Any]) -> str:
+    lines = [f"== {kind}: {report['constraints']} constraints =="]
+    lines.append(f"  dead variables: {', '.join(report['dead_variables']) or '-'}")
+    for r in report['redundant_constraints']:
+        lines.append(f"  redundant: {r['constraint']} (covered by {', '.join(r['covered_by'])})")
+    for o in report['overlaps']:
+        lines.append(f"  overlap: {o['constraints'][0]} ~ {o['constraints'][1]} "
+                     f"({o['shared_derivations']} shared derivations)")
+    for var, names in report['shared_outputs'].items():
+        lines.append(f"  {var} derived by: {', '.join(names)}")
+    for m in report['mismatches']:
+        lines.append(f"  mismatch: {m['constraint']} disagrees with reference on {', '.join(m['variables'])}")
+    lines.append(f"  fan-out (variable->constraint links): {report['fanout_before']} -> {report['fanout_after']}")
+    sv = report.get('savings')
+    if sv:
+        lines.append(f"  evaluations over {sv['problems']} sample problems: {sv['evaluations_before']} -> "
+                     f"{sv['evaluations_after']} ({sv['saved_pct']:.1f}% saved), "
+                     f"{len(sv['result_differences'])} result differences")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    for kind, rep in analyze_kb(sys.argv[1:] or None).items():
+        print(format_report(kind, rep))
@@ -0,0 +1,873 @@
+"""
+Shared formula library of the geometry knowledge base.
+
+Every constraint of geometry_kb refers to one of these functions by name.
+Two signatures are used (see engine.Constraint):
+- forward formulas: f(vals, *args) -> value, vals = {dependency: value}
+- flex formulas:    f(netw, known, unknown, *args) -> {name: value} or None
+Extra positional `args` come from the spec entry, so one formula serves
+several constraints (e.g. cos_side for cos_a / cos_b / cos_c).
+All functions are module-level (no closures), hence picklable.
+sin/cos of angles and squares of variable values go through engine.sin_deg,
+cos_deg and square, which reuse the results of the network being solved.
+"""
+import dmath
+from engine import safe_sqrt, clamp, sin_deg, cos_deg, square
+
+
+# --- CÁC HÀM BỔ TRỢ ---
+def get_rad(deg):
+    return dmath.radians(deg) if deg is not None else None
+
+
+def get_deg(rad):
+    return dmath.degrees(rad) if rad is not None else None
+
+
+def copy_first_known(netw, known, unknown, names=('a', 'b', 'c', 'd')):
+    """Copy the first known value among `names` to the unknown ones (equal sides)."""
+    val = None
+    for k in names:
+        if k in known:
+            val = netw.vars[k].value
+            break
+    if val is None:
+        return None
+    res = {k: val for k in names if k not in known}
+    return res or None
+
+
+# =============================================================================
+# TAM GIÁC
+# =============================================================================
+
+# angle sum forward constraints
+def triangle_angle_from_sum(vals, target):
+    # Nếu cả 3 góc đã biết, kiểm tra tổng trước khi ghi đè
+    if all(k in vals for k in ('A', 'B', 'C')):
+        total = vals['A'] + vals['B'] + vals['C']
+        if abs(total - 180.0) > 1e-2:
+            return None
+    x, y = [k for k in ('A', 'B', 'C') if k != target]
+    return 180.0 - vals[x] - vals[y]
+
+
+# law of sines as flexible (can produce many unknowns)
+def law_sines(netw, known, unknown):
+    # if at least one side-angle pair known, compute others
+    pairs = [('a', 'A'), ('b', 'B'), ('c', 'C')]
+    ratio = None
+    for s, ang in pairs:
+        if netw.vars[s].is_known() and netw.vars[ang].is_known():
+            a = netw.vars[s].value
+            Adeg = netw.vars[ang].value
+            if Adeg is None:
+                continue
+            sinA = sin_deg(Adeg)
+            if abs(sinA) < 1e-12:
+                continue
+            ratio = a / sinA
+            break
+    if ratio is None:
+        return None
+    res = {}
+    ambiguous_detected = False
+    # Đủ ba cạnh: góc do định lý cos xác định duy nhất, arcsin có thể chọn nhầm góc nhọn
+    all_sides_known = all(netw.vars[s].is_known() for s, _ in pairs)
+    for s, ang in pairs:
+        # compute side if angle known
+        if not netw.vars[s].is_known() and netw.vars[ang].is_known():
+            res[s] = ratio * sin_deg(netw.vars[ang].value)
+        # compute angle if side known
+        if not all_sides_known and not netw.vars[ang].is_known() and netw.vars[s].is_known():
+            sinv = netw.vars[s].value / ratio
+            if -1.0 <= sinv <= 1.0:
+                angle_acute = dmath.degrees(dmath.asin(clamp(sinv, -1, 1)))
+                # Check if obtuse angle is also valid
+                if abs(abs(sinv) - 1.0) > 1e-9:  # Not 90°
+                    angle_obtuse = 180.0 - angle_acute
+                    res[ang] = angle_acute
+                    ambiguous_detected = True
+                    # Store metadata for SSA detection
+                    if not hasattr(netw, '_ssa_warning'):
+                        netw._ssa_warning = True
+                else:
+                    res[ang] = angle_acute
+    return res or None
+
+
+# law of cosines forward for sides
+def cos_side(vals, side):
+    if side == 'a':
+        return safe_sqrt(square(vals['b']) + square(vals['c']) - 2*vals['b']*vals['c']*cos_deg(vals['A']))
+    if side == 'b':
+        return safe_sqrt(square(vals['a']) + square(vals['c']) - 2*vals['a']*vals['c']*cos_deg(vals['B']))
+    return safe_sqrt(square(vals['a']) + square(vals['b']) - 2*vals['a']*vals['b']*cos_deg(vals['C']))
+
+
+# cos -> angles (safe clamp)
+def cos_angle(vals, angle):
+    if angle == 'A':
+        num = square(vals['b']) + square(vals['c']) - square(vals['a'])
+        den = 2*vals['b']*vals['c']
+    elif angle == 'B':
+        num = square(vals['a']) + square(vals['c']) - square(vals['b'])
+        den = 2*vals['a']*vals['c']
+    else:
+        num = square(vals['a']) + square(vals['b']) - square(vals['c'])
+        den = 2*vals['a']*vals['b']
+    if den == 0:
+        return None
+    val = clamp(num/den, -1.0, 1.0)
+    return dmath.degrees(dmath.acos(val))
+
+
+def triangle_perimeter(vals):
+    return vals['a'] + vals['b'] + vals['c']
+
+
+# Reverse perimeter: if perimeter and 2 sides known, compute third side
+def perimeter_reverse(netw, known, unknown):
+    res = {}
+    if 'perimeter' in known and 'perimeter' not in unknown:
+        p = netw.vars['perimeter'].value
+        if p is not None and p > 0:
+            sides = ['a', 'b', 'c']
+            known_sides = [s for s in sides if netw.vars[s].is_known()]
+            unknown_sides = [s for s in sides if not netw.vars[s].is_known()]
+            if len(known_sides) == 2 and len(unknown_sides) == 1:
+                known_sum = sum(netw.vars[s].value for s in known_sides)
+                computed_side = p - known_sum
+                # VALIDATION
+                if computed_side <= 0:
+                    return None  # Invalid: side must be positive
+                # Triangle inequality pre-check
+                sides_values = {s: netw.vars[s].value for s in known_sides}
+                sides_values[unknown_sides[0]] = computed_side
+                a_val = sides_values.get('a', computed_side)
+                b_val = sides_values.get('b', computed_side)
+                c_val = sides_values.get('c', computed_side)
+                # Quick triangle inequality check
+                if not ((a_val + b_val > c_val + 1e-6) and
+                        (a_val + c_val > b_val + 1e-6) and
+                        (b_val + c_val > a_val + 1e-6)):
+                    return None  # Would violate triangle inequality
+                res[unknown_sides[0]] = computed_side
+    return res or None
+
+
+# semi-perimeter s = (a+b+c)/2
+def triangle_semi_perimeter(vals):
+    return (vals['a'] + vals['b'] + vals['c']) / 2.0
+
+
+# circumradius R = a*b*c / (4*Area)
+def circumradius(vals):
+    return (vals['a'] * vals['b'] * vals['c']) / (4.0 * vals['area']) if vals['area'] not in (None, 0) else None
+
+
+# inradius r = Area / s
+def inradius(vals):
+    return (vals['area'] / vals['s']) if vals['s'] not in (None, 0) else None
+
+
+# exradii r_a = Area / (s - a) etc.
+def exradius(vals, side):
+    s, x = vals['s'], vals[side]
+    return (vals['area'] / (s - x)) if (s is not None and x is not None and abs(s - x) > 1e-12) else None
+
+
+# medians (Apollonius): m_a = 0.5*sqrt(2b^2 + 2c^2 - a^2)
+def median(vals, side):
+    y, z = [k for k in ('a', 'b', 'c') if k != side]
+    return safe_sqrt(0.25 * (2*(square(vals[y]) + square(vals[z])) - square(vals[side])))
+
+
+# angle bisector length l_a = 2bc * cos(A/2) / (b + c)
+def bisector(vals, angle):
+    y, z = [k for k in ('a', 'b', 'c') if k != angle.lower()]
+    u, w, ang = vals[y], vals[z], vals[angle]
+    if u is not None and w is not None and (u + w) != 0 and ang is not None:
+        return 2.0 * u * w * dmath.cos(dmath.radians(ang / 2.0)) / (u + w)
+    return None
+
+
+# heights h_a = 2*area / a
+def height_from_area(vals, side):
+    x = vals[side]
+    return (2.0 * vals['area'] / x) if (x is not None and x != 0 and vals['area'] is not None) else None
+
+
+# area flexible: heron or 0.5 ab sinC
+def area_flex(netw, known, unknown):
+    if 'area' not in unknown:
+        return None
+    # heron
+    if netw.vars['a'].is_known() and netw.vars['b'].is_known() and netw.vars['c'].is_known():
+        a, b, c = netw.vars['a'].value, netw.vars['b'].value, netw.vars['c'].value
+        s = (a+b+c)/2
+        heron_expr = s*(s-a)*(s-b)*(s-c)
+        if heron_expr < 0:
+            return None  # Invalid: cannot take sqrt of negative
+        her = safe_sqrt(heron_expr)
+        if her is not None:
+            return {'area': her}
+    # sin formula
+    if netw.vars['a'].is_known() and netw.vars['b'].is_known() and netw.vars['C'].is_known():
+        return {'area': 0.5 * netw.vars['a'].value * netw.vars['b'].value * sin_deg(netw.vars['C'].value)}
+    return None
+
+
+# Reverse area: if area and 2 sides with included angle, compute third side (complex, skip for now)
+# Or if area and height known, compute base
+def area_reverse_triangle(netw, known, unknown):
+    res = {}
+    if 'area' in known and 'area' not in unknown:
+        area_val = netw.vars['area'].value
+        if area_val is not None and area_val > 0:
+            # If area and height known, compute base: area = 0.5 * base * height
+            if 'h_a' in known and 'a' in unknown:
+                h = netw.vars['h_a'].value
+                if h is not None and h > 0:
+                    res['a'] = 2 * area_val / h
+            if 'h_b' in known and 'b' in unknown:
+                h = netw.vars['h_b'].value
+                if h is not None and h > 0:
+                    res['b'] = 2 * area_val / h
+            if 'h_c' in known and 'c' in unknown:
+                h = netw.vars['h_c'].value
+                if h is not None and h > 0:
+                    res['c'] = 2 * area_val / h
+    return res or None
+
+
+# nếu tam giác đã biết 3 góc = 60° (tam giác đều) và perimeter thì suy ra 3 cạnh và diện tích
+def equilateral_from_perimeter(netw, known, unknown):
+    # cần perimeter và Cả 3 góc đã biết và đều ~60°
+    if 'perimeter' in known and all(netw.vars.get(ang) and netw.vars[ang].is_known() for ang in ('A', 'B', 'C')):
+        A = netw.vars['A'].value; B = netw.vars['B'].value; C = netw.vars['C'].value
+        if abs(A-60.0) < 1e-6 and abs(B-60.0) < 1e-6 and abs(C-60.0) < 1e-6:
+            p = netw.vars['perimeter'].value
+            if p is None:
+                return None
+            a = p / 3.0
+            area = (dmath.sqrt(3.0)/4.0) * a * a
+            res = {}
+            # chỉ ghi khi chưa biết
+            for s in ('a', 'b', 'c'):
+                if not netw.vars[s].is_known():
+                    res[s] = a
+            if not netw.vars['area'].is_known():
+                res['area'] = area
+            return res or None
+    return None
+
+
+# Reverse height: compute area from height and base
+def triangle_area_from_height_base(netw, known, unknown):
+    res = {}
+    if 'area' in unknown:
+        # area = 0.5 * base * height
+        for base, height in [('a', 'h_a'), ('b', 'h_b'), ('c', 'h_c')]:
+            if base in known and height in known:
+                res['area'] = 0.5 * netw.vars[base].value * netw.vars[height].value
+                break
+    return res or None
+
+
+# Reverse height: compute base from area and height
+def triangle_base_from_area_height(netw, known, unknown):
+    res = {}
+    if 'area' in known:
+        area_val = netw.vars['area'].value
+        if area_val > 0:
+            for base, height in [('a', 'h_a'), ('b', 'h_b'), ('c', 'h_c')]:
+                if base in unknown and height in known:
+                    h = netw.vars[height].value
+                    if h > 0:
+                        res[base] = 2 * area_val / h
+    return res or None
+
+
+# --- Tam giác đều ---
+# Flex: set unknown angles to 60° (do not override known angles)
+def equilateral_angles_60(netw, known, unknown):
+    res = {}
+    for ang in ('A', 'B', 'C'):
+        if ang not in known:
+            res[ang] = 60.0
+    return res or None
+
+
+# area = sqrt(3)/4 * a^2
+def equilateral_area(vals):
+    return (dmath.sqrt(3.0)/4.0) * square(vals['a']) if (vals.get('a') is not None) else None
+
+
+# perimeter = 3 * a
+def equilateral_perimeter(vals):
+    return (3.0 * vals['a']) if (vals.get('a') is not None) else None
+
+
+# a = P / 3
+def equilateral_side_from_perimeter(vals):
+    return (vals['perimeter'] / 3.0) if (vals.get('perimeter') is not None) else None
+
+
+# a = sqrt(4S / sqrt(3))
+def equilateral_side_from_area(vals):
+    return safe_sqrt(vals['area'] * 4.0 / dmath.sqrt(3)) if (vals.get('area') is not None) else None
+
+
+# =============================================================================
+# TỨ GIÁC THƯỜNG
+# =============================================================================
+def quad_perimeter(vals):
+    return vals['a'] + vals['b'] + vals['c'] + vals['d']
+
+
+# Reverse chu vi: tính cạnh từ chu vi và 3 cạnh khác
+def quad_perimeter_reverse(netw, known, unknown):
+    res = {}
+    if 'perimeter' in known and 'perimeter' not in unknown:
+        p = netw.vars['perimeter'].value
+        if p is not None and p > 0:
+            sides = ['a', 'b', 'c', 'd']
+            known_sides = [s for s in sides if netw.vars[s].is_known()]
+            unknown_sides = [s for s in sides if not netw.vars[s].is_known()]
+            if len(known_sides) == 3 and len(unknown_sides) == 1:
+                known_sum = sum(netw.vars[s].value for s in known_sides)
+                computed_side = p - known_sum
+                if computed_side > 0:
+                    res[unknown_sides[0]] = computed_side
+    return res or None
+
+
+# Nửa chu vi từ chu vi
+def quad_semi_perimeter_from_perimeter(vals):
+    return vals['perimeter'] / 2.0
+
+
+# Nửa chu vi từ 4 cạnh
+def quad_semi_perimeter_from_sides(vals):
+    return (vals['a'] + vals['b'] + vals['c'] + vals['d']) / 2.0
+
+
+# Tổng 4 góc = 360
+def sum_angles_quad(netw, known, unknown):
+    angles = ['A', 'B', 'C', 'D']
+    vals = [netw.vars[x].value for x in angles]
+    if sum(1 for x in vals if x is not None) == 3:
+        res = 360.0 - sum(x for x in vals if x is not None)
+        for i, name in enumerate(angles):
+            if vals[i] is None:
+                return {name: res}
+    return None
+
+
+# Đường chéo d1 (AC)
+def diagonal_AC_calc(netw, known, unknown):
+    res = {}
+    # Tam giác ABC: d1^2 = a^2 + b^2 - 2ab*cos(B)
+    if 'a' in known and 'b' in known and 'B' in known:
+        val = square(netw.vars['a'].value) + square(netw.vars['b'].value) - \
+              2*netw.vars['a'].value*netw.vars['b'].value*cos_deg(netw.vars['B'].value)
+        res['d1'] = safe_sqrt(val)
+    # Tam giác CDA: d1^2 = c^2 + d^2 - 2cd*cos(D)
+    elif 'c' in known and 'd' in known and 'D' in known:
+        val = square(netw.vars['c'].value) + square(netw.vars['d'].value) - \
+              2*netw.vars['c'].value*netw.vars['d'].value*cos_deg(netw.vars['D'].value)
+        res['d1'] = safe_sqrt(val)
+    return res
+
+
+# Đường chéo d2 (BD)
+def diagonal_BD_calc(netw, known, unknown):
+    res = {}
+    # Tam giác BAD: d2^2 = a^2 + d^2 - 2ad*cos(A)
+    if 'a' in known and 'd' in known and 'A' in known:
+        val = square(netw.vars['a'].value) + square(netw.vars['d'].value) - \
+              2*netw.vars['a'].value*netw.vars['d'].value*cos_deg(netw.vars['A'].value)
+        res['d2'] = safe_sqrt(val)
+    # Tam giác BCD: d2^2 = b^2 + c^2 - 2bc*cos(C)
+    elif 'b' in known and 'c' in known and 'C' in known:
+        val = square(netw.vars['b'].value) + square(netw.vars['c'].value) - \
+              2*netw.vars['b'].value*netw.vars['c'].value*cos_deg(netw.vars['C'].value)
+        res['d2'] = safe_sqrt(val)
+    return res
+
+
+# Diện tích Bretschneider (tứ giác tổng quát)
+def bretschneider_area(netw, known, unknown):
+    if 'area' in unknown and all(netw.vars[k].is_known() for k in ['a', 'b', 'c', 'd', 'A', 'C']):
+        a, b = netw.vars['a'].value, netw.vars['b'].value
+        c, d = netw.vars['c'].value, netw.vars['d'].value
+        s = (a + b + c + d) / 2.0
+        A, C = netw.vars['A'].value, netw.vars['C'].value
+        term1 = (s-a)*(s-b)*(s-c)*(s-d)
+        term2 = a*b*c*d * (dmath.cos(get_rad((A+C)/2)))**2
+        if term1 - term2 >= 0:
+            return {'area': safe_sqrt(term1 - term2)}
+    return None
+
+
+# Diện tích tứ giác lồi khi biết chiều cao (h) và 2 đáy (a,c): S = (a+c)/2 * h
+def quad_area_height(netw, known, unknown):
+    if 'area' in unknown and 'a' in known and 'c' in known and 'h' in known:
+        a_val = netw.vars['a'].value
+        c_val = netw.vars['c'].value
+        h_val = netw.vars['h'].value
+        return {'area': 0.5 * (a_val + c_val) * h_val}
+    return None
+
+
+# Suy ra chiều cao từ diện tích và 2 đáy
+def quad_height_from_area(netw, known, unknown):
+    if 'h' in unknown and 'area' in known and 'a' in known and 'c' in known:
+        area_val = netw.vars['area'].value
+        a_val = netw.vars['a'].value
+        c_val = netw.vars['c'].value
+        if (a_val + c_val) != 0:
+            return {'h': 2.0 * area_val / (a_val + c_val)}
+    return None
+
+
+# Diagonal computation from sides using Bretschneider
+def quad_diagonal_from_sides(netw, known, unknown):
+    res = {}
+    # d1^2 = a^2 + b^2 - 2ab*cos(B)
+    if 'd1' in unknown and all(k in known for k in ['a', 'b', 'B']):
+        a, b = netw.vars['a'].value, netw.vars['b'].value
+        B = netw.vars['B'].value
+        val = square(a) + square(b) - 2*a*b*cos_deg(B)
+        if val >= 0:
+            res['d1'] = safe_sqrt(val)
+
+    # d2^2 = a^2 + d^2 - 2ad*cos(A)
+    if 'd2' in unknown and all(k in known for k in ['a', 'd', 'A']):
+        a, d = netw.vars['a'].value, netw.vars['d'].value
+        A = netw.vars['A'].value
+        val = square(a) + square(d) - 2*a*d*cos_deg(A)
+        if val >= 0:
+            res['d2'] = safe_sqrt(val)
+
+    return res or None
+
+
+# =============================================================================
+# HÌNH THANG
+# =============================================================================
+
+# Góc kề bù: A+D=180, B+C=180
+def trapezoid_angles(netw, known, unknown):
+    res = {}
+    if 'A' in known and 'D' not in known: res['D'] = 180.0 - netw.vars['A'].value
+    elif 'D' in known and 'A' not in known: res['A'] = 180.0 - netw.vars['D'].value
+    if 'B' in known and 'C' not in known: res['C'] = 180.0 - netw.vars['B'].value
+    elif 'C' in known and 'B' not in known: res['B'] = 180.0 - netw.vars['C'].value
+    return res
+
+
+# Diện tích hình thang: S = (a + c)/2 * h
+def trap_area_height(netw, known, unknown):
+    res = {}
+    if 'area' in unknown and 'a' in known and 'c' in known and 'h' in known:
+        res['area'] = (netw.vars['a'].value + netw.vars['c'].value) / 2.0 * netw.vars['h'].value
+    elif 'h' in unknown and 'area' in known and 'a' in known and 'c' in known:
+        sum_bases = netw.vars['a'].value + netw.vars['c'].value
+        if sum_bases > 0:
+            res['h'] = 2.0 * netw.vars['area'].value / sum_bases
+    return res if res else None
+
+
+# Chiều cao từ cạnh bên và góc: h = b * sin(B), h = d * sin(D)
+def trap_height_from_sides_angles(netw, known, unknown):
+    res = {}
+    if 'h' in unknown and 'b' in known and 'B' in known:
+        res['h'] = netw.vars['b'].value * sin_deg(netw.vars['B'].value)
+    if 'h' in unknown and 'd' in known and 'D' in known:
+        res['h'] = netw.vars['d'].value * sin_deg(netw.vars['D'].value)
+    return res if res else None
+
+
+# Độ dài cạnh bên khi biết chiều cao và góc: b = h / sin(B), d = h / sin(D)
+def trap_side_from_height_angle(netw, known, unknown):
+    res = {}
+    if 'b' in unknown and 'h' in known and 'B' in known and abs(sin_deg(netw.vars['B'].value)) > 1e-8:
+        res['b'] = netw.vars['h'].value / sin_deg(netw.vars['B'].value)
+    if 'd' in unknown and 'h' in known and 'D' in known and abs(sin_deg(netw.vars['D'].value)) > 1e-8:
+        res['d'] = netw.vars['h'].value / sin_deg(netw.vars['D'].value)
+    return res if res else None
+
+
+# Đường chéo: d1 = sqrt(a^2 + b^2 - 2ab*cos(B)), d2 = sqrt(c^2 + d^2 - 2cd*cos(D))
+def trap_diagonals(netw, known, unknown):
+    res = {}
+    if 'd1' in unknown and 'a' in known and 'b' in known and 'B' in known:
+        val = square(netw.vars['a'].value) + square(netw.vars['b'].value) - \
+              2*netw.vars['a'].value*netw.vars['b'].value*cos_deg(netw.vars['B'].value)
+        res['d1'] = safe_sqrt(val)
+    if 'd2' in unknown and 'c' in known and 'd' in known and 'D' in known:
+        val = square(netw.vars['c'].value) + square(netw.vars['d'].value) - \
+              2*netw.vars['c'].value*netw.vars['d'].value*cos_deg(netw.vars['D'].value)
+        res['d2'] = safe_sqrt(val)
+    return res if res else None
+
+
+# Công thức chiều cao hình thang thường từ 4 cạnh:
+# h = sqrt(b^2 - (( (c-a) + (a^2 - d^2)/(c-a) )/2 )^2 ) (chỉ khi a != c)
+def trap_height_from_sides(netw, known, unknown):
+    if 'h' in unknown and all(k in known for k in ['a', 'b', 'c', 'd']):
+        a, b, c, d = netw.vars['a'].value, netw.vars['b'].value, netw.vars['c'].value, netw.vars['d'].value
+        if abs(c-a) > 1e-8:
+            try:
+                expr = ((c-a) + (a**2 - d**2)/(c-a)) / 2.0
+                val = b**2 - expr**2
+                if val > 0:
+                    return {'h': dmath.sqrt(val)}
+            except ZeroDivisionError:
+                pass
+    return None
+
+
+# =============================================================================
+# HÌNH BÌNH HÀNH
+# =============================================================================
+
+# Cạnh đối, Góc đối
+def para_props(netw, known, unknown):
+    res = {}
+    # Đồng bộ cạnh
+    if 'a' in known and 'c' not in known: res['c'] = netw.vars['a'].value
+    if 'c' in known and 'a' not in known: res['a'] = netw.vars['c'].value
+    if 'b' in known and 'd' not in known: res['d'] = netw.vars['b'].value
+    if 'd' in known and 'b' not in known: res['b'] = netw.vars['d'].value
+    # Đồng bộ góc
+    if 'A' in known and 'C' not in known: res['C'] = netw.vars['A'].value
+    if 'B' in known and 'D' not in known: res['D'] = netw.vars['B'].value
+    # Góc kề bù
+    if 'A' in known and 'B' not in known: res['B'] = 180 - netw.vars['A'].value
+    if 'B' in known and 'A' not in known: res['A'] = 180 - netw.vars['B'].value
+    return res
+
+
+# Diện tích S = a*h (và ngược lại)
+def para_area_h_flex(netw, known, unknown):
+    if 'area' in known:
+        s = netw.vars['area'].value
+        if 'a' in known and 'h' not in known: return {'h': s / netw.vars['a'].value}
+        if 'h' in known and 'a' not in known: return {'a': s / netw.vars['h'].value}
+    else:
+        if 'a' in known and 'h' in known: return {'area': netw.vars['a'].value * netw.vars['h'].value}
+    return None
+
+
+# Diện tích S = a*b*sinA
+def para_area_sine(vals):
+    return vals['a'] * vals['b'] * sin_deg(vals['A'])
+
+
+# Tính cạnh từ CHU VI (P = 2(a+b))
+# Chỉ chạy khi biết P và 1 cạnh -> Ra cạnh kia. KHÔNG tự chia đôi P.
+def para_perimeter_flex(netw, known, unknown):
+    res = {}
+    if 'perimeter' in known:
+        p = netw.vars['perimeter'].value
+        # Biết a -> tính b
+        if 'a' in known and 'b' not in known:
+            b_val = p/2.0 - netw.vars['a'].value
+            if b_val > 0:
+                res['b'] = b_val; res['d'] = b_val
+        # Biết b -> tính a
+        elif 'b' in known and 'a' not in known:
+            a_val = p/2.0 - netw.vars['b'].value
+            if a_val > 0:
+                res['a'] = a_val; res['c'] = a_val
+    return res
+
+
+# Giải hệ: Biết P, Area, Góc A -> Tìm a, b
+def para_solve_system(netw, known, unknown):
+    if {'perimeter', 'area', 'A'}.issubset(known) and not (netw.vars['a'].is_known() and netw.vars['b'].is_known()):
+        p = netw.vars['perimeter'].value
+        s = netw.vars['area'].value
+        sinA = sin_deg(netw.vars['A'].value)
+        if sinA > 1e-9:
+            prod = s / sinA  # a*b
+            sum_val = p / 2.0  # a+b
+            delta = sum_val**2 - 4*prod
+            if delta >= 0:
+                a = (sum_val + dmath.sqrt(delta))/2
+                b = (sum_val - dmath.sqrt(delta))/2
+                return {'a': a, 'b': b, 'c': a, 'd': b}
+    return None
+
+
+# =============================================================================
+# HÌNH CHỮ NHẬT
+# =============================================================================
+
+# Góc vuông 90 độ (Cố định)
+def rect_90(netw, known, unknown):
+    return {k: 90.0 for k in ['A', 'B', 'C', 'D'] if k not in known}
+
+
+# Trong HCN, chiều cao ứng với đáy a chính là cạnh b.
+# Điều này giúp các công thức diện tích cũ (S = a*h) tự động hiểu là S = a*b.
+def rect_h_is_b(netw, known, unknown):
+    res = {}
+    if 'b' in known and 'h' not in known: res['h'] = netw.vars['b'].value
+    if 'h' in known and 'b' not in known: res['b'] = netw.vars['h'].value
+    return res
+
+
+# Đường chéo bằng nhau & Pytago (2 chiều)
+def rect_pytago_flex(netw, known, unknown):
+    res = {}
+    # Xuôi: a,b -> d1
+    if 'a' in known and 'b' in known and 'd1' not in known:
+        res['d1'] = safe_sqrt(square(netw.vars['a'].value) + square(netw.vars['b'].value))
+    # Ngược: d1, a -> b
+    elif 'd1' in known and 'a' in known and 'b' not in known:
+        val = square(netw.vars['d1'].value) - square(netw.vars['a'].value)
+        if val > 0: res['b'] = dmath.sqrt(val)
+    # Ngược: d1, b -> a
+    elif 'd1' in known and 'b' in known and 'a' not in known:
+        val = square(netw.vars['d1'].value) - square(netw.vars['b'].value)
+        if val > 0: res['a'] = dmath.sqrt(val)
+    return res
+
+
+# Đồng bộ d1 = d2
+def rect_diag_equal(netw, known, unknown):
+    if 'd1' in known:
+        return {'d2': netw.vars['d1'].value}
+    if 'd2' in known:
+        return {'d1': netw.vars['d2'].value}
+    return None
+
+
+# Ràng buộc Diện tích Đa năng (Unified Area Constraint)
+# Gom cả tính xuôi (S=ab) và tính ngược (a=S/b, b=S/a) vào một chỗ để đảm bảo luôn chạy.
+def rect_area_unified(netw, known, unknown):
+    res = {}
+    # Forward: a, b -> area
+    if 'a' in known and 'b' in known and 'area' not in known:
+        res['area'] = netw.vars['a'].value * netw.vars['b'].value
+
+    # Reverse: area -> side
+    elif 'area' in known:
+        s = netw.vars['area'].value
+        if s is not None and s > 0:
+            if 'a' in known and 'b' not in known:
+                a_val = netw.vars['a'].value
+                if a_val > 1e-9:
+                    res['b'] = s / a_val
+                    res['d'] = s / a_val  # b = d in rectangle
+            elif 'b' in known and 'a' not in known:
+                b_val = netw.vars['b'].value
+                if b_val > 1e-9:
+                    res['a'] = s / b_val
+                    res['c'] = s / b_val  # a = c in rectangle
+    return res or None
+
+
+# Giải hệ phương trình: Biết Chu vi (P) và Diện tích (S) -> Tìm a, b
+# Hệ: 2(a+b) = P  và  a*b = S
+# -> a, b là nghiệm của phương trình: X^2 - (P/2)X + S = 0
+def rect_solve_P_S(netw, known, unknown):
+    # Chỉ chạy khi biết P và S, nhưng chưa biết a và b
+    if 'perimeter' in known and 'area' in known and not (netw.vars['a'].is_known() or netw.vars['b'].is_known()):
+        p = netw.vars['perimeter'].value
+        s = netw.vars['area'].value
+
+        if p is not None and s is not None:
+            half_p = p / 2.0  # Tổng hai cạnh (a+b)
+            delta = half_p**2 - 4*s  # Delta = (a+b)^2 - 4ab = (a-b)^2
+
+            if delta >= -1e-9:  # Delta không âm
+                delta = max(0.0, delta)
+                sqrt_delta = dmath.sqrt(delta)
+
+                # Hai nghiệm
+                x1 = (half_p + sqrt_delta) / 2.0
+                x2 = (half_p - sqrt_delta) / 2.0
+
+                if x1 > 0 and x2 > 0:
+                    # Gán a là cạnh dài, b là cạnh ngắn (hoặc ngược lại, không quan trọng)
+                    return {'a': x1, 'b': x2, 'c': x1, 'd': x2}
+    return None
+
+
+# =============================================================================
+# HÌNH VUÔNG
+# =============================================================================
+
+# Tính cạnh từ CHU VI: a = P/4
+def square_side_from_perimeter(vals):
+    return vals['perimeter']/4.0 if vals.get('perimeter') else None
+
+
+# Tính cạnh từ DIỆN TÍCH: a = sqrt(S)
+def square_side_from_area(vals):
+    return safe_sqrt(vals['area']) if vals.get('area') is not None else None
+
+
+# Chéo a -> d
+def square_diagonal(vals):
+    return vals['a']*dmath.sqrt(2) if vals.get('a') else None
+
+
+# =============================================================================
+# HÌNH THOI
+# =============================================================================
+
+# Area from diagonals
+def rhombus_area_diags(vals):
+    return 0.5 * vals['d1'] * vals['d2'] if (vals.get('d1') is not None and vals.get('d2') is not None) else None
+
+
+# Relationship between sides and diagonals: (d1/2)^2 + (d2/2)^2 = a^2
+def rhombus_side_from_diags(netw, known, unknown):
+    # if both diagonals known, compute side
+    if 'd1' in known and 'd2' in known:
+        d1 = netw.vars['d1'].value
+        d2 = netw.vars['d2'].value
+        val = safe_sqrt((d1/2.0)**2 + (d2/2.0)**2)
+        if val is None:
+            return None
+        res = {}
+        for k in ('a', 'b', 'c', 'd'):
+            if k not in known:
+                res[k] = val
+        return res or None
+    return None
+
+
+# Perimeter -> side (forward)
+def rhombus_side_from_perimeter(vals):
+    return (vals['perimeter'] / 4.0) if (vals.get('perimeter') is not None) else None
+
+
+# =============================================================================
+# ĐA GIÁC n CẠNH (sinh tự động bởi polygon_kb)
+# =============================================================================
+
+# Tổng và các phần: total = sum(parts), tính xuôi (đủ các phần) hoặc ngược (thiếu đúng một phần, phải > 0)
+def polygon_sum(netw, known, unknown, total, parts):
+    vars_ = netw.vars
+    missing = [k for k in parts if vars_[k].value is None]
+    t = vars_[total].value
+    if t is None:
+        if missing:
+            return None
+        return {total: sum(vars_[k].value for k in parts)}
+    if len(missing) != 1:
+        return None
+    val = t - sum(vars_[k].value for k in parts if k != missing[0])
+    return {missing[0]: val} if val > 0 else None
+
+
+# Tổng góc trong = (n - 2) * 180: suy ra góc còn thiếu duy nhất
+def polygon_angle_sum(netw, known, unknown, angles, total):
+    vars_ = netw.vars
+    missing = [k for k in angles if vars_[k].value is None]
+    if len(missing) != 1:
+        return None
+    val = total - sum(vars_[k].value for k in angles if k != missing[0])
+    return {missing[0]: val} if 0 < val < 360 else None
+
+
+# Một tam giác của phép chia quạt: cạnh p, q, r đối diện góc P, Q, R
+# (tổng góc, SSS, SAS, định lý sin; SSA nhập nhằng thì bỏ qua)
+def fan_triangle(netw, known, unknown, p, q, r, P, Q, R):
+    sides, angles = (p, q, r), (P, Q, R)
+    v = {k: netw.vars[k].value for k in sides + angles}
+    res = {}
+    for _ in range(4):
+        ks = [s for s in sides if v[s] is not None]
+        ka = [g for g in angles if v[g] is not None]
+        missing = [s for s in sides if v[s] is None]
+        if len(ka) == 2:
+            third = next(g for g in angles if v[g] is None)
+            val = 180.0 - v[ka[0]] - v[ka[1]]
+            if val <= 0:
+                return None
+            v[third] = res[third] = val
+        elif len(ks) == 3 and len(ka) < 3:
+            for s, g in zip(sides, angles):
+                if v[g] is None:
+                    y, z = [t for t in sides if t != s]
+                    den = 2 * v[y] * v[z]
+                    if den == 0:
+                        return None
+                    cos_g = (square(v[y]) + square(v[z]) - square(v[s])) / den
+                    if abs(cos_g) > 1.0 + 1e-9:
+                        return None  # vi phạm bất đẳng thức tam giác
+                    v[g] = res[g] = dmath.degrees(dmath.acos(clamp(cos_g, -1.0, 1.0)))
+        elif len(ks) == 2 and v[angles[sides.index(missing[0])]] is not None:
+            s = missing[0]
+            y, z = ks
+            val = safe_sqrt(square(v[y]) + square(v[z]) - 2 * v[y] * v[z] * cos_deg(v[angles[sides.index(s)]]))
+            if not val:
+                return None
+            v[s] = res[s] = val
+        elif len(ka) == 3 and 0 < len(ks) < 3:
+            sin_known = sin_deg(v[angles[sides.index(ks[0])]])
+            if abs(sin_known) < 1e-12:
+                return None
+            ratio = v[ks[0]] / sin_known
+            for s, g in zip(sides, angles):
+                if v[s] is None:
+                    v[s] = res[s] = ratio * sin_deg(v[g])
+        else:
+            break
+    return res or None
+
+
+# Diện tích tam giác quạt: S = 1/2 * trái * phải * sin(góc xen giữa)
+def fan_area(vals, left, right, angle):
+    return 0.5 * vals[left] * vals[right] * sin_deg(vals[angle])
+
+
+# Khoảng cách hai đỉnh từ toạ độ
+def point_distance(vals, x1, y1, x2, y2):
+    return dmath.hypot(vals[x2] - vals[x1], vals[y2] - vals[y1])
+
+
+# Công thức dây giày (shoelace) khi biết toạ độ mọi đỉnh
+def shoelace_area(netw, known, unknown, xs, ys):
+    if 'area' not in unknown:
+        return None
+    vars_ = netw.vars
+    px = [vars_[k].value for k in xs]
+    py = [vars_[k].value for k in ys]
+    if any(v is None for v in px) or any(v is None for v in py):
+        return None
+    n = len(px)
+    twice = sum(px[i] * py[(i + 1) % n] - px[(i + 1) % n] * py[i] for i in range(n))
+    return {'area': 0.5 * abs(twice)}
+
+
+# Đa giác đều n cạnh: từ một trong cạnh / chu vi / trung đoạn / bán kính ngoại tiếp / diện tích
+def regular_polygon(netw, known, unknown, n):
+    vars_ = netw.vars
+    t = dmath.tan(dmath.pi / n)
+    s = dmath.sin(dmath.pi / n)
+    if vars_['side'].value is not None:
+        side = vars_['side'].value
+    elif vars_['perimeter'].value is not None:
+        side = vars_['perimeter'].value / n
+    elif vars_['apothem'].value is not None:
+        side = 2.0 * vars_['apothem'].value * t
+    elif vars_['R'].value is not None:
+        side = 2.0 * vars_['R'].value * s
+    elif vars_['area'].value is not None:
+        side = safe_sqrt(4.0 * vars_['area'].value * t / n)
+    else:
+        return None
+    if side is None or side <= 0:
+        return None
+    values = {'side': side, 'perimeter': n * side, 'apothem': side / (2.0 * t), 'R': side / (2.0 * s),
+              'area': n * square(side) / (4.0 * t), 'angle': (n - 2) * 180.0 / n}
+    return {k: v for k, v in values.items() if k in unknown}
@@ -0,0 +1,71 @@
+"""
+Solvability oracle: which variables a shape network can derive from a set of
+input names, without numeric solving.
+
+The derivation rules of each constraint come from kb_analysis.probe_constraint
+(known subset of its nodes -> derived variables, on the shape's reference
+figure). closure() replays the propagation symbolically: at every step each
+constraint looks up what it derives from the currently known part of its nodes,
+exactly as try_apply would, until nothing new is derived. Rules are built once
+per shape, closures are cached per (shape, input signature).
+
+Like the analysis it relies on, this is structural: it assumes the numeric
+inputs are consistent (a real solve may still reject them).
+"""
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+import geometry_kb as kb
+import kb_analysis
+
+Rules = List[Tuple[FrozenSet[str], Dict[FrozenSet[str], FrozenSet[str]]]]
+
+
+@lru_cache(maxsize=None)
+def derivation_rules(shape: str) -> Rules:
+    """Per constraint: (nodes, {known subset of nodes: derived variables})."""
+    net = kb.build_network(shape)
+    reference = kb_analysis.reference_values(shape)
+    rules: Rules = []
+    for cons in net.constraints:
+        caps = kb_analysis.probe_constraint(net, cons, reference)
+        rules.append((frozenset(cons.nodes), {known: frozenset(out) for known, out in caps.items()}))
+    return rules
+
+
+@lru_cache(maxsize=None)
+def shape_variables(shape: str) -> FrozenSet[str]:
+    return frozenset(name for name, _ in kb.resolve_spec(shape)['variables'])
+
+
+@lru_cache(maxsize=4096)
+def _closure(shape: str, signature: FrozenSet[str]) -> FrozenSet[str]:
+    rules = derivation_rules(shape)
+    known = set(signature)
+    changed = True
+    while changed:
+        changed = False
+        for nodes, caps in rules:
+            derived = caps.get(frozenset(known & nodes))
+            if derived and not derived <= known:
+                known |= derived
+                changed = True
+    return frozenset(known)
+
+
+def closure(shape: str, inputs: Iterable[str]) -> FrozenSet[str]:
+    """Variables of `shape` known after propagating the given input names."""
+    return _closure(shape, frozenset(inputs) & shape_variables(shape))
+
+
+def score(shape: str, inputs: Iterable[str], other: str) -> int:
+    """Same scoring as the GUI fallback: known + 2 * known variables that `other` lacks."""
+    known = closure(shape, inputs)
+    unique_known = known - shape_variables(other)
+    return len(known) + 2 * len(unique_known)
+
+
+def clear_cache():
+    _closure.cache_clear()
+    shape_variables.cache_clear()
+    derivation_rules.cache_clear()
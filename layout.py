@@ -0,0 +1,178 @@
+"""
+Drawing layout of a solved shape, independent of the plotting backend: vertex
+coordinates, label positions and view limits in data units. The renderers only
+turn a Scene into artists.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import vertices
+
+Point = Tuple[float, float]
+
+PLACEHOLDER = 'Nhập dữ liệu và nhấn "Tính toán"\nđể xem đồ thị'
+
+# Tên hình (tiếng Việt, từ phân loại) -> khóa hình dùng khi vẽ tứ giác
+QUAD_SHAPE_KEYS = {
+    "Hình vuông": "square",
+    "Hình chữ nhật": "rectangle",
+    "Hình thoi": "rhombus",
+    "Hình bình hành": "parallelogram",
+    "Hình thang": "trapezoid",
+    "Hình thang cân": "trapezoid",
+    "Tứ giác thường": "quadrilateral"
+}
+
+
+class Label:
+    """A text anchored at (x, y) in data units."""
+
+    def __init__(self, x: float, y: float, text: str, ha: str = 'center', va: str = 'center',
+                 fontsize: int = 10, bold: bool = False):
+        self.x = x
+        self.y = y
+        self.text = text
+        self.ha = ha
+        self.va = va
+        self.fontsize = fontsize
+        self.bold = bold
+
+    def __repr__(self):
+        return f"Label({self.text!r} at ({self.x:.3g}, {self.y:.3g}))"
+
+
+class Scene:
+    """
+    Everything one drawing shows: the outline polygon, the vertex markers, the
+    labels, the view limits and the title. A scene with `message` set has no
+    geometry and only shows the message in the middle of the view.
+    """
+
+    def __init__(self, polygon: Optional[List[Point]] = None, labels: Optional[List[Label]] = None,
+                 xlim: Optional[Point] = None, ylim: Optional[Point] = None,
+                 title: str = "", title_pad: float = 6.0, message: str = ""):
+        self.polygon = polygon
+        self.labels = labels or []
+        self.xlim = xlim
+        self.ylim = ylim
+        self.title = title
+        self.title_pad = title_pad
+        self.message = message
+
+    def __repr__(self):
+        if self.message:
+            return f"Scene(message={self.message!r})"
+        return f"Scene({self.title!r}, {len(self.polygon or [])} vertices, {len(self.labels)} labels)"
+
+
+def message_scene(message: str = PLACEHOLDER) -> Scene:
+    return Scene(message=message)
+
+
+def triangle_scene(a: Optional[float], b: Optional[float], c: Optional[float]) -> Scene:
+    """Triangle from its sides: A at the origin, B on the x axis, C from the law of cosines."""
+    points = vertices.triangle_vertices(a, b, c)
+    if points is None:
+        return message_scene('Không đủ dữ liệu để vẽ tam giác')
+    A_coord, B_coord, C_coord = points
+
+    mid_ab = ((A_coord[0] + B_coord[0])/2, (A_coord[1] + B_coord[1])/2)
+    mid_bc = ((B_coord[0] + C_coord[0])/2, (B_coord[1] + C_coord[1])/2)
+    mid_ca = ((C_coord[0] + A_coord[0])/2, (C_coord[1] + A_coord[1])/2)
+    labels = [
+        Label(A_coord[0], A_coord[1] - 0.1, 'A', va='top', fontsize=12, bold=True),
+        Label(B_coord[0], B_coord[1] - 0.1, 'B', va='top', fontsize=12, bold=True),
+        Label(C_coord[0], C_coord[1] + 0.1, 'C', va='bottom', fontsize=12, bold=True),
+        Label(mid_ab[0], mid_ab[1] - 0.15, f'c={c:.2f}', va='top'),
+        Label(mid_bc[0], mid_bc[1], f'a={a:.2f}'),
+        Label(mid_ca[0], mid_ca[1], f'b={b:.2f}'),
+    ]
+    return Scene([A_coord, B_coord, C_coord], labels,
+                 xlim=(-0.5, max(c, C_coord[0]) + 0.5), ylim=(-0.5, C_coord[1] + 0.5), title='Tam giác')
+
+
+def quad_coords(shape: str, a, b, c, d, A, B, C, D) -> Optional[Tuple[Point, Point, Point, Point]]:
+    """Vertex coordinates of a quadrilateral drawn as `shape` (see vertices.quad_vertices)"""
+    return vertices.quad_vertices(a, b, c, d, A, B, C, D, shape=shape)
+
+
+def quad_labels(coords, a, b, c, d) -> List[Label]:
+    """Vertex names and side lengths around a quadrilateral"""
+    A_coord, B_coord, C_coord, D_coord = coords
+    labels = []
+
+    # Vertices
+    for coord, label in zip(coords, ['A', 'B', 'C', 'D']):
+        offset_x = -0.15 if coord[0] < (a or 0)/2 else 0.15
+        offset_y = -0.15 if coord[1] < (b or d or 0)/2 else 0.15
+        labels.append(Label(coord[0] + offset_x, coord[1] + offset_y, label, fontsize=12, bold=True))
+
+    # Sides
+    if a is not None:
+        mid_ab = ((A_coord[0] + B_coord[0])/2, (A_coord[1] + B_coord[1])/2)
+        labels.append(Label(mid_ab[0], mid_ab[1] - 0.2, f'a={a:.2f}', va='top'))
+    if b is not None:
+        mid_bc = ((B_coord[0] + C_coord[0])/2, (B_coord[1] + C_coord[1])/2)
+        labels.append(Label(mid_bc[0] + 0.1, mid_bc[1], f'b={b:.2f}', ha='left'))
+    if c is not None:
+        mid_cd = ((C_coord[0] + D_coord[0])/2, (C_coord[1] + D_coord[1])/2)
+        labels.append(Label(mid_cd[0], mid_cd[1] + 0.1, f'c={c:.2f}', va='bottom'))
+    if d is not None:
+        mid_da = ((D_coord[0] + A_coord[0])/2, (D_coord[1] + A_coord[1])/2)
+        labels.append(Label(mid_da[0] - 0.1, mid_da[1], f'd={d:.2f}', ha='right'))
+    return labels
+
+
+def quad_scene(shape: str, a, b, c, d, A, B, C, D) -> Scene:
+    """Quadrilateral drawn as `shape` (one of the QUAD_SHAPE_KEYS values or a GUI mode)"""
+    coords = quad_coords(shape, a, b, c, d, A, B, C, D)
+    if coords is None:
+        return message_scene('Không đủ dữ liệu để vẽ tứ giác\n(Cần đủ 4 cạnh, hoặc 3 cạnh và 2 góc kề cạnh a)')
+    all_x = [p[0] for p in coords]
+    all_y = [p[1] for p in coords]
+    margin = 1.0
+    return Scene(list(coords), quad_labels(coords, a, b, c, d),
+                 xlim=(min(all_x) - margin, max(all_x) + margin), ylim=(min(all_y) - margin, max(all_y) + margin),
+                 title='Tứ giác', title_pad=20)
+
+
+def drawing_shape(shape_name: Optional[str], default_shape: str = "quadrilateral") -> str:
+    """
+    Drawing key of a quadrilateral: from its class name, except that a plain
+    "Tứ giác thường" (nothing recognised, e.g. no angles yet) keeps the chosen
+    mode, so a trapezoid given by its sides is still drawn as one.
+    """
+    shape = QUAD_SHAPE_KEYS.get(shape_name, default_shape) if shape_name else default_shape
+    return default_shape if shape == "quadrilateral" else shape
+
+
+def result_scene(res: Dict[str, Optional[float]], is_triangle: bool, shape_name: Optional[str] = None,
+                 default_shape: str = "quadrilateral") -> Scene:
+    """Scene of a solved figure, as the GUI draws it (`shape_name` from classify_shape)"""
+    if is_triangle:
+        return triangle_scene(res.get('a'), res.get('b'), res.get('c'))
+    return quad_scene(drawing_shape(shape_name, default_shape),
+                      *(res.get(n) for n in ('a', 'b', 'c', 'd', 'A', 'B', 'C', 'D')))
+
+
+class Viewport:
+    """
+    Fit of a scene's limits into a width x height pixel area, 1:1 aspect like
+    matplotlib's 'equal', with `margin` pixels around and `title_height` more on
+    top. Pixel y grows downwards.
+    """
+
+    def __init__(self, scene: Scene, width: float, height: float, margin: float = 30, title_height: float = 40):
+        (self.x0, x1), (self.y0, y1) = scene.xlim, scene.ylim
+        top = margin + title_height
+        self.scale = min((width - 2 * margin) / max(x1 - self.x0, 1e-9),
+                         (height - top - margin) / max(y1 - self.y0, 1e-9))
+        self.left = (width - (x1 - self.x0) * self.scale) / 2
+        self.bottom = top + (height - top - margin + (y1 - self.y0) * self.scale) / 2
+        self.frame_top = self.bottom - (y1 - self.y0) * self.scale
+
+    def to_px(self, x: float, y: float) -> Point:
+        return self.left + (x - self.x0) * self.scale, self.bottom - (y - self.y0) * self.scale
+
+    def title_y(self, scene: Scene) -> float:
+        """Baseline of the title: title_pad points above the frame"""
+        return self.frame_top - scene.title_pad * 4 / 3
@@ -0,0 +1,162 @@
+"""
+Generated constraint networks for n-sided polygons, any n >= 3.
+
+polygon_spec(n) describes a convex polygon V1..Vn in the same entry format
+as geometry_kb.KB_SPEC (formulas of kb_formulas, by name):
+- sides s1..sn (s_i = V_i V_(i+1)), interior angles A1..An (degrees),
+  perimeter, area and optional vertex coordinates x1, y1 .. xn, yn;
+- angle sum A1 + .. + An = (n - 2) * 180 and perimeter = s1 + .. + sn;
+- fan triangulation from V1: triangle T_k = V1 V_k V_(k+1), k = 2..n-1, with
+  diagonals d_k = V1 V_k (d_2 = s1, d_n = sn), its angles al_k (at V1),
+  be_k (at V_k), ga_k (at V_(k+1)) and area t_k; the interior angles are
+  split as A1 = sum(al_k), A2 = be_2, A_k = ga_(k-1) + be_k, An = ga_(n-1),
+  and area = sum(t_k);
+- from coordinates: every side and diagonal (distance) and the shoelace area.
+regular_polygon_spec(n) is the regular n-gon: side, perimeter, apothem,
+circumradius R, area and interior angle, all from any one of the first five
+with closed forms.
+
+Variable and constraint counts grow linearly with n. Compiled constraints are
+cached per (kind, n) like geometry_kb caches them per shape.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+
+from engine import ConstraintNetwork, Constraint
+from geometry_kb import compile_constraint
+
+_specs: Dict[Tuple[str, int], Dict[str, Any]] = {}
+_compiled_constraints: Dict[Tuple[str, int], List[Constraint]] = {}
+
+
+def side(i: int) -> str:
+    return f"s{i}"
+
+
+def angle(i: int) -> str:
+    return f"A{i}"
+
+
+def diagonal(k: int, n: int) -> str:
+    """Name of V1 V_k: the sides s1 and sn for k = 2 and k = n, d_k otherwise."""
+    if k == 2:
+        return side(1)
+    if k == n:
+        return side(n)
+    return f"d{k}"
+
+
+def _check_n(n: int):
+    if not isinstance(n, int) or n < 3:
+        raise ValueError(f"Đa giác cần ít nhất 3 cạnh (n = {n!r})")
+
+
+def polygon_spec(n: int) -> Dict[str, Any]:
+    """Resolved spec (name, chain, variables, constraints) of a convex n-gon."""
+    _check_n(n)
+    sides = [side(i) for i in range(1, n + 1)]
+    angles = [angle(i) for i in range(1, n + 1)]
+    xs = [f"x{i}" for i in range(1, n + 1)]
+    ys = [f"y{i}" for i in range(1, n + 1)]
+    fan = range(2, n)  # tam giác T_k = V1 V_k V_(k+1)
+
+    variables = [(side(i), f"Cạnh s{i} = V{i}V{i % n + 1}") for i in range(1, n + 1)]
+    variables += [(angle(i), f"Góc trong tại V{i} (°)") for i in range(1, n + 1)]
+    variables += [('perimeter', "Chu vi"), ('area', "Diện tích")]
+    variables += [(f"d{k}", f"Đường chéo V1V{k}") for k in range(3, n)]
+    for k in fan:
+        variables += [(f"al{k}", f"Góc tại V1 của tam giác V1V{k}V{k + 1} (°)"),
+                      (f"be{k}", f"Góc tại V{k} của tam giác V1V{k}V{k + 1} (°)"),
+                      (f"ga{k}", f"Góc tại V{k + 1} của tam giác V1V{k}V{k + 1} (°)"),
+                      (f"t{k}", f"Diện tích tam giác V1V{k}V{k + 1}")]
+    for i in range(1, n + 1):
+        variables += [(f"x{i}", f"Hoành độ V{i}"), (f"y{i}", f"Tung độ V{i}")]
+
+    constraints = [
+        {'name': 'angle_sum', 'nodes': angles, 'flex': 'polygon_angle_sum', 'args': [angles, (n - 2) * 180.0],
+         'description': f"Tổng góc trong = {(n - 2) * 180}°"},
+        {'name': 'perimeter', 'nodes': ['perimeter'] + sides, 'flex': 'polygon_sum', 'args': ['perimeter', sides],
+         'description': "Chu vi = tổng các cạnh"},
+        {'name': 'area_fan', 'nodes': ['area'] + [f"t{k}" for k in fan], 'flex': 'polygon_sum',
+         'args': ['area', [f"t{k}" for k in fan]], 'description': "Diện tích = tổng diện tích các tam giác quạt"},
+        {'name': 'angle_split_1', 'nodes': [angle(1)] + [f"al{k}" for k in fan], 'flex': 'polygon_sum',
+         'args': [angle(1), [f"al{k}" for k in fan]], 'description': "A1 = tổng các góc quạt tại V1"},
+        {'name': 'angle_split_2', 'nodes': [angle(2), 'be2'], 'flex': 'polygon_sum', 'args': [angle(2), ['be2']]},
+        {'name': f'angle_split_{n}', 'nodes': [angle(n), f"ga{n - 1}"], 'flex': 'polygon_sum',
+         'args': [angle(n), [f"ga{n - 1}"]]},
+    ]
+    for k in range(3, n):
+        parts = [f"ga{k - 1}", f"be{k}"]
+        constraints.append({'name': f'angle_split_{k}', 'nodes': [angle(k)] + parts, 'flex': 'polygon_sum',
+                            'args': [angle(k), parts]})
+    for k in fan:
+        left, right = diagonal(k, n), diagonal(k + 1, n)
+        # cạnh đối diện V1 là s_k, đối diện V_k là V1V_(k+1), đối diện V_(k+1) là V1V_k
+        tri = [side(k), right, left, f"al{k}", f"be{k}", f"ga{k}"]
+        constraints.append({'name': f'fan_{k}', 'nodes': tri, 'flex': 'fan_triangle', 'args': tri,
+                            'description': f"Giải tam giác V1V{k}V{k + 1}"})
+        constraints.append({'name': f'fan_area_{k}', 'nodes': [left, right, f"al{k}", f"t{k}"],
+                            'forward': 'fan_area', 'args': [left, right, f"al{k}"],
+                            'dependencies': [left, right, f"al{k}"], 'target': f"t{k}"})
+    # Từ toạ độ: các cạnh, các đường chéo từ V1 và diện tích
+    for i in range(1, n + 1):
+        j = i % n + 1
+        coords = [f"x{i}", f"y{i}", f"x{j}", f"y{j}"]
+        constraints.append({'name': f'side_from_coords_{i}', 'nodes': coords + [side(i)],
+                            'forward': 'point_distance', 'args': coords,
+                            'dependencies': coords, 'target': side(i)})
+    for k in range(3, n):
+        coords = ['x1', 'y1', f"x{k}", f"y{k}"]
+        constraints.append({'name': f'diagonal_from_coords_{k}', 'nodes': coords + [f"d{k}"],
+                            'forward': 'point_distance', 'args': coords,
+                            'dependencies': coords, 'target': f"d{k}"})
+    constraints.append({'name': 'shoelace', 'nodes': xs + ys + ['area'], 'flex': 'shoelace_area',
+                        'args': [xs, ys], 'description': "Diện tích theo công thức dây giày"})
+    return {'name': f'polygon_{n}', 'chain': ['polygon'], 'variables': variables, 'constraints': constraints}
+
+
+def regular_polygon_spec(n: int) -> Dict[str, Any]:
+    """Resolved spec of the regular n-gon (closed forms, constant size in n)."""
+    _check_n(n)
+    names = ['side', 'perimeter', 'apothem', 'R', 'area', 'angle']
+    variables = [('side', "Cạnh"), ('perimeter', "Chu vi"), ('apothem', "Trung đoạn (bán kính nội tiếp)"),
+                 ('R', "Bán kính ngoại tiếp"), ('area', "Diện tích"), ('angle', "Góc trong (°)")]
+    constraints = [{'name': 'regular_polygon', 'nodes': names, 'flex': 'regular_polygon', 'args': [n],
+                    'description': f"Đa giác đều {n} cạnh: các công thức đóng"}]
+    return {'name': f'regular_polygon_{n}', 'chain': ['regular_polygon'], 'variables': variables,
+            'constraints': constraints}
+
+
+_SPEC_FACTORIES = {'polygon': polygon_spec, 'regular_polygon': regular_polygon_spec}
+
+
+def _compile(kind: str, n: int, network_cls: Callable[..., Any], **kwargs) -> Any:
+    key = (kind, n)
+    spec = _specs.get(key)
+    if spec is None:
+        spec = _specs[key] = _SPEC_FACTORIES[kind](n)
+    constraints = _compiled_constraints.get(key)
+    if constraints is None:
+        constraints = _compiled_constraints[key] = [compile_constraint(e) for e in spec['constraints']]
+    net = network_cls(**kwargs)
+    net.network_type = spec['name']
+    for name, description in spec['variables']:
+        net.add_variable(name, description)
+    for cons in constraints:
+        net.add_constraint(cons)
+    return net
+
+
+def build_polygon_network(n: int, network_cls: Callable[..., Any] = ConstraintNetwork, **kwargs) -> Any:
+    return _compile('polygon', n, network_cls, **kwargs)
+
+
+def build_regular_polygon_network(n: int, network_cls: Callable[..., Any] = ConstraintNetwork, **kwargs) -> Any:
+    return _compile('regular_polygon', n, network_cls, **kwargs)
+
+
+def build_named_network(name: str, network_cls: Callable[..., Any] = ConstraintNetwork, **kwargs) -> Any:
+    """Network from its spec name, 'polygon_<n>' or 'regular_polygon_<n>' (network_type of the built networks)."""
+    kind, _, n = name.rpartition('_')
+    if kind not in _SPEC_FACTORIES or not n.isdigit():
+        raise ValueError(f"Loại mạng không xác định: '{name}'")
+    return _compile(kind, int(n), network_cls, **kwargs)
@@ -0,0 +1,215 @@
+"""
+Vectorized feasibility prefilter: cheap necessary conditions checked on whole
+input arrays before any network is built, so that rows no solve can complete
+are rejected (or flagged) up front with a reason code instead of coming back
+incomplete after a full solve.
+
+Checks, per shape family (geometry_kb chain root), on the known values only:
+- non_positive: a length, perimeter, area or radius <= 0;
+- angle_range: an angle outside the range the engine accepts: (0°, 180°),
+  except the quadrilateral angle D in (0°, 360°) (a reflex angle at D);
+- angle_sum: known angles reaching the triangle (180°) or quadrilateral
+  (360°) sum before the last one, or a full set that does not add up;
+- triangle_inequality: three known sides (or a quadrilateral side against the
+  other three, or a side pair with its diagonal) that cannot close; for a
+  triangle this is exactly the negative Heron expression of area_flex;
+- perimeter: perimeter (or 2 s) incompatible with the known sides, i.e. the
+  side perimeter_reverse would compute is not positive or breaks the
+  triangle inequality.
+Bounds and tolerances are the solver's own (the angle ranges of Var.set,
+angle sum 1e-2°, perimeter 1e-4), so a row the solver accepts is never
+rejected here.
+
+Input is a NumPy structured array such as the ones `python -m batch` reads,
+or a mapping of name -> 1-D array (NaN = unknown), with one shape name for
+every row or an integer code per row (index into SHAPES = batch.SHAPE_CODES).
+
+Usage:
+    python -m prefilter problems.npy [--shape triangle]
+"""
+import argparse
+import sys
+from typing import Dict, Union
+
+import numpy as np
+
+import geometry_kb as kb
+
+SHAPES = tuple(kb.NETWORK_FACTORIES)  # cùng thứ tự với batch.SHAPE_CODES
+
+# Mã lý do (int8), 0 = không phát hiện vấn đề
+FEASIBLE, NON_POSITIVE, ANGLE_RANGE, ANGLE_SUM, TRIANGLE_INEQUALITY, PERIMETER = range(6)
+REASON_NAMES = ('feasible', 'non_positive', 'angle_range', 'angle_sum', 'triangle_inequality', 'perimeter')
+REASON_MESSAGES = (
+    "",
+    "Có độ dài, chu vi hoặc diện tích không dương",
+    "Có góc nằm ngoài khoảng cho phép (0°, 180°; góc D của tứ giác: 0°, 360°)",
+    "Tổng các góc đã biết không hợp lệ",
+    "Các cạnh không thoả bất đẳng thức tam giác",
+    "Chu vi không phù hợp với các cạnh đã biết",
+)
+
+# Góc của từng họ hình; biến không thuộc họ (d, D của tam giác) bị bỏ qua
+FAMILY_ANGLES = {'triangle': ('A', 'B', 'C'), 'quadrilateral': ('A', 'B', 'C', 'D')}
+UNUSED = {'triangle': ('d', 'D'), 'quadrilateral': ()}
+# Cận trên của từng góc, như Var.set: A, B, C < 180°, góc D của tứ giác < 360°
+ANGLE_LIMITS = {'A': 180.0, 'B': 180.0, 'C': 180.0, 'D': 360.0}
+ANGLE_SUM_TOL = 1e-2   # như triangle_angle_from_sum
+PERIMETER_TOL = 1e-4   # như kiểm tra chu vi của ConstraintNetwork.set_input
+EPS = 1e-9
+
+
+def _column(data, name: str, length: int) -> np.ndarray:
+    names = data.dtype.names if hasattr(data, 'dtype') else data
+    if name in names:
+        return np.asarray(data[name], dtype=np.float64)
+    return np.full(length, np.nan)
+
+
+def _length(data) -> int:
+    if hasattr(data, 'dtype'):
+        return len(data)
+    return len(next(iter(data.values()))) if data else 0
+
+
+def family(shape: str) -> str:
+    """Root of the shape's inheritance chain: 'triangle' or 'quadrilateral'."""
+    return kb.resolve_spec(shape)['chain'][0]
+
+
+def _family_variables(base: str):
+    return [n for n, _ in kb.resolve_spec(base)['variables'] if n not in UNUSED[base]]
+
+
+def _common(cols: Dict[str, np.ndarray], base: str, full_sum: float):
+    """Reason codes shared by both families: non_positive, angle_range, angle_sum."""
+    angle_names = FAMILY_ANGLES[base]
+    lengths = np.stack([cols[n] for n in _family_variables(base) if n not in angle_names])
+    angles = np.stack([cols[n] for n in angle_names])
+    limits = np.array([ANGLE_LIMITS[n] for n in angle_names])[:, None]
+    known = ~np.isnan(angles)
+    count = known.sum(axis=0)
+    total = np.nansum(angles, axis=0)
+    n_angles = len(angles)
+    with np.errstate(invalid='ignore'):
+        non_positive = (lengths <= 0).any(axis=0)
+        angle_range = ((angles <= 0) | (angles >= limits)).any(axis=0)
+    # Thiếu một góc: góc còn lại phải dương; đủ góc: tổng phải đúng
+    angle_sum = (((count == n_angles - 1) & (total >= full_sum - EPS))
+                 | ((count == n_angles) & (np.abs(total - full_sum) > ANGLE_SUM_TOL)))
+    return non_positive, angle_range, angle_sum
+
+
+def _cannot_close(*sides: np.ndarray) -> np.ndarray:
+    """All sides known and the longest one >= the sum of the others (NaN rows: False)."""
+    stack = np.stack(sides)
+    longest = stack.max(axis=0)
+    total = stack.sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        return 2 * longest >= total * (1 - EPS)
+
+
+def _perimeter(cols: Dict[str, np.ndarray], sides: np.ndarray) -> np.ndarray:
+    """Perimeter (or 2 s) incompatible with the known sides, polygon with len(sides) sides."""
+    p = np.where(np.isnan(cols['perimeter']), 2 * cols['s'], cols['perimeter'])
+    count = (~np.isnan(sides)).sum(axis=0)
+    known_sum = np.nansum(sides, axis=0)
+    longest = np.fmax.reduce(sides, axis=0)
+    n = len(sides)
+    with np.errstate(invalid='ignore'):
+        bad = ((count == n) & (np.abs(known_sum - p) > PERIMETER_TOL)) \
+            | ((count < n) & (count > 0) & (known_sum >= p - PERIMETER_TOL)) \
+            | (2 * longest >= p * (1 - EPS))  # cạnh dài nhất < nửa chu vi
+        if n == 3:
+            # Thiếu đúng một cạnh: cạnh tính ngược p - x - y phải nhỏ hơn x + y
+            bad |= (count == 2) & (p >= 2 * known_sum * (1 + EPS))
+    return bad
+
+
+def _triangle_reasons(cols: Dict[str, np.ndarray]):
+    non_positive, angle_range, angle_sum = _common(cols, 'triangle', 180.0)
+    sides = np.stack([cols[s] for s in ('a', 'b', 'c')])
+    return non_positive, angle_range, angle_sum, _cannot_close(*sides), _perimeter(cols, sides)
+
+
+def _quad_reasons(cols: Dict[str, np.ndarray]):
+    non_positive, angle_range, angle_sum = _common(cols, 'quadrilateral', 360.0)
+    a, b, c, d, d1, d2 = (cols[s] for s in ('a', 'b', 'c', 'd', 'd1', 'd2'))
+    # Tứ giác và bốn tam giác ABC, ACD (chéo d1 = AC), ABD, BCD (chéo d2 = BD)
+    inequality = (_cannot_close(a, b, c, d) | _cannot_close(a, b, d1) | _cannot_close(c, d, d1)
+                  | _cannot_close(a, d, d2) | _cannot_close(b, c, d2))
+    return non_positive, angle_range, angle_sum, inequality, _perimeter(cols, np.stack([a, b, c, d]))
+
+
+_CHECKS = {'triangle': _triangle_reasons, 'quadrilateral': _quad_reasons}
+
+
+def _check_family(data, base: str, rows: np.ndarray, n: int) -> np.ndarray:
+    cols = {name: _column(data, name, n)[rows] for name in _family_variables(base)}
+    if 's' not in cols:
+        cols['s'] = np.full(len(rows), np.nan)
+    failed = _CHECKS[base](cols)
+    # Lý do đầu tiên theo thứ tự mã
+    return np.select(failed, range(1, len(failed) + 1), FEASIBLE).astype(np.int8)
+
+
+def check_array(data, shape: Union[str, np.ndarray]) -> np.ndarray:
+    """
+    Reason code (int8, index into REASON_NAMES) of every row of `data`.
+    `shape` is one shape name for all rows or an integer array of codes into
+    SHAPES; rows with an unknown code are left FEASIBLE (the solver reports them).
+    """
+    n = _length(data)
+    reasons = np.zeros(n, dtype=np.int8)
+    if isinstance(shape, str):
+        groups = {family(shape): np.arange(n)}
+    else:
+        codes = np.asarray(shape)
+        groups = {}
+        for code in np.unique(codes).tolist():
+            if 0 <= code < len(SHAPES):
+                base = family(SHAPES[code])
+                rows = np.flatnonzero(codes == code)
+                groups[base] = np.concatenate([groups[base], rows]) if base in groups else rows
+    for base, rows in groups.items():
+        if len(rows):
+            reasons[rows] = _check_family(data, base, rows, n)
+    return reasons
+
+
+def check_inputs(shape: str, inputs: Dict[str, float]) -> int:
+    """Reason code of one problem given as a dict of known values."""
+    data = {name: np.array([value], dtype=np.float64) for name, value in inputs.items()}
+    return int(check_array(data, shape)[0]) if data else FEASIBLE
+
+
+def summarize(reasons: np.ndarray) -> Dict[str, int]:
+    """Row count per reason name, reasons without rows left out."""
+    counts = np.bincount(reasons.astype(np.int64), minlength=len(REASON_NAMES))
+    return {name: int(k) for name, k in zip(REASON_NAMES, counts) if k}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m prefilter',
+                                     description="Kiểm tra nhanh tính khả thi của từng dòng trong một mảng .npy")
+    parser.add_argument('input', help="mảng có cấu trúc .npy (NaN = chưa biết), cột 'shape' tuỳ chọn")
+    parser.add_argument('--shape', choices=sorted(SHAPES), help="loại hình khi mảng không có cột 'shape'")
+    parser.add_argument('-o', '--output', help="tệp .npy nhận mã lý do của từng dòng")
+    args = parser.parse_args(argv)
+    data = np.load(args.input, mmap_mode='r')
+    if 'shape' in data.dtype.names:
+        shape = data['shape']
+    elif args.shape:
+        shape = args.shape
+    else:
+        parser.error("Mảng không có cột 'shape': cần --shape")
+    reasons = check_array(data, shape)
+    if args.output:
+        np.save(args.output, reasons)
+    for name, count in summarize(reasons).items():
+        print(f"{name}\t{count}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Matplotlib renderer for layout.Scene with persistent artists.
+
+The outline, the vertex markers, the labels, the title and the message are
+created once and only get their data updated (set_xy, set_data, set_position,
+set_text). They are all animated, so the figure itself only holds the empty
+background: after the first full draw it is cached and every later render
+restores it, draws the artists and blits (no full canvas redraw). Canvases
+without blitting fall back to draw_idle().
+"""
+from typing import List, Optional
+
+from matplotlib import transforms
+from matplotlib.patches import Polygon
+from matplotlib.text import Text
+
+from layout import Scene
+
+
+class ShapeRenderer:
+    def __init__(self, ax, canvas):
+        self.ax = ax
+        self.canvas = canvas
+        ax.set_aspect('equal')
+        ax.axis('off')
+        self.polygon = Polygon([(0, 0)], closed=True, fill=False, edgecolor='blue', linewidth=2,
+                               animated=True, visible=False)
+        ax.add_patch(self.polygon)
+        self.markers, = ax.plot([], [], 'ro', markersize=8, animated=True)
+        self.labels: List[Text] = []
+        self.message = ax.text(0.5, 0.5, '', ha='center', va='center', fontsize=12,
+                               transform=ax.transAxes, animated=True)
+        # Tiêu đề tự quản lý (ax.title chỉ được đặt lại vị trí khi vẽ toàn bộ hình)
+        self.title = ax.text(0.5, 1.0, '', ha='center', va='baseline', fontsize=14, fontweight='bold',
+                             animated=True)
+        self._title_pad: Optional[float] = None
+        self._background = None
+        self.scene: Optional[Scene] = None
+        self._cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _label(self, i: int) -> Text:
+        while len(self.labels) <= i:
+            self.labels.append(self.ax.text(0, 0, '', animated=True, visible=False))
+        return self.labels[i]
+
+    def artists(self) -> List:
+        return [self.polygon, self.markers, *self.labels, self.message, self.title]
+
+    def render(self, scene: Scene):
+        """Show `scene`, reusing the existing artists."""
+        self.scene = scene
+        has_shape = not scene.message and scene.polygon is not None
+        self.message.set_text(scene.message)
+        self.message.set_visible(bool(scene.message))
+        self.polygon.set_visible(has_shape)
+        self.markers.set_visible(has_shape)
+        if has_shape:
+            self.polygon.set_xy(scene.polygon)
+            self.markers.set_data([p[0] for p in scene.polygon], [p[1] for p in scene.polygon])
+        labels = scene.labels if has_shape else []
+        for i, label in enumerate(labels):
+            text = self._label(i)
+            text.set_position((label.x, label.y))
+            text.set_text(label.text)
+            text.set_horizontalalignment(label.ha)
+            text.set_verticalalignment(label.va)
+            text.set_fontsize(label.fontsize)
+            text.set_fontweight('bold' if label.bold else 'normal')
+            text.set_visible(True)
+        for text in self.labels[len(labels):]:
+            text.set_visible(False)
+
+        if has_shape:
+            self.ax.set_xlim(*scene.xlim)
+            self.ax.set_ylim(*scene.ylim)
+        self.title.set_text(scene.title if has_shape else '')
+        if scene.title_pad != self._title_pad:
+            self._title_pad = scene.title_pad
+            self.title.set_transform(self.ax.transAxes + transforms.ScaledTranslation(
+                0, scene.title_pad / 72, self.ax.figure.dpi_scale_trans))
+        self.update()
+
+    def update(self):
+        """Blit the artists over the cached background (full draw until there is one)."""
+        if self._background is None or not self.canvas.supports_blit:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        self.canvas.blit(self.ax.figure.bbox)
+
+    def _draw_artists(self):
+        # Giới hạn trục mới đổi kích thước khung (aspect 'equal') trước khi vẽ
+        self.ax.apply_aspect()
+        for artist in self.artists():
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def _on_draw(self, event):
+        """Full draws (first show, resize) refresh the background, then add the artists."""
+        if event is not None and event.canvas is not self.canvas:
+            return
+        self._background = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        self._draw_artists()
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._cid)
@@ -0,0 +1,92 @@
+"""
+Native Tk Canvas renderer for layout.Scene: the same triangle/quadrilateral
+figures as render_mpl, without loading matplotlib. Canvas items are created
+once and moved/retexted on every render; the scene is re-fitted when the
+canvas is resized.
+"""
+import tkinter as tk
+from typing import List, Optional, Tuple
+
+from layout import Scene, Viewport
+
+# Khoảng trống quanh hình (px) và phần dành cho tiêu đề
+MARGIN = 30
+TITLE_HEIGHT = 40
+MARKER_RADIUS = 5
+FONT_FAMILY = "Helvetica"
+
+# (ha, va) kiểu matplotlib -> anchor của Tk
+_H_ANCHOR = {'left': 'w', 'center': '', 'right': 'e'}
+_V_ANCHOR = {'top': 'n', 'center': '', 'bottom': 's', 'baseline': 's'}
+
+
+def tk_anchor(ha: str, va: str) -> str:
+    return (_V_ANCHOR.get(va, '') + _H_ANCHOR.get(ha, '')) or 'center'
+
+
+class TkShapeRenderer:
+    def __init__(self, canvas: tk.Canvas):
+        self.canvas = canvas
+        self.polygon = canvas.create_polygon(0, 0, 0, 0, 0, 0, outline='blue', fill='', width=2, state='hidden')
+        self.markers: List[int] = []
+        self.labels: List[int] = []
+        self.title = canvas.create_text(0, 0, text='', anchor='s', font=(FONT_FAMILY, 14, 'bold'))
+        self.message = canvas.create_text(0, 0, text='', anchor='center', justify='center', font=(FONT_FAMILY, 12))
+        self.scene: Optional[Scene] = None
+        canvas.bind('<Configure>', self._on_resize, add='+')
+
+    def _pool(self, items: List[int], n: int, create) -> List[int]:
+        while len(items) < n:
+            items.append(create())
+        for item in items[n:]:
+            self.canvas.itemconfigure(item, state='hidden')
+        return items[:n]
+
+    def _size(self) -> Tuple[int, int]:
+        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if w <= 1 or h <= 1:  # chưa hiển thị: dùng kích thước yêu cầu
+            w, h = int(self.canvas.cget('width')), int(self.canvas.cget('height'))
+        return w, h
+
+    def render(self, scene: Scene):
+        """Show `scene`, reusing the existing canvas items."""
+        self.scene = scene
+        canvas = self.canvas
+        w, h = self._size()
+        has_shape = not scene.message and scene.polygon is not None
+        canvas.itemconfigure(self.message, text=scene.message, state='normal' if scene.message else 'hidden')
+        canvas.coords(self.message, w / 2, h / 2)
+        if not has_shape:
+            canvas.itemconfigure(self.polygon, state='hidden')
+            canvas.itemconfigure(self.title, state='hidden')
+            self._pool(self.markers, 0, None)
+            self._pool(self.labels, 0, None)
+            return
+
+        # Khớp giới hạn dữ liệu vào vùng vẽ, giữ tỉ lệ 1:1 như aspect 'equal'
+        view = Viewport(scene, w, h, MARGIN, TITLE_HEIGHT)
+        to_px = view.to_px
+        points = [to_px(x, y) for x, y in scene.polygon]
+        canvas.coords(self.polygon, *[v for p in points for v in p])
+        canvas.itemconfigure(self.polygon, state='normal')
+
+        markers = self._pool(self.markers, len(points), lambda: canvas.create_oval(
+            0, 0, 0, 0, fill='red', outline='red'))
+        for item, (px, py) in zip(markers, points):
+            canvas.coords(item, px - MARKER_RADIUS, py - MARKER_RADIUS, px + MARKER_RADIUS, py + MARKER_RADIUS)
+            canvas.itemconfigure(item, state='normal')
+
+        labels = self._pool(self.labels, len(scene.labels), lambda: canvas.create_text(0, 0, text=''))
+        for item, label in zip(labels, scene.labels):
+            canvas.coords(item, *to_px(label.x, label.y))
+            canvas.itemconfigure(item, text=label.text, anchor=tk_anchor(label.ha, label.va), state='normal',
+                                 font=(FONT_FAMILY, label.fontsize, 'bold' if label.bold else 'normal'))
+
+        # Tiêu đề ngay trên khung hình (title_pad tính theo point như matplotlib)
+        canvas.coords(self.title, w / 2, view.title_y(scene))
+        canvas.itemconfigure(self.title, text=scene.title, state='normal')
+        canvas.tag_raise(self.title)
+
+    def _on_resize(self, event):
+        if self.scene is not None:
+            self.render(self.scene)
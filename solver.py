@@ -0,0 +1,843 @@
+"""
+Headless solving pipeline and helpers shared by the GUI, services and scripts.
+
+solve_problem() is the calculator's whole pipeline without any UI: input
+checks, network choice (manual shape or auto-detect), ordered inputs, SSA
+handling, solve and classification, returned as a SolveResult. The GUI is a
+thin client that only parses its entry fields and displays the result.
+
+apply_inputs() feeds user inputs to a network in the GUI's order, solve_shape()
+builds, feeds and solves one shape network (module-level, so it can run in a
+worker process). solve_speculative() solves the general shape of each family
+and only the specialised candidates its solution implies (on a persistent
+process pool when there are several), keeping the most complete result that is
+consistent with its own shape according to classification.classify_shape().
+"""
+import atexit
+import math
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import geometry_kb as kb
+import kb_oracle
+from classification import classify_shape
+from engine import ConstraintNetwork, SolveBudget
+
+# Thứ tự gán input để mạng có cơ hội lan truyền:
+# 1) các cạnh, 2) góc, 3) chiều cao, 4) area, 5) perimeter, 6) các biến khác
+INPUT_ORDER = ['a', 'b', 'c', 'd', 'A', 'B', 'C', 'D', 'h_a', 'h_b', 'h_c', 'h_d', 'h', 'area', 'perimeter']
+
+TRIANGLE_SHAPES = {'triangle', 'equilateral_triangle'}
+
+# Tên hiển thị của từng mạng (phải xuất hiện trong chuỗi kế thừa của classify_shape)
+SHAPE_LABELS = {
+    'triangle': "Tam giác",
+    'equilateral_triangle': "Tam giác đều",
+    'quadrilateral': "Tứ giác",
+    'trapezoid': "Hình thang",
+    'parallelogram': "Hình bình hành",
+    'rectangle': "Hình chữ nhật",
+    'square': "Hình vuông",
+    'rhombus': "Hình thoi",
+}
+
+# Ứng viên giải song song khi chế độ tự động không phân loại chắc chắn (thứ tự = ưu tiên khi hoà)
+SPECULATIVE_CANDIDATES = ('triangle', 'quadrilateral', 'rectangle', 'parallelogram', 'rhombus')
+# Mạng của từng lựa chọn thủ công (tên hình trong GUI -> hình của KB)
+MANUAL_NETWORKS = {
+    "triangle": 'triangle',
+    "triangle_right": 'triangle',
+    "triangle_equilateral": 'equilateral_triangle',
+    "triangle_isosceles": 'triangle',
+    "square": 'square',
+    "rectangle": 'rectangle',
+    "rhombus": 'rhombus',
+    "parallelogram": 'parallelogram',
+    "trapezoid": 'trapezoid',
+    "quadrilateral": 'quadrilateral',
+}
+# Hình tổng quát của mỗi họ: luôn giải, chỉ từ dữ liệu người dùng nhập
+GENERAL_SHAPES = ('triangle', 'quadrilateral')
+
+
+def apply_inputs(net: ConstraintNetwork, inputs: Dict[str, float], source: str = 'user',
+                 budget: Optional[SolveBudget] = None) -> Tuple[bool, str]:
+    """Set the inputs the network knows, in INPUT_ORDER then the remaining keys."""
+    order = [k for k in INPUT_ORDER if k in inputs] + [k for k in inputs if k not in INPUT_ORDER]
+    for k in order:
+        if budget is not None and budget.cancelled:
+            break
+        if k in net.vars:
+            ok, msg = net.set_input(k, inputs[k], source, budget=budget)
+            if not ok:
+                return False, msg
+    return True, ""
+
+
+def fill_shape_properties(shape: str, inputs: Dict[str, float]):
+    """Auto-fill the defining properties of a shape mode (GUI shape names) into inputs"""
+    if shape == "triangle_right":
+        has_right_angle = any(abs(inputs.get(ang, 0) - 90) < 0.1 for ang in ['A','B','C'])
+        if not has_right_angle and 'C' not in inputs:
+            inputs['C'] = 90.0
+            
+    elif shape == "triangle_equilateral":
+        val_a = inputs.get('a') or inputs.get('b') or inputs.get('c')
+        if val_a is not None:
+            for s in ['a','b','c']:
+                if s not in inputs:
+                    inputs[s] = val_a
+        inputs.update({'A': 60.0, 'B': 60.0, 'C': 60.0})
+        
+    elif shape == "triangle_isosceles":
+        a, b, c = inputs.get('a'), inputs.get('b'), inputs.get('c')
+        if a is not None and b is None and c is None:
+            inputs['b'] = a
+        if b is not None and a is None and c is None:
+            inputs['c'] = b
+        if c is not None and a is None and b is None:
+            inputs['a'] = c
+        
+    elif shape == "square":
+        val = inputs.get('a') or inputs.get('b') or inputs.get('c') or inputs.get('d')
+        if val is not None:
+            for s in ['a','b','c','d']:
+                if s not in inputs:
+                    inputs[s] = val
+        inputs.update({'A': 90.0, 'B': 90.0, 'C': 90.0, 'D': 90.0})
+        
+    elif shape == "rectangle":
+        val_ac = inputs.get('a') or inputs.get('c')
+        if val_ac:
+            if 'a' not in inputs:
+                inputs['a'] = val_ac
+            if 'c' not in inputs:
+                inputs['c'] = val_ac
+        val_bd = inputs.get('b') or inputs.get('d')
+        if val_bd:
+            if 'b' not in inputs:
+                inputs['b'] = val_bd
+            if 'd' not in inputs:
+                inputs['d'] = val_bd
+        inputs.update({'A': 90.0, 'B': 90.0, 'C': 90.0, 'D': 90.0})
+        
+    elif shape == "rhombus":
+        val = inputs.get('a')
+        if val is not None:
+            for s in ['a','b','c','d']:
+                if s not in inputs:
+                    inputs[s] = val
+                
+    elif shape == "parallelogram":
+        if inputs.get('a') and 'c' not in inputs:
+            inputs['c'] = inputs['a']
+        if inputs.get('b') and 'd' not in inputs:
+            inputs['d'] = inputs['b']
+
+
+def solve_shape(shape: str, inputs: Dict[str, float], mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build, feed and solve one shape network; plain-data outcome (picklable).
+    `mode` (GUI shape name) auto-fills that shape's defining properties first;
+    inputs that contradict them make the outcome fail.
+    """
+    net = kb.build_network(shape)
+    if mode:
+        filled = dict(inputs)
+        fill_shape_properties(mode, filled)
+        conflicts = [k for k, v in inputs.items() if abs(filled[k] - v) > 1e-9]
+        if conflicts:
+            return {'shape': shape, 'ok': False, 'converged': False, 'results': {},
+                    'message': f"Giá trị {', '.join(conflicts)} mâu thuẫn với tính chất của {SHAPE_LABELS.get(shape, shape)}"}
+        inputs = filled
+    try:
+        ok, msg = apply_inputs(net, inputs)
+        converged = False
+        if ok:
+            converged, _ = net.solve()
+    except (ValueError, ZeroDivisionError, OverflowError) as e:
+        ok, msg, converged = False, str(e), False
+    return {
+        'shape': shape,
+        'ok': ok,
+        'message': msg,
+        'converged': converged,
+        'inputs': inputs,
+        'results': net.get_results() if ok else {},
+        'snapshot': net.snapshot() if ok else None,
+    }
+
+
+def family_of(shape: str) -> str:
+    """General shape of a shape's family: 'triangle' or 'quadrilateral'."""
+    return 'triangle' if shape in TRIANGLE_SHAPES else 'quadrilateral'
+
+
+@lru_cache(maxsize=None)
+def used_variables(shape: str) -> FrozenSet[str]:
+    """Variables of a shape that at least one constraint refers to."""
+    return frozenset(n for entry in kb.resolve_spec(shape)['constraints'] for n in entry['nodes'])
+
+
+def is_plausible(shape: str, inputs: Dict[str, float]) -> bool:
+    """A shape is a candidate only if its constraints use every input (no ignored data)."""
+    return set(inputs) <= used_variables(shape)
+
+
+def evaluate_outcome(outcome: Dict[str, Any]) -> Optional[Tuple[float, str, List[str]]]:
+    """
+    (completeness, shape name, inheritance) of a solved candidate, or None if it
+    is inconsistent: rejected inputs, wrong angle sum, or a classification that
+    does not belong to the candidate's own shape.
+    """
+    if not outcome['ok']:
+        return None
+    shape, res = outcome['shape'], outcome['results']
+    is_triangle = shape in TRIANGLE_SHAPES
+    angles = ['A', 'B', 'C'] if is_triangle else ['A', 'B', 'C', 'D']
+    if all(res.get(ang) is not None for ang in angles):
+        expected, tol = (180.0, 1e-3) if is_triangle else (360.0, 1e-2)
+        if abs(sum(res[ang] for ang in angles) - expected) > tol:
+            return None
+    shape_name, inheritance = classify_shape(res, is_triangle)
+    if SHAPE_LABELS[shape] not in inheritance:
+        return None
+    used = used_variables(shape)
+    completeness = sum(1 for n in used if res.get(n) is not None) / len(used)
+    return completeness, shape_name, inheritance
+
+
+# --- Pool tiến trình dùng chung (tạo một lần, giữ ấm giữa các lần tính) ---
+_executor: Optional[ProcessPoolExecutor] = None
+# GUI gọi get_executor từ cả luồng giao diện lẫn luồng giải nền: chỉ được tạo một pool
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Persistent worker pool, or None on a single-core machine / where processes
+    are unavailable. Thread-safe: concurrent first calls share one pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = min(len(SPECULATIVE_CANDIDATES), os.cpu_count() or 1)
+            if workers < 2:
+                return None
+            try:
+                _executor = ProcessPoolExecutor(max_workers=workers)
+            except (OSError, NotImplementedError, ValueError):
+                return None
+        return _executor
+
+
+def warm_up(executor: Optional[Executor] = None):
+    """Start the workers and compile the candidate networks in them ahead of the first solve."""
+    executor = executor or get_executor()
+    if executor is None:
+        return
+    for shape in SPECULATIVE_CANDIDATES:
+        executor.submit(solve_shape, shape, {})
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+atexit.register(shutdown_executor)
+
+
+def solve_speculative(inputs: Dict[str, float], candidates=SPECULATIVE_CANDIDATES,
+                      executor: Optional[Executor] = None) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Solve the plausible candidate shapes family by family and return (best
+    outcome or None, all outcomes solved). Families (triangle, quadrilateral)
+    are tried in order of their kb_oracle score on the user's inputs, ties
+    going to the triangle as in the choose_network fallback; the first family
+    with a consistent outcome wins.
+
+    Within a family the general shape is solved from the user's inputs alone.
+    A specialised candidate is only solved (with its defining properties filled
+    in as if selected manually, in parallel when an executor is given and there
+    are several) when that general solution is already classified as it, so
+    filled-in values never make up a shape the inputs do not imply. The most
+    complete consistent outcome wins, ties going to the earlier candidate; it
+    carries 'shape_name' and 'inheritance' from classify_shape, and its solved
+    state in 'snapshot'.
+    """
+    shapes = [s for s in candidates if is_plausible(s, inputs)]
+    scores = {'triangle': (kb_oracle.score('triangle', inputs, 'quadrilateral'), 1),
+              'quadrilateral': (kb_oracle.score('quadrilateral', inputs, 'triangle'), 0)}
+    outcomes: List[Dict[str, Any]] = []
+    for family in sorted(GENERAL_SHAPES, key=scores.get, reverse=True):
+        if family not in shapes:
+            continue
+        general = solve_shape(family, inputs)
+        evaluation = evaluate_outcome(general)
+        implied = [s for s in shapes if s != family and family_of(s) == family
+                   and evaluation is not None and SHAPE_LABELS[s] in evaluation[2]]
+        solved = {family: general}
+        if executor is not None and len(implied) > 1:
+            try:
+                futures = [executor.submit(solve_shape, s, inputs, s) for s in implied]
+                solved.update((s, f.result()) for s, f in zip(implied, futures))
+            except (BrokenProcessPool, OSError, RuntimeError):
+                # Pool hỏng -> giải tuần tự
+                if executor is _executor:
+                    shutdown_executor()
+        for shape in implied:
+            if shape not in solved:
+                solved[shape] = solve_shape(shape, inputs, shape)
+        family_outcomes = [solved[s] for s in shapes if s in solved]
+        outcomes.extend(family_outcomes)
+
+        best, best_key = None, None
+        for index, outcome in enumerate(family_outcomes):
+            evaluation = evaluate_outcome(outcome)
+            if evaluation is None:
+                continue
+            completeness, shape_name, inheritance = evaluation
+            key = (completeness, -index)
+            if best_key is None or key > best_key:
+                best_key = key
+                best = dict(outcome, shape_name=shape_name, inheritance=inheritance, completeness=completeness)
+        if best is not None:
+            return best, outcomes
+    return None, outcomes
+
+
+# =============================================================================
+# CHỌN MẠNG & KIỂM TRA ĐẦU VÀO
+# =============================================================================
+def validate_inputs(inputs: Dict[str, float]) -> Tuple[bool, str]:
+    """Validate input values"""
+    # Check sides > 0
+    for side in ('a', 'b', 'c', 'd'):
+        if side in inputs and inputs[side] <= 0:
+            return False, f"Cạnh {side} phải > 0"
+    
+    # Check angles in (0, 360)
+    for angle in ('A', 'B', 'C', 'D'):
+        if angle in inputs:
+            val = inputs[angle]
+            if val <= 0 or val >= 360:
+                return False, f"Góc {angle} phải trong khoảng (0, 360)"
+    
+    # Kiểm tra chiều cao > 0 nếu có
+    if 'h' in inputs and inputs['h'] <= 0:
+        return False, "Chiều cao (h) phải > 0"
+    return True, ""
+
+
+def detect_ssa_ambiguity(inputs: Dict[str, float], is_triangle: bool) -> Optional[List[Dict[str, float]]]:
+    """
+    Detect SSA (Side-Side-Angle) ambiguous case for triangles.
+    Returns list of possible solutions if ambiguous, None otherwise.
+    """
+    if not is_triangle:
+        return None
+        
+    ang2side = {'A': 'a', 'B': 'b', 'C': 'c'}
+    side_set = {'a', 'b', 'c'}
+
+    angles_provided = [k for k in inputs.keys() if k in ang2side.keys()]
+    sides_provided = [k for k in inputs.keys() if k in side_set]
+
+    # SSA requires exactly one angle and at least two sides
+    if len(angles_provided) != 1 or len(sides_provided) < 2:
+        return None
+
+    Aname = angles_provided[0]
+    opp_side = ang2side[Aname]
+    
+    if opp_side not in sides_provided:
+        return None
+
+    other_sides = [s for s in sides_provided if s != opp_side]
+    if not other_sides:
+        return None
+    other = other_sides[0]
+
+    a_val = inputs.get(opp_side)
+    b_val = inputs.get(other)
+    Adeg = inputs.get(Aname)
+    
+    if a_val is None or b_val is None or Adeg is None:
+        return None
+
+    sinA = math.sin(math.radians(Adeg))
+    if abs(sinA) < 1e-12:
+        return None
+
+    sin_other = (b_val * sinA) / a_val
+    if sin_other < -1.0 - 1e-9 or sin_other > 1.0 + 1e-9:
+        return None
+    sin_other = max(-1.0, min(1.0, sin_other))
+
+    try:
+        primary = math.degrees(math.asin(sin_other))
+    except ValueError:
+        return None
+
+    # Check if there's ambiguity (two possible angles)
+    if abs(abs(sin_other) - 1.0) > 1e-9:  # Not 90°
+        supplement = 180.0 - primary
+        if abs(supplement - primary) > 1e-6:
+            # Two different solutions exist
+            candidates = [primary, supplement]
+        else:
+            return None  # Only one solution
+    else:
+        return None  # Only one solution (90°)
+
+    side_to_angle = {'a':'A','b':'B','c':'C'}
+    angle_to_side = {v:k for k,v in side_to_angle.items()}
+    
+    solutions = []
+    for cand_angle in candidates:
+        other_angle_name = side_to_angle[other]
+        third_angle_name = ({'A','B','C'} - {Aname, other_angle_name}).pop()
+        
+        Bdeg = cand_angle
+        Cdeg = 180.0 - Adeg - Bdeg
+        
+        if Cdeg <= 0:
+            continue
+            
+        third_side_name = angle_to_side[third_angle_name]
+        third_side = a_val * math.sin(math.radians(Cdeg)) / sinA
+        
+        sol = dict(inputs)
+        sol[other_angle_name] = Bdeg
+        sol[third_angle_name] = Cdeg
+        sol[third_side_name] = third_side
+        solutions.append(sol)
+
+    return solutions if len(solutions) > 1 else None
+
+
+def choose_network(inputs: Dict[str, float], shape: str = "auto",
+                   executor: Optional[Executor] = None) -> Tuple[Optional[ConstraintNetwork], str]:
+    """
+    Chọn mạng lưới (Đã sửa lỗi ưu tiên Tứ giác & Khôi phục Scoring).
+    Chế độ thủ công tự điền tính chất hình vào inputs (fill_shape_properties);
+    mạng chọn qua solve_speculative đã mang sẵn trạng thái đã giải.
+    """
+    
+    # --- PHẦN 1: CHỌN THỦ CÔNG (MANUAL) ---
+    # (user đã chủ động chọn thì phải tuân theo)
+    if shape in MANUAL_NETWORKS:
+        fill_shape_properties(shape, inputs)
+        return kb.build_network(MANUAL_NETWORKS[shape]), f"{EXPECTED_SHAPES[shape]} (đã chọn)"
+
+    # --- PHẦN 2: TỰ ĐỘNG PHÂN LOẠI (AUTO-DETECT) ---
+    
+    # 1. [FIX] KIỂM TRA TỨ GIÁC TRƯỚC (Ưu tiên cao nhất)
+    # Dấu hiệu nhận biết Tứ giác: Có cạnh d, góc D, hoặc nhập đủ 4 cạnh
+    has_d_input = ('d' in inputs) or ('D' in inputs)
+    count_sides = sum(1 for s in ['a','b','c','d'] if s in inputs)
+    
+    if has_d_input or count_sides == 4:
+        # A. Detect HÌNH THOI (4 cạnh bằng nhau) -> Mạng Thoi
+        sides_val = [inputs.get(s) for s in ['a','b','c','d']]
+        if all(s is not None for s in sides_val):
+            if all(abs(s - sides_val[0]) < 1e-6 for s in sides_val):
+                return kb.create_rhombus_network(), "Tứ giác (4 cạnh bằng nhau -> Mạng Hình Thoi)"
+
+        # B. Detect HÌNH CHỮ NHẬT (Có góc vuông)
+        has_90 = any(abs(inputs.get(ang, 0) - 90.0) < 0.1 for ang in ['A', 'B', 'C', 'D'])
+        if has_90:
+            return kb.create_rectangle_network(), "Tứ giác (Có góc vuông -> Mạng HCN)"
+
+        # C. Detect HÌNH BÌNH HÀNH (Cạnh đối bằng nhau)
+        a, b, c, d = inputs.get('a'), inputs.get('b'), inputs.get('c'), inputs.get('d')
+        if a and b and c and d:
+            if abs(a-c) < 1e-6 and abs(b-d) < 1e-6:
+                return kb.create_parallelogram_network(), "Tứ giác (Cạnh đối bằng nhau -> Mạng HBH)"
+
+        # D. Không có dấu hiệu đặc thù -> giải song song các ứng viên tứ giác
+        net, msg = _choose_speculative(inputs, executor)
+        if net is not None:
+            return net, msg
+        return kb.create_quadrilateral_network(), "Tứ giác thường (Auto)"
+
+    # 2. KIỂM TRA TAM GIÁC (Ưu tiên thấp hơn Tứ giác)
+    # Chỉ vào đây nếu KHÔNG CÓ 'd' và KHÔNG nhập đủ 4 cạnh
+    tri_side_names = {'a', 'b', 'c'}
+    if sum(1 for n in inputs if n in tri_side_names) >= 3:
+         return kb.create_triangle_network(), "Tam giác (3 cạnh)"
+
+    # 3. Dữ liệu mơ hồ -> giải song song các ứng viên, chọn kết quả đầy đủ & nhất quán nhất
+    net, msg = _choose_speculative(inputs, executor)
+    if net is not None:
+        return net, msg
+
+    # 4. [FIX] HỆ THỐNG CHẤM ĐIỂM (Fallback Scoring)
+    # Nếu nhập lỡ cỡ (ví dụ: a, b, diện tích) -> Dùng điểm số để đoán
+    # Điểm tính bằng bao đóng ký hiệu (kb_oracle), không cần dựng mạng và giải thử
+    tscore = kb_oracle.score('triangle', inputs, 'quadrilateral')
+    rscore = kb_oracle.score('quadrilateral', inputs, 'triangle')
+    
+    if tscore == 0 and rscore == 0:
+        return None, "Không đủ dữ liệu để phân loại"
+        
+    if tscore >= rscore:
+        return kb.create_triangle_network(), f"Tam giác (Dự đoán theo điểm: {tscore})"
+    else:
+        return kb.create_quadrilateral_network(), f"Tứ giác (Dự đoán theo điểm: {rscore})"
+
+
+def _choose_speculative(inputs: Dict[str, float], executor: Optional[Executor] = None) -> Tuple[Optional[ConstraintNetwork], str]:
+    """
+    Giải đồng thời các mạng ứng viên trên pool tiến trình, chọn theo classify_shape.
+    Trả về mạng của ứng viên thắng với trạng thái đã giải của nó; các tính chất
+    hình đã tự điền được ghi lại vào inputs (như chế độ chọn thủ công).
+    """
+    best, outcomes = solve_speculative(inputs, executor=executor)
+    if best is None:
+        return None, ""
+    inputs.update(best['inputs'])
+    label = SHAPE_LABELS[best['shape']]
+    return kb.network_from_snapshot(best['snapshot']), f"{label} (Giải {len(outcomes)} ứng viên -> {best['shape_name']})"
+
+
+# =============================================================================
+# PIPELINE GIẢI KHÔNG GIAO DIỆN (dùng chung cho GUI, dịch vụ, batch)
+# =============================================================================
+TRIANGLE_MODES = {"triangle", "triangle_right", "triangle_equilateral", "triangle_isosceles"}
+QUAD_MODES = {"square", "rectangle", "rhombus", "parallelogram", "trapezoid", "quadrilateral"}
+
+# Tên tiếng Việt chuẩn của từng lựa chọn thủ công
+EXPECTED_SHAPES = {
+    "triangle": "Tam giác thường",
+    "triangle_right": "Tam giác vuông",
+    "triangle_equilateral": "Tam giác đều",
+    "triangle_isosceles": "Tam giác cân",
+    "square": "Hình vuông",
+    "rectangle": "Hình chữ nhật",
+    "rhombus": "Hình thoi",
+    "parallelogram": "Hình bình hành",
+    "trapezoid": "Hình thang",
+    "quadrilateral": "Tứ giác thường",
+}
+
+
+class SolveResult:
+    """
+    Structured outcome of solve_problem(), free of any UI object.
+
+    status:
+    - 'ok': solved; results / shape_name / inheritance / warnings are filled;
+    - 'no_input', 'invalid', 'conflict', 'unclassified': rejected, `title` and
+      `message` describe why (no_input is a warning, the others are errors;
+      'conflict' also covers values the engine rejects while propagating);
+    - 'ssa_choice_required': SSA case with two triangles; `ssa_solutions` holds
+      both, call solve_problem again with ssa_choice=0 or 1;
+    - 'cancelled': the budget passed to solve_problem was cancelled mid-solve.
+    """
+
+    def __init__(self, status: str, inputs: Dict[str, float], *, title: str = "", message: str = "",
+                 network: Optional[ConstraintNetwork] = None, kind_msg: str = "", is_triangle: bool = False,
+                 results: Optional[Dict[str, Optional[float]]] = None, shape_name: str = "",
+                 inheritance: Optional[List[str]] = None, warnings: Optional[List[str]] = None,
+                 ssa_solutions: Optional[List[Dict[str, float]]] = None):
+        self.status = status
+        self.inputs = inputs
+        self.title = title
+        self.message = message
+        self.network = network
+        self.kind_msg = kind_msg
+        self.is_triangle = is_triangle
+        self.results = results or {}
+        self.shape_name = shape_name
+        self.inheritance = inheritance or []
+        self.warnings = warnings or []
+        self.ssa_solutions = ssa_solutions
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'ok'
+
+    def __repr__(self):
+        return f"SolveResult(status={self.status!r}, shape_name={self.shape_name!r}, message={self.message!r})"
+
+
+def normalize_inputs(inputs: Dict[str, float]) -> Dict[str, float]:
+    """Copy of the inputs as the pipeline uses them (h alone also means h_a)."""
+    inputs = dict(inputs)
+    # Nếu chỉ nhập h, gán cho h_a
+    if 'h' in inputs and 'h_a' not in inputs:
+        inputs['h_a'] = inputs['h']
+    return inputs
+
+
+def check_inputs(inputs: Dict[str, float], shape_mode: str) -> Optional[Tuple[str, str, str]]:
+    """Pre-solve checks; (status, title, message) of the first failure, None if all pass."""
+    if not inputs:
+        return 'no_input', "Cảnh báo", "Vui lòng nhập ít nhất một giá trị!"
+
+    # --- KIỂM TRA LOGIC GÓC TAM GIÁC ---
+    is_triangle = shape_mode in TRIANGLE_MODES or (shape_mode == "auto" and any(k in inputs for k in ['a', 'b', 'c']))
+    if is_triangle:
+        # Kiểm tra từng góc
+        for ang in ['A', 'B', 'C']:
+            if ang in inputs and (inputs[ang] <= 0 or inputs[ang] >= 180):
+                return 'invalid', "Lỗi", f"Góc {ang} = {inputs[ang]}° không hợp lệ cho tam giác (phải trong khoảng (0, 180))"
+        # Kiểm tra tổng góc nếu nhập đủ
+        angle_sum = sum(inputs.get(ang, 0) for ang in ['A', 'B', 'C'] if ang in inputs)
+        if sum(1 for ang in ['A', 'B', 'C'] if ang in inputs) == 3 and (angle_sum < 180.0 - 1e-6 or angle_sum > 180.0 + 1e-6):
+            return 'invalid', "Lỗi", f"Tổng 3 góc tam giác = {angle_sum:.2f}° không hợp lệ (phải đúng bằng 180°)"
+        # --- Kiểm tra xung đột dữ liệu tam giác vuông ---
+        if shape_mode == "triangle_right":
+            # Nếu nhập đủ 3 cạnh, kiểm tra có phải tam giác vuông không
+            a, b, c = inputs.get('a'), inputs.get('b'), inputs.get('c')
+            if a and b and c:
+                # Sắp xếp để c là cạnh lớn nhất
+                sides = sorted([a, b, c])
+                if abs(sides[2]**2 - (sides[0]**2 + sides[1]**2)) > 1e-2:
+                    return 'invalid', "Lỗi", ("Ba cạnh nhập vào không tạo thành tam giác vuông (không thỏa mãn định lý "
+                                              "Pythagoras). Vui lòng kiểm tra lại!")
+            # Nếu nhập góc vuông và cạnh đối diện không phải là cạnh lớn nhất
+            for ang, side in zip(['A', 'B', 'C'], ['a', 'b', 'c']):
+                if ang in inputs and abs(inputs[ang] - 90) < 1e-2:
+                    # Góc vuông phải đối diện cạnh lớn nhất
+                    a, b, c = inputs.get('a'), inputs.get('b'), inputs.get('c')
+                    if a and b and c:
+                        max_side = max(a, b, c)
+                        if abs(inputs.get(side, 0) - max_side) > 1e-2:
+                            return 'invalid', "Lỗi", (f"Góc {ang} là góc vuông nhưng cạnh đối diện ({side}) không phải "
+                                                      f"là cạnh lớn nhất. Dữ liệu không hợp lệ cho tam giác vuông.")
+
+    # Validate perimeter, area, height
+    if 'perimeter' in inputs and inputs['perimeter'] <= 0:
+        return 'invalid', "Lỗi", "Chu vi phải > 0"
+    if 'area' in inputs and inputs['area'] <= 0:
+        return 'invalid', "Lỗi", "Diện tích phải > 0"
+    if 'h' in inputs and inputs['h'] <= 0:
+        return 'invalid', "Lỗi", "Chiều cao (h) phải > 0"
+
+    valid, msg = validate_inputs(inputs)
+    if not valid:
+        return 'invalid', "Lỗi cạnh và góc nằm ngoài giá trị cho phép", msg
+    return None
+
+
+def angle_sum_warnings(res: Dict[str, Optional[float]], is_triangle: bool) -> List[str]:
+    """Validation messages on the solved angles (shown with the results)."""
+    warnings = []
+    if is_triangle:
+        A, B, C = res.get('A'), res.get('B'), res.get('C')
+        if A is not None and B is not None and C is not None:
+            angle_sum = A + B + C
+            if abs(angle_sum - 180.0) > 1e-3:
+                warnings.append(f"⚠ LỖI: Tổng góc tam giác = {angle_sum:.2f}° (phải = 180°)")
+    else:
+        A, B, C, D = res.get('A'), res.get('B'), res.get('C'), res.get('D')
+        if A is not None and B is not None and C is not None and D is not None:
+            angle_sum = A + B + C + D
+            if abs(angle_sum - 360.0) > 1e-2:
+                warnings.append(f"⚠ CẢNH BÁO: Tổng góc tứ giác = {angle_sum:.2f}° (phải = 360°)")
+    return warnings
+
+
+def _cancelled(budget: Optional[SolveBudget]) -> bool:
+    return budget is not None and budget.cancelled
+
+
+def solve_problem(inputs: Dict[str, float], shape_mode: str = "auto", ssa_choice: Optional[int] = None,
+                  executor: Optional[Executor] = None, budget: Optional[SolveBudget] = None) -> SolveResult:
+    """
+    Full solve pipeline of the calculator, without UI: checks, network choice
+    (manual mode or auto-detect), ordered inputs, SSA handling, solve and
+    classification. `shape_mode` is one of the GUI shape names or "auto";
+    `ssa_choice` picks one of the two SSA triangles (0 or 1) when asked for.
+    `budget` bounds the propagation and solve; cancelling it from another
+    thread makes the call return a 'cancelled' result early.
+    """
+    inputs = normalize_inputs(inputs)
+    failure = check_inputs(inputs, shape_mode)
+    if failure:
+        status, title, message = failure
+        return SolveResult(status, inputs, title=title, message=message)
+
+    # Choose network (có thể tự điền tính chất hình vào inputs)
+    net, kind_msg = choose_network(inputs, shape_mode, executor)
+    if net is None:
+        return SolveResult('unclassified', inputs, title="Lỗi", message=kind_msg)
+    if _cancelled(budget):
+        return SolveResult('cancelled', inputs, network=net, kind_msg=kind_msg)
+
+    # --- XÁC ĐỊNH LOẠI HÌNH (TAM GIÁC HAY TỨ GIÁC) ---
+    if shape_mode in TRIANGLE_MODES:
+        is_triangle = True
+    elif shape_mode in QUAD_MODES:
+        is_triangle = False
+    else:  # auto
+        is_triangle = "Tam giác" in kind_msg
+
+    # Mạng của ứng viên thắng khi giải song song đã mang sẵn trạng thái đã giải:
+    # phân loại đúng trên các giá trị đó thay vì giải lại (trừ khi phải chọn nghiệm SSA)
+    ssa_solutions = detect_ssa_ambiguity(inputs, is_triangle)
+    ssa_ambiguous = bool(ssa_solutions) and len(ssa_solutions) > 1
+    if not ssa_ambiguous and any(v.is_known() for v in net.vars.values()):
+        return _finish_solve(net, inputs, shape_mode, kind_msg, is_triangle, budget)
+
+    # Gán input theo thứ tự INPUT_ORDER để mạng có cơ hội lan truyền
+    net.reset()
+    try:
+        ok, msg = apply_inputs(net, inputs, budget=budget)
+    except ValueError as e:  # giá trị lan truyền ra ngoài miền hợp lệ
+        ok, msg = False, str(e)
+    if _cancelled(budget):
+        return SolveResult('cancelled', inputs, network=net, kind_msg=kind_msg, is_triangle=is_triangle)
+    if not ok:
+        return SolveResult('conflict', inputs, title="Lỗi dữ liệu", message=msg,
+                           network=net, kind_msg=kind_msg, is_triangle=is_triangle)
+
+    # --- Trường hợp SSA: hai nghiệm, người gọi phải chọn ---
+    if ssa_ambiguous:
+        if ssa_choice is None:
+            return SolveResult('ssa_choice_required', inputs, title="Trường hợp SSA - Hai nghiệm!",
+                               network=net, kind_msg=kind_msg, is_triangle=is_triangle,
+                               ssa_solutions=ssa_solutions)
+        inputs.update(ssa_solutions[ssa_choice])
+        # Re-apply inputs with chosen solution
+        net.reset()
+        try:
+            for k in INPUT_ORDER:
+                if k in inputs and k in net.vars:
+                    net.set_input(k, inputs[k], 'user', budget=budget)
+        except ValueError as e:
+            return SolveResult('conflict', inputs, title="Lỗi dữ liệu", message=str(e),
+                               network=net, kind_msg=kind_msg, is_triangle=is_triangle)
+
+    return _finish_solve(net, inputs, shape_mode, kind_msg, is_triangle, budget)
+
+
+def _finish_solve(net: ConstraintNetwork, inputs: Dict[str, float], shape_mode: str, kind_msg: str,
+                  is_triangle: bool, budget: Optional[SolveBudget] = None) -> SolveResult:
+    """Solve the network holding the inputs, then classify (tail of solve_problem)."""
+    try:
+        net.solve(budget=budget)
+    except ValueError as e:
+        return SolveResult('conflict', inputs, title="Lỗi dữ liệu", message=str(e),
+                           network=net, kind_msg=kind_msg, is_triangle=is_triangle)
+    if _cancelled(budget):
+        return SolveResult('cancelled', inputs, network=net, kind_msg=kind_msg, is_triangle=is_triangle)
+    res = {k: net.vars[k].value if k in net.vars and net.vars[k].is_known() else None for k in net.vars}
+
+    # --- Phân loại hình thực tế ---
+    shape_name, inheritance = classify_shape(res, is_triangle)
+
+    # --- Ưu tiên hình đã chọn thủ công ---
+    expected_shape = EXPECTED_SHAPES.get(shape_mode)
+    if expected_shape:
+        shape_name = expected_shape
+        inheritance = list(dict.fromkeys([expected_shape] + inheritance))
+
+    return SolveResult('ok', inputs, network=net, kind_msg=kind_msg, is_triangle=is_triangle, results=res,
+                       shape_name=shape_name, inheritance=inheritance,
+                       warnings=angle_sum_warnings(res, is_triangle))
+
+
+# Chế độ chọn mạng chỉ phụ thuộc vào tên đầu vào (không phụ thuộc giá trị, không tự điền)
+KEY_DETERMINED_MODES = ("triangle", "trapezoid", "quadrilateral")
+
+
+def network_depends_on_values(inputs: Dict[str, float], shape_mode: str) -> bool:
+    """True when choose_network may pick another network (or fill other values) if only values change."""
+    if shape_mode in KEY_DETERMINED_MODES:
+        return False
+    if shape_mode != "auto":
+        return True
+    # Auto: chỉ nhánh "Tam giác (3 cạnh)" là chọn theo tên đầu vào
+    is_quad = 'd' in inputs or 'D' in inputs or all(s in inputs for s in ('a', 'b', 'c', 'd'))
+    return is_quad or sum(1 for s in ('a', 'b', 'c') if s in inputs) < 3
+
+
+class LiveSession:
+    """
+    Incremental re-solve for live editing. Keeps the network of the last
+    successful solve; when a later call only changes input values (same names,
+    same shape mode, network choice not value-dependent, no SSA ambiguity) the
+    changed values go through ConstraintNetwork.update_inputs instead of a
+    rebuild. Anything else falls back to solve_problem(); a caller that runs
+    that fallback elsewhere (the GUI's worker thread) checks is_incremental()
+    first and hands the result to record().
+    """
+
+    def __init__(self, executor: Optional[Executor] = None):
+        self.executor = executor
+        self.result: Optional[SolveResult] = None
+        self.incremental = 0
+        self.full = 0
+        self._inputs: Dict[str, float] = {}
+        self._shape_mode: Optional[str] = None
+
+    def invalidate(self):
+        self.result = None
+
+    def is_incremental(self, inputs: Dict[str, float], shape_mode: str = "auto") -> bool:
+        """
+        Whether update() would reuse the last network (or the last result when
+        nothing changed) instead of falling back to a full solve_problem().
+        """
+        inputs = normalize_inputs(inputs)
+        prev = self.result
+        if (prev is None or not prev.ok or shape_mode != self._shape_mode or inputs.keys() != self._inputs.keys()
+                or network_depends_on_values(inputs, shape_mode)):
+            return False
+        if inputs == self._inputs:
+            return True
+        return not check_inputs(inputs, shape_mode) and not detect_ssa_ambiguity(inputs, prev.is_triangle)
+
+    def update(self, inputs: Dict[str, float], shape_mode: str = "auto",
+               budget: Optional[SolveBudget] = None) -> SolveResult:
+        inputs = normalize_inputs(inputs)
+        if not self.is_incremental(inputs, shape_mode):
+            return self._full(inputs, shape_mode, budget)
+        prev = self.result
+        changed = [k for k in inputs if inputs[k] != self._inputs[k]]
+        if not changed:
+            return prev
+
+        net = prev.network
+        order = [k for k in INPUT_ORDER if k in changed] + [k for k in changed if k not in INPUT_ORDER]
+        self.result = None  # mạng đang được sửa dở: lỗi giữa chừng thì lần sau giải lại từ đầu
+        self._inputs = dict(inputs)
+        try:
+            ok, msg = net.update_inputs({k: inputs[k] for k in order if k in net.vars}, 'user', budget=budget)
+            if not ok:
+                return SolveResult('conflict', inputs, title="Lỗi dữ liệu", message=msg, network=net,
+                                   kind_msg=prev.kind_msg, is_triangle=prev.is_triangle)
+        except ValueError as e:
+            return SolveResult('conflict', inputs, title="Lỗi dữ liệu", message=str(e), network=net,
+                               kind_msg=prev.kind_msg, is_triangle=prev.is_triangle)
+        if _cancelled(budget):
+            return SolveResult('cancelled', inputs, network=net, kind_msg=prev.kind_msg, is_triangle=prev.is_triangle)
+        self.incremental += 1
+        result = _finish_solve(net, inputs, shape_mode, prev.kind_msg, prev.is_triangle, budget)
+        self.result = result
+        return result
+
+    def record(self, inputs: Dict[str, float], shape_mode: str, result: SolveResult):
+        """
+        Take a full solve_problem() result computed elsewhere (e.g. on a worker
+        thread) as the last solve, so later updates can start from its network.
+        """
+        self.full += 1
+        self._inputs = normalize_inputs(inputs)
+        self._shape_mode = shape_mode
+        self.result = result
+
+    def _full(self, inputs: Dict[str, float], shape_mode: str, budget: Optional[SolveBudget]) -> SolveResult:
+        self.record(inputs, shape_mode, solve_problem(inputs, shape_mode, executor=self.executor, budget=budget))
+        return self.result
@@ -0,0 +1,99 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geometry_kb as kb  # noqa: E402
+from engine import SolveBudget  # noqa: E402
+from solver import apply_inputs  # noqa: E402
+
+INPUTS = {'a': 3.0, 'b': 4.0, 'c': 5.0}
+
+
+def run(budget):
+    net = kb.build_network('triangle')
+    ok, msg = apply_inputs(net, INPUTS, budget=budget)
+    converged, diagnostics = net.solve(budget=budget)
+    return ok, msg, converged, diagnostics
+
+
+class BudgetTest(unittest.TestCase):
+    def updates_needed(self):
+        budget = SolveBudget()
+        run(budget)
+        return budget.updates
+
+    def test_exact_max_updates_is_not_exhausted(self):
+        needed = self.updates_needed()
+        budget = SolveBudget(max_updates=needed)
+        ok, _, converged, diagnostics = run(budget)
+        self.assertTrue(ok)
+        self.assertTrue(converged)
+        self.assertIsNone(budget.exhausted)
+        self.assertNotIn('budget_exhausted', diagnostics)
+
+    def test_one_update_short_is_exhausted(self):
+        needed = self.updates_needed()
+        budget = SolveBudget(max_updates=needed - 1)
+        _, _, converged, diagnostics = run(budget)
+        self.assertFalse(converged)
+        self.assertEqual(budget.exhausted, 'max_updates')
+        self.assertEqual(diagnostics.get('budget_exhausted'), 'max_updates')
+
+    def test_budget_spans_all_calls_of_a_problem(self):
+        budget = SolveBudget(timeout=60.0)
+        net = kb.build_network('triangle')
+        counts = []
+        for name, value in INPUTS.items():
+            net.set_input(name, value, budget=budget)
+            counts.append(budget.evaluations)
+        deadline = budget.deadline
+        net.solve(budget=budget)
+        # bộ đếm và hạn giờ không bị đặt lại ở mỗi lần gọi
+        self.assertEqual(counts, sorted(counts))
+        self.assertGreater(counts[-1], counts[0])
+        self.assertEqual(budget.deadline, deadline)
+
+    def test_input_propagation_stop_is_reported(self):
+        budget = SolveBudget(max_evaluations=3)
+        net = kb.build_network('triangle')
+        ok, msg = apply_inputs(net, INPUTS, budget=budget)
+        self.assertFalse(ok)
+        self.assertIn('max_evaluations', msg)
+        converged, diagnostics = net.solve()
+        self.assertFalse(converged)
+        self.assertEqual(diagnostics.get('budget_exhausted'), 'max_evaluations')
+
+    def test_start_restarts_for_the_next_problem(self):
+        budget = SolveBudget(max_evaluations=3)
+        run(budget)
+        self.assertEqual(budget.exhausted, 'max_evaluations')
+        budget.start()
+        self.assertIsNone(budget.exhausted)
+        self.assertEqual(budget.evaluations, 0)
+
+    def test_network_budget_restarts_at_reset(self):
+        net = kb.build_network('triangle')
+        net.budget = SolveBudget(max_evaluations=500)
+        for _ in range(4):
+            net.reset()
+            apply_inputs(net, INPUTS)
+            converged, diagnostics = net.solve()
+            self.assertTrue(converged)
+            self.assertNotIn('budget_exhausted', diagnostics)
+        self.assertLess(net.budget.evaluations, 500)
+
+    def test_clone_gets_its_own_budget(self):
+        net = kb.build_network('triangle')
+        net.budget = SolveBudget(max_evaluations=500)
+        copy = net.clone()
+        self.assertIsNot(copy.budget, net.budget)
+        self.assertEqual(copy.budget.max_evaluations, 500)
+        apply_inputs(copy, INPUTS)
+        copy.solve()
+        self.assertEqual(net.budget.evaluations, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
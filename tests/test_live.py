@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import solver  # noqa: E402
+
+# (chế độ hình, tên đầu vào) của các chuỗi sửa ngẫu nhiên
+EDIT_SETS = [
+    ('triangle', ['a', 'b', 'c']), ('triangle', ['a', 'b', 'C']), ('triangle', ['a', 'b', 'c', 'perimeter']),
+    ('triangle', ['a', 'A', 'B']), ('triangle', ['a', 'b', 'c', 'area']), ('trapezoid', ['a', 'b', 'c', 'd', 'h']),
+    ('quadrilateral', ['a', 'b', 'c', 'd', 'A']), ('auto', ['a', 'b', 'c', 'perimeter']),
+]
+
+
+def random_value(rng, name):
+    return round(rng.uniform(20, 120), 1) if name in 'ABCD' else round(rng.uniform(2, 10), 1)
+
+
+class LiveSessionTest(unittest.TestCase):
+    def assertSameResult(self, live, full, context):
+        self.assertEqual(live.status, full.status, context)
+        if not full.ok:
+            return
+        self.assertEqual(live.shape_name, full.shape_name, context)
+        for name, value in full.results.items():
+            if value is None:
+                self.assertIsNone(live.results.get(name), (context, name))
+            else:
+                self.assertAlmostEqual(live.results.get(name), value, places=6, msg=(context, name))
+
+    def test_input_checked_against_a_derived_value_is_set_again(self):
+        session = solver.LiveSession()
+        inputs = {'a': 5.0, 'b': 6.0, 'c': 7.0, 'perimeter': 18.0}
+        first = session.update(dict(inputs), 'triangle')
+        self.assertTrue(first.ok)
+        inputs['a'] = 5.5
+        result = session.update(dict(inputs), 'triangle')
+        self.assertIs(result.network, first.network)  # bước tăng dần, không giải lại từ đầu
+        self.assertEqual(result.status, 'conflict')
+        self.assertEqual(solver.solve_problem(dict(inputs), 'triangle').status, 'conflict')
+
+    def test_live_and_full_results_agree_after_each_edit(self):
+        rng = random.Random(36)
+        for shape_mode, names in EDIT_SETS:
+            for _ in range(3):
+                session = solver.LiveSession()
+                inputs = {name: random_value(rng, name) for name in names}
+                if 'perimeter' in inputs:
+                    inputs['perimeter'] = round(inputs['a'] + inputs['b'] + inputs['c'], 1)
+                session.update(dict(inputs), shape_mode)
+                for _ in range(8):
+                    for name in rng.sample(names, min(len(names), rng.choice([1, 1, 2]))):
+                        inputs[name] = round(inputs[name] + rng.choice([-1, 1]) * rng.uniform(0.1, 1.5), 1)
+                    live = session.update(dict(inputs), shape_mode)
+                    full = solver.solve_problem(dict(inputs), shape_mode)
+                    self.assertSameResult(live, full, (shape_mode, dict(inputs)))
+
+
+if __name__ == '__main__':
+    unittest.main()
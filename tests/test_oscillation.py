@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import Constraint, ConstraintNetwork  # noqa: E402
+
+
+def fighting_network():
+    """Two flex constraints pulling y to 1 and 2; the second one gives up after its first calls."""
+    calls = []
+
+    def two(net, known, unknown):
+        calls.append(1)
+        return {'y': 2.0} if 'x' in known and len(calls) <= 2 else None
+
+    net = ConstraintNetwork()
+    for name in ('x', 'y', 'z'):
+        net.add_variable(name)
+    net.add_constraint(Constraint('one', ['x', 'y', 'z'], flex_func=lambda net, known, unknown: {'y': 1.0}))
+    net.add_constraint(Constraint('two', ['x', 'y', 'z'], flex_func=two))
+    return net
+
+
+class OscillationReportTest(unittest.TestCase):
+    def test_input_propagation_oscillation_reaches_solve(self):
+        net = fighting_network()
+        net.set_input('x', 1.0)
+        self.assertEqual(net.diagnostics.get('oscillating'), ['y'])
+        # lần giải sau không còn dao động, nhưng báo cáo của lan truyền đầu vào vẫn được giữ
+        converged, diagnostics = net.solve()
+        self.assertFalse(converged)
+        self.assertEqual(diagnostics.get('oscillating'), ['y'])
+
+    def test_report_is_consumed_by_solve(self):
+        net = fighting_network()
+        net.set_input('x', 1.0)
+        net.solve()
+        converged, diagnostics = net.solve()
+        self.assertNotIn('oscillating', diagnostics)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geometry_kb as kb  # noqa: E402
+from solver import apply_inputs  # noqa: E402
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_restore_without_sensitivities_gives_plain_floats(self):
+        source = kb.build_network('triangle')
+        source.sensitivities = True
+        apply_inputs(source, {'a': 3.0, 'b': 4.0, 'c': 5.0})
+        source.solve()
+        target = kb.build_network('triangle')
+        target.restore(source.snapshot())
+        results = target.get_results()
+        self.assertAlmostEqual(results['area'], 6.0)
+        for name, var in target.vars.items():
+            if var.is_known():
+                self.assertIs(type(var.value), float, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import solver  # noqa: E402
+
+
+class SpeculativeChoiceTest(unittest.TestCase):
+    def test_message_matches_classification(self):
+        for inputs in ({'a': 3.0, 'b': 4.0, 'd1': 5.0}, {'a': 2.0, 'b': 3.0, 'd1': 4.0}, {'a': 3.0, 'b': 4.0}):
+            result = solver.solve_problem(dict(inputs))
+            self.assertTrue(result.ok, inputs)
+            self.assertTrue(result.kind_msg.endswith(f"-> {result.shape_name})"), (inputs, result.kind_msg))
+
+    def test_winner_state_is_kept(self):
+        inputs = {'a': 3.0, 'b': 4.0, 'c': 3.0, 'd': 4.0, 'A': 60.0}
+        net, msg = solver._choose_speculative(inputs)
+        self.assertTrue(msg.startswith("Hình bình hành"))
+        self.assertAlmostEqual(net.get_results()['area'], 12.0 * 3 ** 0.5 / 2)
+
+    def test_filled_properties_do_not_outrank_the_triangle(self):
+        # như phương án dự phòng theo điểm của kb_oracle: hoà điểm -> tam giác
+        result = solver.solve_problem({'a': 3.0, 'A': 30.0})
+        self.assertTrue(result.is_triangle)
+        self.assertTrue(result.kind_msg.startswith("Tam giác"))
+
+    def test_no_specialised_shape_without_evidence(self):
+        # Tính chất tự điền (góc vuông, cạnh đối bằng nhau) không được tự tạo ra hình chữ nhật
+        for inputs in ({'a': 3.0, 'd': 5.0}, {'a': 3.0, 'b': 4.0, 'd': 4.0}):
+            result = solver.solve_problem(dict(inputs))
+            self.assertTrue(result.ok, inputs)
+            self.assertEqual(result.shape_name, "Tứ giác thường", inputs)
+            self.assertIsNone(result.results['area'], inputs)
+
+    def test_specialised_candidate_only_when_implied(self):
+        best, outcomes = solver.solve_speculative({'a': 3.0, 'b': 4.0, 'c': 3.0, 'd': 4.0, 'A': 60.0})
+        self.assertEqual([o['shape'] for o in outcomes], ['quadrilateral', 'parallelogram'])
+        self.assertEqual(best['shape_name'], "Hình bình hành")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Vectorized triangle case classifier for datasets: labels every row with the
+congruence case its known values form (SSS, SAS, ASA, AAS, SSA, AAA or
+insufficient), counts the solutions of SSA rows (0, 1 or 2, same rule as
+solver.detect_ssa_ambiguity) and groups row indices per case, so that each
+homogeneous group can go to its own fast path.
+
+Input is columns a, b, c, A, B, C (angles in degrees, NaN = unknown): a NumPy
+structured array such as the ones `python -m batch` reads, or a mapping of
+name -> 1-D array. Missing columns count as unknown.
+
+Usage:
+    python -m triangle_cases problems.npy
+"""
+import argparse
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+
+SIDES = ('a', 'b', 'c')
+ANGLES = ('A', 'B', 'C')
+
+# Mã số của từng trường hợp (cột int8 của kết quả)
+INSUFFICIENT, SSS, SAS, ASA, AAS, SSA, AAA = range(7)
+CASE_NAMES = ('insufficient', 'SSS', 'SAS', 'ASA', 'AAS', 'SSA', 'AAA')
+
+
+def _column(data, name: str, length: int) -> np.ndarray:
+    names = data.dtype.names if hasattr(data, 'dtype') else data
+    if name in names:
+        return np.asarray(data[name], dtype=np.float64)
+    return np.full(length, np.nan)
+
+
+def _length(data) -> int:
+    if hasattr(data, 'dtype'):
+        return len(data)
+    return len(next(iter(data.values()))) if data else 0
+
+
+class CaseTable:
+    """
+    Case of every row: `codes` (int8, index into CASE_NAMES) and
+    `ssa_solutions` (int8, number of triangles of SSA rows, -1 elsewhere).
+    """
+
+    def __init__(self, codes: np.ndarray, ssa_solutions: np.ndarray):
+        self.codes = codes
+        self.ssa_solutions = ssa_solutions
+
+    def __len__(self):
+        return len(self.codes)
+
+    def names(self) -> np.ndarray:
+        return np.asarray(CASE_NAMES, dtype=object)[self.codes]
+
+    def groups(self, split_ssa: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Row indices (ascending) per case name, empty cases left out. With
+        `split_ssa`, SSA rows are grouped by solution count: 'SSA0', 'SSA1', 'SSA2'.
+        """
+        keys = self.codes.astype(np.int16)
+        if split_ssa:
+            # SSA -> mã riêng theo số nghiệm, sau các mã thường
+            keys = np.where(keys == SSA, len(CASE_NAMES) + self.ssa_solutions, keys)
+        labels = list(CASE_NAMES) + [f'SSA{k}' for k in range(3)]
+        order = np.argsort(keys, kind='stable')
+        counts = np.bincount(keys, minlength=len(labels))
+        out = {}
+        for key, rows in zip(range(len(labels)), np.split(order, np.cumsum(counts)[:-1])):
+            if len(rows):
+                out[labels[key]] = rows
+        return out
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(rows) for name, rows in self.groups().items()}
+
+
+def ssa_solution_count(angle: np.ndarray, opposite: np.ndarray, other: np.ndarray) -> np.ndarray:
+    """
+    Number of triangles (0, 1, 2) with `angle` (degrees) opposite the side
+    `opposite` and `other` as second side, as in solver.detect_ssa_ambiguity:
+    sin of the angle opposite `other` from the law of sines, then the acute
+    solution and its supplement, each kept if the third angle is positive.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sin_a = np.sin(np.radians(angle))
+        sin_other = other * sin_a / opposite
+        valid = (np.abs(sin_a) >= 1e-12) & (sin_other >= -1.0 - 1e-9) & (sin_other <= 1.0 + 1e-9)
+        primary = np.degrees(np.arcsin(np.clip(sin_other, -1.0, 1.0)))
+    supplement = 180.0 - primary
+    first = valid & (180.0 - angle - primary > 0)
+    # sin = 1 (góc 90°) hoặc hai nghiệm trùng nhau: chỉ một tam giác
+    distinct = (np.abs(np.abs(sin_other) - 1.0) > 1e-9) & (np.abs(supplement - primary) > 1e-6)
+    second = valid & distinct & (180.0 - angle - supplement > 0)
+    return (first.astype(np.int8) + second.astype(np.int8))
+
+
+def classify_cases(data) -> CaseTable:
+    """Case of every row of `data` (structured array or name -> array mapping)."""
+    n = _length(data)
+    sides = np.stack([_column(data, s, n) for s in SIDES]) if n else np.empty((3, 0))
+    angles = np.stack([_column(data, s, n) for s in ANGLES]) if n else np.empty((3, 0))
+    ks = ~np.isnan(sides)   # (3, n): cạnh đã biết
+    ka = ~np.isnan(angles)  # (3, n): góc đã biết
+    n_sides = ks.sum(axis=0)
+    n_angles = ka.sum(axis=0)
+
+    # Hai góc cho biết góc thứ ba: góc xen giữa là góc đối diện cạnh còn lại
+    included = (ks & ~ka).any(axis=0) | (n_angles == 3)
+    pair = (ks & ka).any(axis=0)  # một cạnh và góc đối diện cùng biết
+    codes = np.select(
+        [n_sides == 3,
+         (n_sides >= 1) & (n_angles >= 2) & included,
+         (n_sides >= 1) & (n_angles >= 2),
+         (n_sides == 2) & (n_angles == 1) & pair,
+         (n_sides == 2) & (n_angles == 1),
+         (n_sides == 0) & (n_angles >= 2)],
+        [SSS, ASA, AAS, SSA, SAS, AAA], INSUFFICIENT).astype(np.int8)
+
+    ssa_solutions = np.full(n, -1, dtype=np.int8)
+    rows = np.flatnonzero(codes == SSA)
+    if len(rows):
+        ks_r, ka_r = ks[:, rows], ka[:, rows]
+        idx = np.argmax(ka_r, axis=0)  # góc duy nhất đã biết
+        angle = angles[idx, rows]
+        opposite = sides[idx, rows]
+        # cạnh còn lại: cạnh đã biết khác cạnh đối diện
+        other_idx = np.argmax(ks_r & (np.arange(3)[:, None] != idx), axis=0)
+        other = sides[other_idx, rows]
+        ssa_solutions[rows] = ssa_solution_count(angle, opposite, other)
+    return CaseTable(codes, ssa_solutions)
+
+
+def summarize(table: CaseTable) -> Tuple[Tuple[str, int], ...]:
+    """(case, row count) in CASE_NAMES order, SSA split by solution count."""
+    counts = table.counts()
+    order = [name for name in CASE_NAMES if name != 'SSA'] + [f'SSA{k}' for k in range(3)]
+    return tuple((name, counts[name]) for name in order if name in counts)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m triangle_cases',
+                                     description="Phân loại trường hợp tam giác (SSS/SAS/ASA/AAS/SSA) của một mảng .npy")
+    parser.add_argument('input', help="mảng có cấu trúc .npy (cột a, b, c, A, B, C; NaN = chưa biết)")
+    args = parser.parse_args(argv)
+    table = classify_cases(np.load(args.input, mmap_mode='r'))
+    for name, count in summarize(table):
+        print(f"{name}\t{count}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Vertex coordinates of solved shapes, shared by the layout (GUI, export) and
+any geometric check.
+
+Conventions: the first vertex A is at the origin, the side AB (c for a
+triangle, a for a quadrilateral) lies on the positive x axis, and the
+vertices go counter-clockwise. Quadrilateral ABCD has sides a = AB, b = BC,
+c = CD, d = DA and interior angles A, B, C, D in degrees.
+
+Quadrilateral vertices come from the first rule that applies:
+1. a, b, d with angles A and B: D and C straight from the two angles;
+2. a, b, c, d with A (or B): D (or C) from the angle, the last vertex at
+   the intersection of the circles around its two neighbours, on the convex side;
+3. trapezoid (AB // CD) from its four sides, a != c;
+4. four sides only: the cyclic quadrilateral (rhombus: 60°, as drawn before).
+A single missing angle is first completed from the 360° sum.
+
+triangle_vertices / quad_vertices work on scalars (math only, cheap to import
+for the GUI); triangle_vertices_array / quad_vertices_array are their NumPy
+forms for whole columns (NaN = unknown, rows without a placement are NaN).
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+Point = Tuple[float, float]
+EPS = 1e-9
+
+
+def triangle_vertices(a: Optional[float], b: Optional[float], c: Optional[float]) -> Optional[Tuple[Point, Point, Point]]:
+    """A, B, C of the triangle with sides a, b, c (law of cosines), None without the three sides."""
+    if a is None or b is None or c is None:
+        return None
+    if b > 0 and c > 0:
+        cos_A = max(-1.0, min(1.0, (b*b + c*c - a*a) / (2*b*c)))
+        sin_A = math.sqrt(1 - cos_A*cos_A)
+    else:
+        cos_A = sin_A = 0.0
+    return (0.0, 0.0), (c, 0.0), (b * cos_A, b * sin_A)
+
+
+def _circle_intersection(p: Point, r1: float, q: Point, r2: float, away_from: Point) -> Optional[Point]:
+    """Intersection of the circles (p, r1) and (q, r2) on the side of line pq opposite `away_from`."""
+    dx, dy = q[0] - p[0], q[1] - p[1]
+    dist = math.hypot(dx, dy)
+    if dist < EPS:
+        return None
+    x = (r1*r1 - r2*r2 + dist*dist) / (2*dist)
+    h2 = r1*r1 - x*x
+    if h2 < -EPS * max(1.0, r1*r1):
+        return None
+    h = math.sqrt(max(h2, 0.0))
+    ux, uy = dx / dist, dy / dist
+    # Bên trái của p -> q là nửa mặt phẳng có tích có hướng dương
+    side = (dx * (away_from[1] - p[1]) - dy * (away_from[0] - p[0]))
+    sign = -1.0 if side > 0 else 1.0
+    return p[0] + x*ux - sign*h*uy, p[1] + x*uy + sign*h*ux
+
+
+def complete_angles(A, B, C, D):
+    """Fill a single missing quadrilateral angle from the 360° sum."""
+    angles = [A, B, C, D]
+    missing = [i for i, v in enumerate(angles) if v is None]
+    if len(missing) == 1:
+        angles[missing[0]] = 360.0 - sum(v for v in angles if v is not None)
+    return angles
+
+
+def quad_vertices(a, b, c, d, A=None, B=None, C=None, D=None,
+                  shape: str = "quadrilateral") -> Optional[Tuple[Point, Point, Point, Point]]:
+    """Vertices A, B, C, D of a quadrilateral (rules in the module docstring), None if not placeable."""
+    A, B, C, D = complete_angles(A, B, C, D)
+    if a is None:
+        return None
+    pa, pb = (0.0, 0.0), (a, 0.0)
+    # 1. Hai góc kề cạnh AB
+    if A is not None and B is not None and b is not None and d is not None:
+        ra, rb = math.radians(A), math.radians(B)
+        return pa, pb, (a - b * math.cos(rb), b * math.sin(rb)), (d * math.cos(ra), d * math.sin(ra))
+    if b is None or c is None or d is None:
+        return None
+    # 2. Một góc kề AB và bốn cạnh
+    if A is not None:
+        ra = math.radians(A)
+        pd = (d * math.cos(ra), d * math.sin(ra))
+        pc = _circle_intersection(pb, b, pd, c, pa)
+        if pc is not None:
+            return pa, pb, pc, pd
+    if B is not None:
+        rb = math.radians(B)
+        pc = (a - b * math.cos(rb), b * math.sin(rb))
+        pd = _circle_intersection(pc, c, pa, d, pb)
+        if pd is not None:
+            return pa, pb, pc, pd
+    # 3. Hình thang AB // CD từ bốn cạnh
+    if shape == "trapezoid" and abs(c - a) > EPS:
+        x = (b*b - d*d - (c - a)**2) / (2 * (c - a))
+        h2 = d*d - x*x
+        if h2 > 0:
+            h = math.sqrt(h2)
+            return pa, pb, (x + c, h), (x, h)
+    # 4. Chỉ có bốn cạnh: tứ giác nội tiếp (hình thoi: góc 60°)
+    if shape == "rhombus":
+        angle = math.pi / 3
+    else:
+        den = 2 * (a*d + b*c)
+        if den <= 0:
+            return None
+        cos_A = (a*a + d*d - b*b - c*c) / den
+        if abs(cos_A) > 1:
+            return None
+        angle = math.acos(cos_A)
+    pd = (d * math.cos(angle), d * math.sin(angle))
+    pc = _circle_intersection(pb, b, pd, c, pa)
+    return (pa, pb, pc, pd) if pc is not None else None
+
+
+TRIANGLE_SHAPES = ('triangle', 'equilateral_triangle')
+
+
+def shape_vertices(res: Dict[str, Optional[float]], shape: str) -> Optional[List[Point]]:
+    """Vertices of a solved result of any supported shape (geometry_kb network or drawing key)."""
+    if shape in TRIANGLE_SHAPES:
+        points = triangle_vertices(res.get('a'), res.get('b'), res.get('c'))
+    else:
+        points = quad_vertices(*(res.get(n) for n in ('a', 'b', 'c', 'd', 'A', 'B', 'C', 'D')), shape=shape)
+    return list(points) if points is not None else None
+
+
+# --- DẠNG MẢNG (NumPy, nạp khi dùng) ---
+def _column(res, name: str, length: int):
+    import numpy as np
+    names = res.dtype.names if hasattr(res, 'dtype') else res
+    if name in names:
+        return np.asarray(res[name], dtype=np.float64)
+    return np.full(length, np.nan)
+
+
+def _length(res) -> int:
+    return len(res) if hasattr(res, 'dtype') else (len(next(iter(res.values()))) if res else 0)
+
+
+def triangle_vertices_array(res):
+    """(n, 3, 2) vertices of every row (structured array or name -> column mapping), NaN without a, b, c."""
+    import numpy as np
+    n = _length(res)
+    a, b, c = (_column(res, k, n) for k in ('a', 'b', 'c'))
+    out = np.full((n, 3, 2), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_A = np.clip((b*b + c*c - a*a) / (2*b*c), -1.0, 1.0)
+        sin_A = np.sqrt(1 - cos_A*cos_A)
+    degenerate = ~((b > 0) & (c > 0))
+    cos_A = np.where(degenerate, 0.0, cos_A)
+    sin_A = np.where(degenerate, 0.0, sin_A)
+    ok = ~(np.isnan(a) | np.isnan(b) | np.isnan(c))
+    out[ok, 0] = 0.0
+    out[ok, 1, 0], out[ok, 1, 1] = c[ok], 0.0
+    out[ok, 2, 0], out[ok, 2, 1] = (b * cos_A)[ok], (b * sin_A)[ok]
+    return out
+
+
+def _circle_intersection_array(px, py, r1, qx, qy, r2, ax, ay):
+    import numpy as np
+    dx, dy = qx - px, qy - py
+    dist = np.hypot(dx, dy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = (r1*r1 - r2*r2 + dist*dist) / (2*dist)
+        h2 = r1*r1 - x*x
+        ok = (dist >= EPS) & ~(h2 < -EPS * np.maximum(1.0, r1*r1))
+        h = np.sqrt(np.maximum(h2, 0.0))
+        ux, uy = dx / dist, dy / dist
+    side = dx * (ay - py) - dy * (ax - px)
+    sign = np.where(side > 0, -1.0, 1.0)
+    cx = px + x*ux - sign*h*uy
+    cy = py + x*uy + sign*h*ux
+    return np.where(ok, cx, np.nan), np.where(ok, cy, np.nan)
+
+
+def quad_vertices_array(res, shape: str = "quadrilateral"):
+    """(n, 4, 2) vertices of every row by the rules of quad_vertices, NaN where none applies."""
+    import numpy as np
+    n = _length(res)
+    a, b, c, d, A, B, C, D = (_column(res, k, n) for k in ('a', 'b', 'c', 'd', 'A', 'B', 'C', 'D'))
+    # Bù góc còn thiếu duy nhất
+    angles = np.stack([A, B, C, D])
+    missing = np.isnan(angles)
+    fill = missing & (missing.sum(axis=0) == 1)
+    angles = np.where(fill, 360.0 - np.nansum(angles, axis=0), angles)
+    A, B = angles[0], angles[1]
+
+    def known(x):
+        return ~np.isnan(x)
+    zero = np.zeros(n)
+    out = np.full((n, 4, 2), np.nan)
+    done = np.zeros(n, dtype=bool)
+
+    def put(mask, cx, cy, dx_, dy_):
+        mask = mask & ~done & known(a) & known(cx) & known(cy) & known(dx_) & known(dy_)
+        out[mask, 0] = 0.0
+        out[mask, 1, 0], out[mask, 1, 1] = a[mask], 0.0
+        out[mask, 2, 0], out[mask, 2, 1] = cx[mask], cy[mask]
+        out[mask, 3, 0], out[mask, 3, 1] = dx_[mask], dy_[mask]
+        done[mask] = True
+
+    ra, rb = np.radians(A), np.radians(B)
+    dx_a, dy_a = d * np.cos(ra), d * np.sin(ra)
+    cx_b, cy_b = a - b * np.cos(rb), b * np.sin(rb)
+    # 1. Hai góc kề cạnh AB
+    put(known(A) & known(B) & known(b) & known(d), cx_b, cy_b, dx_a, dy_a)
+    sides = known(a) & known(b) & known(c) & known(d)
+    # 2. Một góc kề AB và bốn cạnh
+    cx, cy = _circle_intersection_array(a, zero, b, dx_a, dy_a, c, zero, zero)
+    put(sides & known(A), cx, cy, dx_a, dy_a)
+    dx2, dy2 = _circle_intersection_array(cx_b, cy_b, c, zero, zero, d, a, zero)
+    put(sides & known(B), cx_b, cy_b, dx2, dy2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 3. Hình thang AB // CD
+        if shape == "trapezoid":
+            x = (b*b - d*d - (c - a)**2) / (2 * (c - a))
+            h = np.sqrt(np.where(d*d - x*x > 0, d*d - x*x, np.nan))
+            put(sides & (np.abs(c - a) > EPS), x + c, h, x, h)
+        # 4. Tứ giác nội tiếp (hình thoi: 60°)
+        if shape == "rhombus":
+            angle = np.full(n, math.pi / 3)
+        else:
+            den = 2 * (a*d + b*c)
+            cos_A = (a*a + d*d - b*b - c*c) / den
+            angle = np.where((den > 0) & (np.abs(cos_A) <= 1), np.arccos(np.clip(cos_A, -1.0, 1.0)), np.nan)
+    dx4, dy4 = d * np.cos(angle), d * np.sin(angle)
+    cx4, cy4 = _circle_intersection_array(a, zero, b, dx4, dy4, c, zero, zero)
+    put(sides, cx4, cy4, dx4, dy4)
+    return out